@@ -0,0 +1,762 @@
+"""
+Cache Backends for Zimmer AI Platform
+Storage engines behind cache_manager.CacheManager: a bounded in-process
+LRU store (default) and a Redis-protocol store shared by all workers
+"""
+
+import os
+import sys
+import time
+import heapq
+import json
+import uuid
+import pickle
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Dict, Iterable, List, Set, Tuple
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional at runtime
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Engine limits (overridable per instance)
+DEFAULT_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Shared backend settings
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+CACHE_NAMESPACE = os.getenv("CACHE_NAMESPACE", "zimmer:cache:")
+
+# Two-tier mode: small per-worker L1 in front of the shared store
+CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", "5"))
+
+
+def _estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate the memory footprint of a cached value in bytes.
+
+    Only computed once per ``set`` so the cost is paid by the writer,
+    never by ``get_stats``.
+    """
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            _estimate_size(k, _depth + 1) + _estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item, _depth + 1) for item in value)
+    return size
+
+
+class CacheBackend:
+    """Storage interface used by CacheManager.
+
+    ``ttl`` is always resolved by the manager, backends never apply defaults.
+    ``tags`` attach an entry to invalidation groups such as ``user:42``;
+    ``invalidate_tag`` drops every entry carrying that tag.
+    """
+
+    name = "base"
+    # True when every worker sees the same entries and invalidations
+    shared = False
+
+    def set_observer(self, observer: Any) -> None:
+        """Report stored and removed entries to ``observer`` (see cache_metrics)"""
+        pass
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Fetch several keys, omitting misses"""
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        """Store several keys with the same TTL"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every entry tagged with ``tag`` and return how many went"""
+        raise NotImplementedError
+
+    def pop_tag(self, tag: str) -> List[str]:
+        """Like ``invalidate_tag`` but return the keys the tag covered"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries; backends with native expiry return 0"""
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class _CacheEntry:
+    """Single cache slot"""
+
+    __slots__ = ("value", "expires_at", "created_at", "size", "tags")
+
+    def __init__(
+        self,
+        value: Any,
+        expires_at: float,
+        created_at: float,
+        size: int,
+        tags: Tuple[str, ...] = ()
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.size = size
+        self.tags = tags
+
+
+class InMemoryBackend(CacheBackend):
+    """Bounded in-process cache with LRU eviction and TTL expiry.
+
+    Entries live in an ``OrderedDict`` kept in recency order, so hits and
+    evictions are O(1). Expiry deadlines are tracked in a min-heap that is
+    drained on every read and write, so expired entries are removed even if
+    nobody asks for them again. Byte usage is maintained incrementally which
+    keeps ``get_stats`` O(1). A reverse index from tag to keys makes
+    ``invalidate_tag`` proportional to the number of tagged entries.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self.max_entries = max_entries if max_entries is not None else DEFAULT_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES
+        self._bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._observer = None
+
+    def set_observer(self, observer: Any) -> None:
+        self._observer = observer
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        now = time.time()
+        entry = _CacheEntry(value, now + ttl, now, _estimate_size(value), tuple(tags))
+
+        with self._lock:
+            self._purge_expired(now)
+
+            if key in self._cache:
+                self._remove(key)
+
+            self._cache[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            heapq.heappush(self._expiry_heap, (entry.expires_at, key))
+            if self._observer is not None:
+                self._observer.stored(key, entry.size)
+
+            self._enforce_limits()
+            self._compact_heap()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+
+            # Heap draining is lazy for equal deadlines, so double-check
+            if now > entry.expires_at:
+                self._remove(key, "expired")
+                self._expirations += 1
+                return None
+
+            self._cache.move_to_end(key)
+            return entry.value
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+                return True
+            return False
+
+    def invalidate_tag(self, tag: str) -> int:
+        return len(self.pop_tag(tag))
+
+    def pop_tag(self, tag: str) -> List[str]:
+        with self._lock:
+            keys = self._tags.pop(tag, ())
+            removed = []
+            for key in keys:
+                if key in self._cache:
+                    self._remove(key)
+                    removed.append(key)
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._expiry_heap.clear()
+            self._tags.clear()
+            self._bytes = 0
+            if self._observer is not None:
+                self._observer.cleared()
+
+    def cleanup_expired(self) -> int:
+        with self._lock:
+            return self._purge_expired(time.time())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired(time.time())
+            total_entries = len(self._cache)
+
+            return {
+                'total_entries': total_entries,
+                'active_entries': total_entries,
+                'expired_entries': 0,
+                'cache_size_mb': self._bytes / (1024 * 1024),
+                'max_entries': self.max_entries,
+                'max_size_mb': self.max_bytes / (1024 * 1024),
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'tags': len(self._tags)
+            }
+
+    def _remove(self, key: str, reason: str = "deleted") -> None:
+        """Drop a key and release its accounted bytes (caller holds the lock)"""
+        self._release(key, self._cache.pop(key), reason)
+
+    def _release(self, key: str, entry: _CacheEntry, reason: str = "deleted") -> None:
+        """Undo the byte and tag bookkeeping of a removed entry (caller holds the lock)"""
+        self._bytes -= entry.size
+        if self._observer is not None:
+            self._observer.removed(key, entry.size, reason)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _purge_expired(self, now: float) -> int:
+        """Pop every deadline that has passed (caller holds the lock)"""
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # Skip heap records left behind by overwritten or deleted keys
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key, "expired")
+                removed += 1
+        self._expirations += removed
+        return removed
+
+    def _enforce_limits(self) -> None:
+        """Evict least recently used entries until within budget (caller holds the lock)"""
+        while self._cache and (
+            len(self._cache) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, entry = self._cache.popitem(last=False)
+            self._release(key, entry, "evicted")
+            self._evictions += 1
+
+    def _compact_heap(self) -> None:
+        """Rebuild the expiry heap once stale records outnumber live ones"""
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [
+                (entry.expires_at, key) for key, entry in self._cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+
+class RedisBackend(CacheBackend):
+    """Cache stored in Redis (or any server speaking the Redis protocol).
+
+    All workers share one keyspace, so adding workers adds capacity instead
+    of splitting the hit rate. Values are pickled, keys are namespaced so
+    ``clear`` never touches data owned by other applications, and multi-key
+    operations are sent as a single pipeline. Connection errors degrade to
+    cache misses rather than failing the request.
+
+    Each tag is a Redis set of the keys carrying it; its TTL is only ever
+    extended so it outlives every member.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        client: Any = None,
+        namespace: str = CACHE_NAMESPACE,
+        max_connections: int = REDIS_MAX_CONNECTIONS,
+        socket_timeout: float = REDIS_SOCKET_TIMEOUT
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("redis package is not installed")
+            pool = redis.ConnectionPool.from_url(
+                url or REDIS_URL,
+                max_connections=max_connections,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout
+            )
+            client = redis.Redis(connection_pool=pool)
+        self._client = client
+        self.namespace = namespace
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}tag:{tag}"
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Optional[Any]:
+        if raw is None:
+            return None
+        return pickle.loads(raw)
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"Redis cache {operation} failed: {error}")
+
+    def ping(self) -> bool:
+        return bool(self._client.ping())
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            return self._decode(self._client.get(self._key(key)))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        ttl = max(1, int(ttl))
+        try:
+            tags = list(tags)
+            if not tags:
+                self._client.set(self._key(key), self._encode(value), ex=ttl)
+                return
+            pipe = self._client.pipeline(transaction=False)
+            pipe.set(self._key(key), self._encode(value), ex=ttl)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+            pipe.execute()
+        except Exception as e:
+            self._failed("set", e)
+
+    def delete(self, key: str) -> bool:
+        try:
+            return bool(self._client.delete(self._key(key)))
+        except Exception as e:
+            self._failed("delete", e)
+            return False
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            raw_values = self._client.mget([self._key(key) for key in keys])
+        except Exception as e:
+            self._failed("mget", e)
+            return {}
+        return {
+            key: self._decode(raw)
+            for key, raw in zip(keys, raw_values)
+            if raw is not None
+        }
+
+    def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        if not items:
+            return
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self._key(key), self._encode(value), ex=max(1, int(ttl)))
+            pipe.execute()
+        except Exception as e:
+            self._failed("pipeline set", e)
+
+    def invalidate_tag(self, tag: str) -> int:
+        return self._invalidate_tag(tag)[0]
+
+    def pop_tag(self, tag: str) -> List[str]:
+        return self._invalidate_tag(tag)[1]
+
+    def _invalidate_tag(self, tag: str) -> Tuple[int, List[str]]:
+        tag_key = self._tag_key(tag)
+        try:
+            members = list(self._client.smembers(tag_key))
+            if not members:
+                return 0, []
+            keys = [m.decode() if isinstance(m, bytes) else m for m in members]
+            pipe = self._client.pipeline(transaction=False)
+            pipe.delete(*[self._key(key) for key in keys])
+            # SREM rather than DEL keeps keys tagged after the SMEMBERS snapshot
+            pipe.srem(tag_key, *members)
+            removed, _ = pipe.execute()
+            return int(removed), keys
+        except Exception as e:
+            self._failed("invalidate tag", e)
+            return 0, []
+
+    def clear(self) -> None:
+        try:
+            batch = []
+            for key in self._client.scan_iter(match=f"{self.namespace}*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    self._client.delete(*batch)
+                    batch = []
+            if batch:
+                self._client.delete(*batch)
+        except Exception as e:
+            self._failed("clear", e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            info = self._client.info()
+            total_entries = int(self._client.dbsize())
+        except Exception as e:
+            self._failed("stats", e)
+            return {'status': 'unavailable', 'errors': self.errors}
+
+        return {
+            'total_entries': total_entries,
+            'active_entries': total_entries,
+            'expired_entries': int(info.get('expired_keys', 0)),
+            'cache_size_mb': int(info.get('used_memory', 0)) / (1024 * 1024),
+            'evictions': int(info.get('evicted_keys', 0)),
+            'server_hits': int(info.get('keyspace_hits', 0)),
+            'server_misses': int(info.get('keyspace_misses', 0)),
+            'errors': self.errors
+        }
+
+
+class InvalidationBus:
+    """Fan-out channel telling every worker which L1 entries to drop.
+
+    Messages are dicts with optional ``keys``, ``tags`` and ``clear``
+    fields. A ``None`` message means the subscription was interrupted and
+    anything cached locally may have missed invalidations.
+    """
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBus(InvalidationBus):
+    """In-process bus; backends sharing one instance behave like workers"""
+
+    def __init__(self):
+        self._subscribers: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(message)
+
+    def subscribe(self, callback: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+
+class RedisBus(InvalidationBus):
+    """Invalidation fan-out over Redis pub/sub.
+
+    A daemon thread per worker listens on the channel and reconnects after
+    errors. Delivery is at-most-once, so every reconnect is reported to the
+    subscribers as a ``None`` message.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        client: Any = None,
+        channel: str = f"{CACHE_NAMESPACE}invalidate",
+        socket_timeout: float = REDIS_SOCKET_TIMEOUT
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("redis package is not installed")
+            client = redis.Redis.from_url(
+                url or REDIS_URL,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout
+            )
+        self._client = client
+        self.channel = channel
+        self._subscribers: List[Callable] = []
+        self._stopped = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        try:
+            self._client.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache invalidation publish failed: {e}")
+
+    def subscribe(self, callback: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        self._subscribers.append(callback)
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        """Block until the listener is subscribed (mainly for tests)"""
+        return self._ready.wait(timeout)
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _deliver(self, message: Optional[Dict[str, Any]]) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.warning(f"Cache invalidation handler failed: {e}")
+
+    def _listen(self) -> None:
+        backoff = 0.1
+        while not self._stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._ready.set()
+                backoff = 0.1
+                while not self._stopped.is_set():
+                    item = pubsub.get_message(timeout=0.2)
+                    if item is not None and item.get("type") == "message":
+                        self._deliver(json.loads(item["data"]))
+            except Exception as e:
+                self.errors += 1
+                self._ready.clear()
+                logger.warning(f"Cache invalidation subscription lost: {e}")
+                self._deliver(None)
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+class TieredBackend(CacheBackend):
+    """Per-worker L1 in front of a shared L2 such as ``RedisBackend``.
+
+    Reads are served from the L1 when possible and fill it from the L2
+    with a short TTL. Writes and invalidations go to the L2 and are then
+    published on the bus so every other worker drops its L1 copy; the TTL
+    bounds staleness if a message is lost. An L1 fill is skipped when an
+    invalidation arrived while the L2 read was in flight.
+    """
+
+    name = "tiered"
+    shared = True
+
+    def __init__(
+        self,
+        l2: CacheBackend,
+        bus: InvalidationBus,
+        l1: Optional[InMemoryBackend] = None,
+        l1_ttl: int = CACHE_L1_TTL
+    ):
+        self.l1 = l1 if l1 is not None else InMemoryBackend(max_entries=CACHE_L1_MAX_ENTRIES)
+        self.l2 = l2
+        self.bus = bus
+        self.l1_ttl = l1_ttl
+        self.origin = uuid.uuid4().hex
+        self._generation = 0
+        self._l1_hits = 0
+        self._l2_hits = 0
+        self._misses = 0
+        self._received = 0
+        bus.subscribe(self._on_message)
+
+    def set_observer(self, observer: Any) -> None:
+        self.l1.set_observer(observer)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None:
+            self._l1_hits += 1
+            return value
+        generation = self._generation
+        value = self.l2.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._l2_hits += 1
+        self._fill(generation, {key: value})
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        result = self.l1.get_many(keys)
+        self._l1_hits += len(result)
+        missing = [key for key in keys if key not in result]
+        if missing:
+            generation = self._generation
+            fetched = self.l2.get_many(missing)
+            self._l2_hits += len(fetched)
+            self._misses += len(missing) - len(fetched)
+            self._fill(generation, fetched)
+            result.update(fetched)
+        return result
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        self.l2.set(key, value, ttl, tags)
+        self.l1.set(key, value, min(ttl, self.l1_ttl), tags)
+        self._publish(keys=[key])
+
+    def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        if not items:
+            return
+        self.l2.set_many(items, ttl)
+        self.l1.set_many(items, min(ttl, self.l1_ttl))
+        self._publish(keys=list(items))
+
+    def delete(self, key: str) -> bool:
+        removed = self.l2.delete(key)
+        self.l1.delete(key)
+        self._publish(keys=[key])
+        return removed
+
+    def invalidate_tag(self, tag: str) -> int:
+        return len(self.pop_tag(tag))
+
+    def pop_tag(self, tag: str) -> List[str]:
+        keys = self.l2.pop_tag(tag)
+        self._drop_local(keys, [tag])
+        self._publish(keys=keys, tags=[tag])
+        return keys
+
+    def clear(self) -> None:
+        self.l2.clear()
+        self.l1.clear()
+        self._publish(clear=True)
+
+    def cleanup_expired(self) -> int:
+        return self.l1.cleanup_expired() + self.l2.cleanup_expired()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.l2.get_stats())
+        stats['l2_backend'] = self.l2.name
+        stats['l1'] = dict(
+            self.l1.get_stats(),
+            ttl=self.l1_ttl,
+            hits=self._l1_hits,
+            l2_hits=self._l2_hits,
+            misses=self._misses,
+            invalidations_received=self._received
+        )
+        return stats
+
+    def _fill(self, generation: int, items: Dict[str, Any]) -> None:
+        # A concurrent invalidation may already cover what the L2 returned
+        if items and generation == self._generation:
+            self.l1.set_many(items, self.l1_ttl)
+
+    def _drop_local(self, keys: Iterable[str], tags: Iterable[str] = ()) -> None:
+        self._generation += 1
+        for tag in tags:
+            self.l1.invalidate_tag(tag)
+        for key in keys:
+            self.l1.delete(key)
+
+    def _publish(self, **message: Any) -> None:
+        message["origin"] = self.origin
+        self.bus.publish(message)
+
+    def _on_message(self, message: Optional[Dict[str, Any]]) -> None:
+        if message is not None and message.get("origin") == self.origin:
+            return
+        self._received += 1
+        if message is None or message.get("clear"):
+            self._generation += 1
+            self.l1.clear()
+            return
+        self._drop_local(message.get("keys", ()), message.get("tags", ()))
+
+
+def create_backend(kind: Optional[str] = None, **kwargs) -> CacheBackend:
+    """Build the configured backend, falling back to in-process storage.
+
+    ``CACHE_BACKEND=redis`` selects the shared backend and
+    ``CACHE_BACKEND=tiered`` puts a per-worker L1 in front of it, kept
+    coherent over Redis pub/sub. If the server cannot be reached at startup
+    the worker keeps serving from its own memory.
+    """
+    kind = (kind or CACHE_BACKEND).lower()
+    if kind in ("redis", "tiered"):
+        try:
+            backend = RedisBackend(url=kwargs.get("url"))
+            backend.ping()
+            if kind == "tiered":
+                return TieredBackend(backend, RedisBus(url=kwargs.get("url")))
+            return backend
+        except Exception as e:
+            print(f"⚠️  Redis cache unavailable ({e}), using in-process cache")
+    return InMemoryBackend(kwargs.get("max_entries"), kwargs.get("max_bytes"))
@@ -3,114 +3,472 @@ Cache Manager for Zimmer AI Platform
 Provides in-memory caching for frequently accessed data
 """
 
+import os
 import time
 import json
-from typing import Any, Optional, Dict, Union
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional, Dict, Iterable, Sequence, Union
 from functools import wraps
 from datetime import datetime, timedelta
 
+from cache_backends import CacheBackend, InMemoryBackend, RedisBackend, create_backend
+from cache_metrics import CacheMetrics, cache_metrics, register_prefix
+
+logger = logging.getLogger(__name__)
+
 class CacheManager:
-    """Simple in-memory cache manager"""
+    """Cache facade over a pluggable storage backend.
+
+    Without an explicit ``backend`` the one selected by ``CACHE_BACKEND`` is
+    used (bounded in-process LRU by default, Redis when configured, or a
+    per-worker L1 in front of Redis in tiered mode). Lookups, writes and
+    storage churn are reported to ``metrics`` by key prefix.
+    """
     
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._default_ttl = 300  # 5 minutes default
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: int = 300,
+        backend: Optional[CacheBackend] = None,
+        metrics: Optional[CacheMetrics] = None
+    ):
+        if backend is None:
+            backend = create_backend(max_entries=max_entries, max_bytes=max_bytes)
+        self.backend = backend
+        self.metrics = metrics if metrics is not None else cache_metrics
+        backend.set_observer(self.metrics)
+        self._default_ttl = default_ttl  # 5 minutes default
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set a cache entry with optional TTL"""
-        ttl = ttl or self._default_ttl
-        expires_at = time.time() + ttl
-        
-        self._cache[key] = {
-            'value': value,
-            'expires_at': expires_at,
-            'created_at': time.time()
-        }
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """Set a cache entry with optional TTL and invalidation tags"""
+        self.backend.set(key, value, ttl or self._default_ttl, tags or ())
+        self.metrics.record_set(key)
     
     def get(self, key: str) -> Optional[Any]:
         """Get a cache entry if it exists and hasn't expired"""
-        if key not in self._cache:
-            return None
-        
-        entry = self._cache[key]
-        
-        # Check if expired
-        if time.time() > entry['expires_at']:
-            del self._cache[key]
-            return None
-        
-        return entry['value']
+        started = time.perf_counter()
+        value = self.backend.get(key)
+        self.metrics.record_lookup(key, value is not None, time.perf_counter() - started)
+        return value
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several cache entries in one backend round trip"""
+        keys = list(keys)
+        started = time.perf_counter()
+        values = self.backend.get_many(keys)
+        # The round trip is shared, so charge each key its share
+        share = (time.perf_counter() - started) / max(1, len(keys))
+        for key in keys:
+            self.metrics.record_lookup(key, key in values, share)
+        return values
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set several cache entries in one backend round trip"""
+        self.backend.set_many(items, ttl or self._default_ttl)
+        for key in items:
+            self.metrics.record_set(key)
     
     def delete(self, key: str) -> bool:
         """Delete a cache entry"""
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        return self.backend.delete(key)
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every entry tagged with ``tag``"""
+        return self.backend.invalidate_tag(tag)
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry carrying any of ``tags``"""
+        return sum(self.backend.invalidate_tag(tag) for tag in tags)
     
     def clear(self) -> None:
         """Clear all cache entries"""
-        self._cache.clear()
+        self.backend.clear()
     
     def cleanup_expired(self) -> int:
         """Remove expired entries and return count of removed entries"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if current_time > entry['expires_at']
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        return len(expired_keys)
+        return self.backend.cleanup_expired()
+    
+    @property
+    def shared(self) -> bool:
+        """Whether invalidations reach every worker"""
+        return self.backend.shared
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        current_time = time.time()
-        total_entries = len(self._cache)
-        expired_entries = sum(
-            1 for entry in self._cache.values()
-            if current_time > entry['expires_at']
-        )
-        
-        return {
-            'total_entries': total_entries,
-            'active_entries': total_entries - expired_entries,
-            'expired_entries': expired_entries,
-            'cache_size_mb': sum(
-                len(str(entry['value']).encode('utf-8'))
-                for entry in self._cache.values()
-            ) / (1024 * 1024)
-        }
+        stats = self.backend.get_stats()
+        stats['backend'] = self.backend.name
+        stats['shared'] = self.backend.shared
+        return stats
 
 # Global cache instance
 cache = CacheManager()
 
-def cached(ttl: int = 300, key_prefix: str = ""):
-    """Decorator for caching function results"""
+# Invalidation tags shared by cached views
+ADMIN_STATS_TAG = "admin-stats"
+ADMIN_USERS_TAG = "admin-users"
+MARKETPLACE_TAG = "marketplace"
+NOTIFICATIONS_TAG = "notifications"
+
+def invalidated_ttl(ttl: int, local_ttl: int) -> int:
+    """TTL for an entry kept fresh by tag invalidation.
+    
+    Long TTLs are only safe when invalidations reach every worker; with the
+    per-worker memory backend the other workers keep their copy until it
+    expires, so ``local_ttl`` bounds how stale they can get.
+    """
+    return ttl if cache.shared else local_ttl
+
+def user_tag(user_id: int) -> str:
+    """Tag for entries derived from a user's profile, balances or automations"""
+    return f"user:{user_id}"
+
+def automation_tag(automation_id: int) -> str:
+    """Tag for entries derived from an automation row"""
+    return f"automation:{automation_id}"
+
+def notifications_tag(user_id: int) -> str:
+    """Tag for entries derived from a user's notifications"""
+    return f"notifications:{user_id}"
+
+class SingleFlight:
+    """Coalesce concurrent computations of the same key into one call.
+
+    Coroutines waiting on a key share the leader's future; threads are
+    serialized per key through a fixed set of striped locks so the ones
+    queued behind the leader can re-check the cache instead of recomputing.
+    """
+    
+    def __init__(self, stripes: int = 64):
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self.coalesced = 0
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``factory()`` unless a call for ``key`` is already in flight.
+
+        The call runs in its own task, so cancelling any caller (the one that
+        started it included) leaves it running for the others.
+        """
+        task = self._futures.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._futures[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+    
+    def _finished(self, key: str, task: asyncio.Future) -> None:
+        if self._futures.get(key) is task:
+            del self._futures[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when nobody was waiting
+    
+    def lock(self, key: str) -> threading.Lock:
+        """Lock guarding synchronous computation of ``key``"""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+def _resolve_argument(arguments: Dict[str, Any], path: str) -> Any:
+    """Look up ``name`` or ``name.attr.attr`` among bound call arguments"""
+    name, *attrs = path.split(".")
+    value = arguments[name]
+    for attr in attrs:
+        value = getattr(value, attr)
+    return value
+
+def cached(
+    ttl: int = 300,
+    key_prefix: str = "",
+    key: Optional[Callable[..., Any]] = None,
+    key_args: Optional[Sequence[str]] = None,
+    tags: Union[Iterable[str], Callable[..., Iterable[str]], None] = None
+):
+    """Decorator for caching function results.
+    
+    Works for both ``def`` and ``async def`` functions. The key is built
+    only from what the caller declares, never from injected objects such as
+    ``Session`` or ORM rows:
+    
+    - ``key``: callable receiving the bound arguments by name
+    - ``key_args``: argument names, dotted paths allowed (``"current_user.id"``)
+    
+    Functions that take parameters must declare one of the two. ``tags`` may
+    also be a callable receiving the bound arguments. Concurrent misses for
+    the same key share a single computation.
+    """
     def decorator(func):
+        signature = inspect.signature(func)
+        if key is None and key_args is None and signature.parameters:
+            raise TypeError(
+                f"cached() on {func.__name__} needs key= or key_args= "
+                "to build a cache key from its parameters"
+            )
+        flight = SingleFlight()
+        register_prefix(f"{key_prefix}{func.__name__}")
+        
+        def resolve(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            
+            if key is not None:
+                suffix = str(key(**arguments))
+            else:
+                suffix = ":".join(str(_resolve_argument(arguments, path)) for path in key_args or ())
+            entry_tags = tags(**arguments) if callable(tags) else tags
+            return f"{key_prefix}{func.__name__}:{suffix}", entry_tags
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key, entry_tags = resolve(args, kwargs)
+                
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    return cached_result
+                
+                async def compute():
+                    started = time.perf_counter()
+                    result = await func(*args, **kwargs)
+                    cache.metrics.record_compute(cache_key, time.perf_counter() - started)
+                    if result is not None:
+                        cache.set(cache_key, result, ttl, tags=entry_tags)
+                    return result
+                
+                return await flight.run(cache_key, compute)
+            
+            async_wrapper.flight = flight
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{key_prefix}{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
+            cache_key, entry_tags = resolve(args, kwargs)
             
             # Try to get from cache
             cached_result = cache.get(cache_key)
             if cached_result is not None:
                 return cached_result
             
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
+            with flight.lock(cache_key):
+                # Another thread may have filled it while we waited
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    flight.coalesced += 1
+                    return cached_result
+                
+                # Execute function and cache result
+                started = time.perf_counter()
+                result = func(*args, **kwargs)
+                cache.metrics.record_compute(cache_key, time.perf_counter() - started)
+                if result is not None:
+                    cache.set(cache_key, result, ttl, tags=entry_tags)
             
             return result
+        
+        wrapper.flight = flight
         return wrapper
     return decorator
 
-def cache_user_data(user_id: int, data: Any, ttl: int = 300):
+class StaleWhileRevalidate:
+    """Serve cached values past their soft TTL while refreshing in the background.
+    
+    Entries are stored as ``{"value", "fresh_until"}`` envelopes with the
+    hard TTL as cache expiry. Before ``fresh_until`` the value is simply
+    returned; between soft and hard TTL it is still returned and a single
+    background task recomputes it; only a hard miss makes the caller wait
+    (coalesced through SingleFlight). Synchronous loaders run in a worker
+    thread, so they must open their own database session rather than
+    borrowing the request's.
+    """
+    
+    def __init__(self, manager: "CacheManager"):
+        self._manager = manager
+        self._flight = SingleFlight()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+    
+    async def get(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        soft_ttl: int,
+        hard_ttl: int,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Return the value for ``key``, computing it with ``loader`` when needed"""
+        envelope = self._manager.get(key)
+        if envelope is not None:
+            if time.time() >= envelope["fresh_until"]:
+                self._schedule_refresh(key, loader, soft_ttl, hard_ttl, tags)
+                self._record(key, "stale_hits")
+            else:
+                self._record(key, "fresh_hits")
+            return envelope["value"]
+        
+        self._record(key, "blocking_loads")
+        return await self._flight.run(
+            key, lambda: self._refresh(key, loader, soft_ttl, hard_ttl, tags)
+        )
+    
+    async def _refresh(self, key, loader, soft_ttl, hard_ttl, tags) -> Any:
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(loader):
+                value = await loader()
+            else:
+                value = await asyncio.to_thread(loader)
+        except Exception:
+            self._record(key, "failures")
+            raise
+        duration = time.perf_counter() - started
+        self._manager.metrics.record_compute(key, duration)
+        
+        self._manager.set(
+            key,
+            {"value": value, "fresh_until": time.time() + soft_ttl},
+            hard_ttl,
+            tags=tags
+        )
+        
+        stats = self._stats[key]
+        stats["refreshes"] += 1
+        stats["refresh_seconds_total"] += duration
+        stats["refresh_seconds_last"] = duration
+        stats["refresh_seconds_max"] = max(stats["refresh_seconds_max"], duration)
+        stats["last_refreshed_at"] = datetime.utcnow().isoformat()
+        return value
+    
+    def _schedule_refresh(self, key, loader, soft_ttl, hard_ttl, tags) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, loader, soft_ttl, hard_ttl, tags))
+        self._refreshing[key] = task
+        
+        def done(finished: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.error(f"Background refresh of {key} failed: {finished.exception()}")
+        
+        task.add_done_callback(done)
+    
+    def _record(self, key: str, counter: str) -> None:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = {
+                "fresh_hits": 0,
+                "stale_hits": 0,
+                "blocking_loads": 0,
+                "refreshes": 0,
+                "failures": 0,
+                "refresh_seconds_total": 0.0,
+                "refresh_seconds_last": 0.0,
+                "refresh_seconds_max": 0.0,
+                "last_refreshed_at": None
+            }
+        stats[counter] += 1
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-key hit and refresh-duration statistics"""
+        result = {}
+        for key, stats in self._stats.items():
+            result[key] = dict(stats)
+            result[key]["refresh_seconds_avg"] = (
+                stats["refresh_seconds_total"] / stats["refreshes"] if stats["refreshes"] else 0.0
+            )
+            result[key]["refreshing"] = key in self._refreshing
+        return result
+
+# Soft/hard TTL front for expensive shared views
+swr = StaleWhileRevalidate(cache)
+
+# Negative caching of lookups that found nothing
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "30"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+BOT_TOKEN_NS = "bot_token"
+USER_NS = "user"
+DISCOUNT_CODE_NS = "discount_code"
+
+class NegativeCache:
+    """Remembers recent lookups that found nothing.
+    
+    Kept in its own bounded in-process store so a flood of unknown keys
+    (a deleted bot Telegram keeps retrying, random codes) can neither
+    reach the database nor evict real entries from the main cache. Entries
+    are per worker; whatever creates the missing row should call
+    ``forget``, and the short TTL bounds how long other workers keep
+    answering "not found".
+    """
+    
+    def __init__(self, ttl: int = NEGATIVE_CACHE_TTL, max_entries: int = NEGATIVE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self._backend = InMemoryBackend(max_entries=max_entries)
+        self._backend.set_observer(cache_metrics)
+    
+    @staticmethod
+    def _key(namespace: str, key: Any) -> str:
+        return f"negative_{namespace}:{key}"
+    
+    def is_missing(self, namespace: str, key: Any) -> bool:
+        """True if ``key`` was recently looked up in ``namespace`` and not found"""
+        cache_key = self._key(namespace, key)
+        started = time.perf_counter()
+        missing = self._backend.get(cache_key) is not None
+        cache_metrics.record_lookup(cache_key, missing, time.perf_counter() - started)
+        return missing
+    
+    def mark_missing(self, namespace: str, key: Any) -> None:
+        cache_key = self._key(namespace, key)
+        self._backend.set(cache_key, True, self.ttl, tags=(namespace,))
+        cache_metrics.record_set(cache_key)
+    
+    def forget(self, namespace: str, key: Any) -> None:
+        """Drop a negative entry once the row exists"""
+        self._backend.delete(self._key(namespace, key))
+    
+    def forget_namespace(self, namespace: str) -> int:
+        return self._backend.invalidate_tag(namespace)
+    
+    def lookup(self, namespace: str, key: Any, loader: Callable[[], Any]) -> Any:
+        """Return ``loader()``, skipping it while ``key`` is known to be missing"""
+        if self.is_missing(namespace, key):
+            return None
+        value = loader()
+        if value is None:
+            self.mark_missing(namespace, key)
+        return value
+    
+    async def lookup_async(self, namespace: str, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """``lookup`` for coroutine loaders"""
+        if self.is_missing(namespace, key):
+            return None
+        value = await loader()
+        if value is None:
+            self.mark_missing(namespace, key)
+        return value
+    
+    def clear(self) -> None:
+        self._backend.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._backend.get_stats(), ttl=self.ttl)
+
+negative_cache = NegativeCache()
+
+def cache_user_data(user_id: int, data: Any, ttl: Optional[int] = None):
     """Cache user-specific data"""
-    cache.set(f"user:{user_id}", data, ttl)
+    ttl = ttl or invalidated_ttl(3600, 300)
+    cache.set(f"user:{user_id}", data, ttl, tags=[user_tag(user_id)])
 
 def get_cached_user_data(user_id: int) -> Optional[Any]:
     """Get cached user data"""
@@ -118,36 +476,47 @@ def get_cached_user_data(user_id: int) -> Optional[Any]:
 
 def invalidate_user_cache(user_id: int):
     """Invalidate all cache entries for a user"""
-    # This is a simple implementation - in production, you'd want more sophisticated invalidation
-    cache.delete(f"user:{user_id}")
+    cache.invalidate_tag(user_tag(user_id))
+
+def invalidate_automation_cache(automation_id: int):
+    """Invalidate an automation and every listing that embeds it"""
+    cache.invalidate_tags(automation_tag(automation_id), MARKETPLACE_TAG, ADMIN_STATS_TAG)
 
-def cache_automation_data(automation_id: int, data: Any, ttl: int = 600):
+def invalidate_notifications(user_id: Optional[int] = None):
+    """Invalidate one user's notifications, or everyone's after a broadcast"""
+    cache.invalidate_tag(notifications_tag(user_id) if user_id is not None else NOTIFICATIONS_TAG)
+
+def invalidate_admin_stats():
+    """Invalidate admin dashboard statistics"""
+    cache.invalidate_tag(ADMIN_STATS_TAG)
+
+def invalidate_admin_user_list():
+    """Invalidate cached admin user listings"""
+    cache.invalidate_tags(ADMIN_USERS_TAG, ADMIN_STATS_TAG)
+
+def cache_automation_data(automation_id: int, data: Any, ttl: Optional[int] = None):
     """Cache automation data"""
-    cache.set(f"automation:{automation_id}", data, ttl)
+    ttl = ttl or invalidated_ttl(3600, 600)
+    cache.set(f"automation:{automation_id}", data, ttl, tags=[automation_tag(automation_id)])
 
 def get_cached_automation_data(automation_id: int) -> Optional[Any]:
     """Get cached automation data"""
     return cache.get(f"automation:{automation_id}")
 
-def cache_dashboard_data(user_id: int, data: Any, ttl: int = 120):
+def cache_dashboard_data(user_id: int, data: Any, ttl: Optional[int] = None, automation_ids: Iterable[int] = ()):
     """Cache dashboard data"""
-    cache.set(f"dashboard:{user_id}", data, ttl)
+    ttl = ttl or invalidated_ttl(3600, 120)
+    tags = [user_tag(user_id)] + [automation_tag(a) for a in automation_ids]
+    cache.set(f"dashboard:{user_id}", data, ttl, tags=tags)
 
 def get_cached_dashboard_data(user_id: int) -> Optional[Any]:
     """Get cached dashboard data"""
     return cache.get(f"dashboard:{user_id}")
 
-def cache_marketplace_data(data: Any, ttl: int = 600):
-    """Cache marketplace data"""
-    cache.set("marketplace:automations", data, ttl)
-
-def get_cached_marketplace_data() -> Optional[Any]:
-    """Get cached marketplace data"""
-    return cache.get("marketplace:automations")
-
-def cache_admin_stats(data: Any, ttl: int = 120):
+def cache_admin_stats(data: Any, ttl: Optional[int] = None):
     """Cache admin dashboard statistics"""
-    cache.set("admin:stats", data, ttl)
+    ttl = ttl or invalidated_ttl(600, 120)
+    cache.set("admin:stats", data, ttl, tags=[ADMIN_STATS_TAG])
 
 def get_cached_admin_stats() -> Optional[Any]:
     """Get cached admin dashboard statistics"""
@@ -164,7 +533,11 @@ def cleanup_cache():
 # Cache statistics endpoint
 def get_cache_stats() -> Dict[str, Any]:
     """Get cache statistics for monitoring"""
-    return cache.get_stats()
+    stats = cache.get_stats()
+    stats['refresh'] = swr.get_stats()
+    stats['negative'] = negative_cache.get_stats()
+    stats['prefixes'] = cache_metrics.snapshot()
+    return stats
 
-# Create global cache manager instance
-cache_manager = CacheManager()
+# Older name of the global cache manager instance
+cache_manager = cache
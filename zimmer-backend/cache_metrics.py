@@ -0,0 +1,258 @@
+"""
+Cache Metrics for Zimmer AI Platform
+Hit ratio, latency, churn and memory of the cache broken down by key
+prefix, exposed as JSON for the stats endpoint and in the Prometheus
+text format
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+# Histogram bounds in seconds
+LOOKUP_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+COMPUTE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Keeps label cardinality bounded if keys are built carelessly
+MAX_PREFIXES = 200
+OTHER_PREFIX = "other"
+
+# Key namespaces reported as labels. Keys are built from emails, tokens
+# and ids, so anything not listed here is reported as ``other`` rather than
+# guessing which part of the key is safe to publish.
+KNOWN_PREFIXES = {
+    "2fa_status", "admin", "admin_users", "admin_users_legacy", "automation",
+    "challenge", "csrf_token", "dashboard", "discount_codes", "email_verify",
+    "email_verify_code", "health_check", "jwt_claims", "marketplace",
+    "negative_bot_token", "negative_discount_code", "negative_user",
+    "openai_pool", "password_reset", "password_reset_code", "principal",
+    "service_token", "token", "user", "user_automations", "user_dashboard",
+    "user_data", "user_info", "user_usage", "user_usage_dist", "version",
+}
+
+_SEPARATOR = re.compile(r"[:_]")
+
+
+def register_prefix(prefix: str) -> None:
+    """Report keys starting with ``prefix`` under their own label"""
+    KNOWN_PREFIXES.add(prefix)
+    key_prefix.cache_clear()
+
+
+@lru_cache(maxsize=8192)
+def key_prefix(key: str) -> str:
+    """Longest known namespace the key starts with, else ``other``.
+
+    ``dashboard:42`` -> ``dashboard``, ``user_data_42`` -> ``user_data``,
+    ``email_verify_code_a@b.c`` -> ``email_verify_code``.
+    """
+    if key in KNOWN_PREFIXES:
+        return key
+    prefix = OTHER_PREFIX
+    for separator in _SEPARATOR.finditer(key):
+        candidate = key[:separator.start()]
+        if candidate in KNOWN_PREFIXES:
+            prefix = candidate
+    return prefix
+
+
+def _label(value: str) -> str:
+    """Label value escaped for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    __slots__ = ("bounds", "counts", "total", "count", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds, self.counts):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class _PrefixStats:
+    __slots__ = ("hits", "misses", "sets", "evictions", "expirations", "bytes", "entries", "lookup", "compute")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
+        self.entries = 0
+        self.lookup = Histogram(LOOKUP_BUCKETS)
+        self.compute = Histogram(COMPUTE_BUCKETS)
+
+
+class CacheMetrics:
+    """Per-prefix counters fed by CacheManager and the in-process backend.
+
+    ``bytes`` and ``entries`` only cover in-process storage; Redis memory
+    is reported by the server itself.
+    """
+
+    def __init__(self, max_prefixes: int = MAX_PREFIXES):
+        self.max_prefixes = max_prefixes
+        self._prefixes: Dict[str, _PrefixStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, key: str) -> _PrefixStats:
+        """Stats slot for ``key`` (caller holds the lock)"""
+        prefix = key_prefix(key)
+        stats = self._prefixes.get(prefix)
+        if stats is None:
+            if len(self._prefixes) >= self.max_prefixes:
+                prefix = OTHER_PREFIX
+                stats = self._prefixes.get(prefix)
+            if stats is None:
+                stats = self._prefixes[prefix] = _PrefixStats()
+        return stats
+
+    def record_lookup(self, key: str, hit: bool, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats(key)
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+            stats.lookup.observe(seconds)
+
+    def record_set(self, key: str) -> None:
+        with self._lock:
+            self._stats(key).sets += 1
+
+    def record_compute(self, key: str, seconds: float) -> None:
+        """Time spent producing a value after a miss"""
+        with self._lock:
+            self._stats(key).compute.observe(seconds)
+
+    # Storage observer hooks, called by InMemoryBackend under its own lock
+
+    def stored(self, key: str, size: int) -> None:
+        with self._lock:
+            stats = self._stats(key)
+            stats.bytes += size
+            stats.entries += 1
+
+    def removed(self, key: str, size: int, reason: str) -> None:
+        with self._lock:
+            stats = self._stats(key)
+            stats.bytes -= size
+            stats.entries -= 1
+            if reason == "evicted":
+                stats.evictions += 1
+            elif reason == "expired":
+                stats.expirations += 1
+
+    def cleared(self) -> None:
+        with self._lock:
+            for stats in self._prefixes.values():
+                stats.bytes = 0
+                stats.entries = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._prefixes.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-prefix figures for the JSON stats endpoint"""
+        with self._lock:
+            result = {}
+            for prefix, stats in sorted(self._prefixes.items()):
+                lookups = stats.hits + stats.misses
+                result[prefix] = {
+                    'hits': stats.hits,
+                    'misses': stats.misses,
+                    'hit_ratio': round(stats.hits / lookups, 4) if lookups else None,
+                    'sets': stats.sets,
+                    'evictions': stats.evictions,
+                    'expirations': stats.expirations,
+                    'entries': stats.entries,
+                    'bytes': stats.bytes,
+                    'lookup': stats.lookup.snapshot(),
+                    'compute_on_miss': stats.compute.snapshot()
+                }
+            return result
+
+    def render_prometheus(self, name: str = "zimmer_cache") -> str:
+        """Metrics in the Prometheus text exposition format"""
+        counters = (
+            ("hits", "Cache lookups answered from the cache"),
+            ("misses", "Cache lookups that found nothing"),
+            ("sets", "Cache writes"),
+            ("evictions", "Entries evicted to stay within limits"),
+            ("expirations", "Entries removed after their TTL"),
+        )
+        gauges = (
+            ("bytes", "Approximate in-process bytes held"),
+            ("entries", "In-process entries held"),
+        )
+        histograms = (
+            ("lookup", "Cache lookup latency"),
+            ("compute", "Time to compute a value after a miss"),
+        )
+        lines: List[str] = []
+        with self._lock:
+            items = [(_label(prefix), stats) for prefix, stats in sorted(self._prefixes.items())]
+            for field, help_text in counters:
+                lines.append(f"# HELP {name}_{field}_total {help_text}")
+                lines.append(f"# TYPE {name}_{field}_total counter")
+                for prefix, stats in items:
+                    lines.append(f'{name}_{field}_total{{prefix="{prefix}"}} {getattr(stats, field)}')
+            for field, help_text in gauges:
+                lines.append(f"# HELP {name}_{field} {help_text}")
+                lines.append(f"# TYPE {name}_{field} gauge")
+                for prefix, stats in items:
+                    lines.append(f'{name}_{field}{{prefix="{prefix}"}} {getattr(stats, field)}')
+            for field, help_text in histograms:
+                metric = f"{name}_{field}_seconds"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for prefix, stats in items:
+                    histogram = getattr(stats, field)
+                    cumulative = 0
+                    for bound, bucket in zip(histogram.bounds, histogram.counts):
+                        cumulative += bucket
+                        lines.append(f'{metric}_bucket{{prefix="{prefix}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{prefix="{prefix}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{prefix="{prefix}"}} {histogram.total}')
+                    lines.append(f'{metric}_count{{prefix="{prefix}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every CacheManager so all namespaces show up in one place
+cache_metrics = CacheMetrics()
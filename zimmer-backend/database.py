@@ -1,8 +1,16 @@
 import os
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool
+import time
+import asyncio
+import threading
+from sqlalchemy import create_engine, event, text, MetaData
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql.expression import Select, TextClause
+from typing import Optional
 from dotenv import load_dotenv
+from starlette.exceptions import HTTPException
+from db_pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_metrics
+from write_behind import write_behind
 
 load_dotenv()
 
@@ -24,44 +32,161 @@ if DATABASE_URL is None or DATABASE_URL.strip() == "":
     DATABASE_URL = "sqlite:///./dev.db"
     print("⚠️  No DATABASE_URL found in .env, using SQLite for development")
 
-# Configure engine with highly optimized connection pooling
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite configuration - highly optimized for performance
-    engine = create_engine(
-        DATABASE_URL,
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Pool sizing. Every worker process opens one pool per engine (sync and
+# async, plus the same pair against a replica), so the defaults split a
+# deployment-wide budget of DB_MAX_CONNECTIONS (keep it below the server's
+# max_connections, 100 by default on Postgres) between DB_WORKERS x 2
+# engines. Within that share the pool grows with the core count (two
+# connections per core, at least 3). DB_POOL_SIZE / DB_MAX_OVERFLOW
+# override the result; see /api/monitoring/database/pool for the checkout
+# waits to size against.
+CPU_COUNT = os.cpu_count() or 1
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "80"))
+DB_WORKERS = int(os.getenv("DB_WORKERS") or os.getenv("WEB_CONCURRENCY") or os.getenv("UVICORN_WORKERS") or "1")
+DB_ENGINES_PER_WORKER = 2
+_ENGINE_SHARE = max(2, DB_MAX_CONNECTIONS // (max(1, DB_WORKERS) * DB_ENGINES_PER_WORKER))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(max(1, min(5, _ENGINE_SHARE // 4)))))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(max(1, min(max(3, CPU_COUNT * 2), _ENGINE_SHARE - DB_MAX_OVERFLOW)))))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "900"))  # seconds
+
+# SQLite PRAGMAs applied to every new DBAPI connection. Most of them are
+# per-connection settings, so running them once on a single session (as
+# performance_optimization used to) only tuned whichever connection that was.
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),  # readers no longer block the writer
+    ("synchronous", "NORMAL"),  # durable with WAL, far fewer fsyncs
+    ("busy_timeout", os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000")),
+    ("cache_size", os.getenv("SQLITE_CACHE_SIZE", "-64000")),  # 64MB page cache
+    ("mmap_size", os.getenv("SQLITE_MMAP_SIZE", "268435456")),  # 256MB memory mapping
+    ("temp_store", "MEMORY"),
+)
+
+# "shared": one pool for everything. "split": a read-only pool sized to the
+# CPU count plus a single writer connection, so concurrent writes queue in
+# the pool instead of failing with "database is locked".
+SQLITE_POOL_MODE = os.getenv("SQLITE_POOL_MODE", "shared").lower()
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", str(os.cpu_count() or 4)))
+SQLITE_WRITE_TIMEOUT = int(os.getenv("SQLITE_WRITE_TIMEOUT", "30"))
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """Apply the PRAGMA profile to a raw sqlite3/aiosqlite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            if read_only and name == "journal_mode":
+                continue  # changing the journal mode needs a write lock
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+def _sqlite_engine(
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: int,
+    read_only: bool = False,
+    url: str = DATABASE_URL
+):
+    sqlite_engine = create_engine(
+        url,
         connect_args={
             "check_same_thread": False,
             "timeout": 10,  # Reduced timeout for faster failure detection
             "isolation_level": None  # Autocommit mode for better performance
         },
-        poolclass=QueuePool,
-        pool_size=3,  # Further reduced pool size for SQLite
-        max_overflow=5,  # Further reduced overflow
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
         pool_pre_ping=True,
-        pool_recycle=900,  # 15 minutes recycle (faster)
+        pool_recycle=DB_POOL_RECYCLE,
         future=True,
         echo=False,
-        # SQLite-specific optimizations
-        pool_timeout=10,  # Faster timeout
+        pool_timeout=pool_timeout,
         pool_reset_on_return='commit'
     )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return sqlite_engine
+
+# Configure engine with highly optimized connection pooling
+if IS_SQLITE and SQLITE_POOL_MODE == "split":
+    # Single serialized writer; callers wait for it up to SQLITE_WRITE_TIMEOUT
+    engine = _sqlite_engine(pool_size=1, max_overflow=0, pool_timeout=SQLITE_WRITE_TIMEOUT)
+    read_engine = _sqlite_engine(
+        pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT, read_only=True
+    )
+elif IS_SQLITE:
+    # SQLite configuration - highly optimized for performance
+    engine = _sqlite_engine(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    read_engine = engine
 else:
     # PostgreSQL configuration - highly optimized for performance
     engine = create_engine(
         DATABASE_URL,
-        poolclass=QueuePool,
-        pool_size=3,  # Further reduced pool size
-        max_overflow=5,  # Further reduced overflow
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
         pool_pre_ping=True,
-        pool_recycle=900,  # 15 minutes recycle (faster)
+        pool_recycle=DB_POOL_RECYCLE,
         future=True,
         echo=False,
-        pool_timeout=10,  # Faster timeout
+        pool_timeout=DB_POOL_TIMEOUT,
         pool_reset_on_return='commit'
     )
+    read_engine = engine
+
+pool_metrics.instrument("primary", engine)
+if read_engine is not engine:
+    pool_metrics.instrument("reader", read_engine)
+
+_READ_STATEMENTS = ("SELECT", "WITH", "EXPLAIN")
+
+class RoutingSession(Session):
+    """Session sending SELECTs to ``read_engine`` and everything else to ``engine``.
+
+    Once a transaction has written it stays on the writer until it commits
+    or rolls back, so it always reads its own uncommitted writes. After
+    that the session goes back to the reader: committed rows are visible
+    there, and the single writer connection is free for other sessions
+    instead of being held until the request ends. With a single shared
+    pool both engines are the same and this behaves like a plain Session.
+    """
+
+    _on_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is engine:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        if self._on_writer or self._flushing or not self._is_read(clause):
+            self._on_writer = True
+            return engine
+        return read_engine
+
+    @staticmethod
+    def _is_read(clause) -> bool:
+        if isinstance(clause, Select):
+            return True
+        if isinstance(clause, TextClause):
+            words = clause.text.split(None, 1)
+            return bool(words) and words[0].upper() in _READ_STATEMENTS
+        return False
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction) -> None:
+    # Savepoints end inside the outer transaction, which still holds the writer
+    if transaction.parent is None:
+        session._on_writer = False
 
 SessionLocal = sessionmaker(
-    bind=engine, 
+    bind=engine,
+    class_=RoutingSession,
     autoflush=False, 
     autocommit=False, 
     future=True,
@@ -69,17 +194,291 @@ SessionLocal = sessionmaker(
 )
 
 def get_db():
-    """Optimized database session with timeout handling"""
+    """Request-scoped database session.
+
+    This is the only session provider for routes and dependencies: FastAPI
+    caches a dependency per request, so ``get_current_user`` and the route
+    it guards share one session (and one pooled connection).
+    """
     db = SessionLocal()
     try:
-        # Set session timeout (only for SQLite)
-        if DATABASE_URL.startswith("sqlite"):
-            from sqlalchemy import text
-            db.execute(text("PRAGMA busy_timeout = 10000"))  # 10 second timeout
         yield db
     except Exception as e:
         db.rollback()
-        print(f"Database session error: {e}")
+        if not isinstance(e, HTTPException):
+            print(f"Database session error: {e}")
         raise e
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Async engine for async route handlers. It shares the database with the
+# sync engine above; both stay available while handlers are migrated.
+def _async_database_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart"""
+    scheme, _, rest = url.partition("://")
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+try:
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            connect_args={"timeout": 10},
+            pool_pre_ping=True,
+            echo=False
+        )
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _set_async_sqlite_pragmas(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+            echo=False
+        )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    pool_metrics.instrument("async", async_engine)
+    # Rows queued from async sessions are flushed by a thread, over the sync engine
+    write_behind.use_sync_engine(async_engine, engine)
+except ImportError as e:  # async driver (aiosqlite/asyncpg) not installed
+    print(f"⚠️  Async database driver unavailable ({e}), async sessions disabled")
+    async_engine = None
+    AsyncSessionLocal = None
+
+async def get_async_db():
+    """Async database session for ``async def`` handlers"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database driver is not installed")
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            if not isinstance(e, HTTPException):
+                print(f"Database session error: {e}")
+            raise
+
+# Read replica for read-only, staleness-tolerant routes (admin listings,
+# analytics, usage charts). Routes opt in with ``get_replica_db`` /
+# ``get_async_replica_db``; while the replica is unreachable or lagging
+# they transparently get a primary session instead.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "").strip() or None
+REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", "30"))  # seconds
+REPLICA_CHECK_INTERVAL = float(os.getenv("DATABASE_REPLICA_CHECK_INTERVAL", "10"))  # seconds
+
+# Zero on a primary, and on an idle replica that has replayed everything it received
+_PG_REPLICA_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaHealth:
+    """Periodically probed reachability and lag of the replica"""
+
+    def __init__(self, engine, max_lag: float = REPLICA_MAX_LAG, interval: float = REPLICA_CHECK_INTERVAL):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.available = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _due(self) -> bool:
+        return time.monotonic() - self.checked_at >= self.interval
+
+    def check(self) -> bool:
+        """Whether reads may go to the replica, probing at most once per interval"""
+        # Concurrent callers keep the last verdict while one thread probes
+        if self._due() and self._lock.acquire(blocking=False):
+            try:
+                self._probe()
+            finally:
+                self._lock.release()
+        return self.available
+
+    async def check_async(self) -> bool:
+        if not self._due():
+            return self.available
+        return await asyncio.to_thread(self.check)
+
+    def _probe(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = float(conn.execute(_PG_REPLICA_LAG).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag = 0.0
+            if self.lag > self.max_lag:
+                self.available = False
+                self.error = f"replica lag {self.lag:.1f}s exceeds {self.max_lag:.0f}s"
+            else:
+                self.available = True
+                self.error = None
+        except Exception as e:
+            self.available = False
+            self.lag = None
+            self.error = str(e)
+        finally:
+            self.checked_at = time.monotonic()
+        if not self.available:
+            print(f"⚠️  Read replica unavailable, using primary: {self.error}")
+
+    def mark_down(self, reason: str) -> None:
+        """Stop routing to the replica until the next probe"""
+        self.available = False
+        self.error = reason
+        self.checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {
+            "configured": True,
+            "available": self.available,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "error": self.error
+        }
+
+if DATABASE_REPLICA_URL is None:
+    replica_engine = None
+elif DATABASE_REPLICA_URL.startswith("sqlite"):
+    # A second local database file stands in for the replica in tests
+    replica_engine = _sqlite_engine(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        read_only=True,
+        url=DATABASE_REPLICA_URL
+    )
+else:
+    replica_engine = create_engine(
+        DATABASE_REPLICA_URL,
+        connect_args={"connect_timeout": 3},
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+        future=True,
+        echo=False,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_reset_on_return='rollback'
+    )
+
+if replica_engine is not None:
+    replica_health = ReplicaHealth(replica_engine)
+    pool_metrics.instrument("replica", replica_engine)
+    ReplicaSessionLocal = sessionmaker(
+        bind=replica_engine,
+        autoflush=False,
+        autocommit=False,
+        future=True,
+        expire_on_commit=False
+    )
+
+    @event.listens_for(replica_engine, "handle_error")
+    def _replica_disconnected(context):
+        if context.is_disconnect:
+            replica_health.mark_down(str(context.original_exception))
+
+    try:
+        if DATABASE_REPLICA_URL.startswith("sqlite"):
+            # aiosqlite keeps its default NullPool, like the primary async engine
+            async_replica_engine = create_async_engine(
+                _async_database_url(DATABASE_REPLICA_URL), pool_pre_ping=True, echo=False
+            )
+
+            @event.listens_for(async_replica_engine.sync_engine, "connect")
+            def _set_async_replica_pragmas(dbapi_connection, connection_record):
+                apply_sqlite_pragmas(dbapi_connection, read_only=True)
+        else:
+            async_replica_engine = create_async_engine(
+                _async_database_url(DATABASE_REPLICA_URL),
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_timeout=DB_POOL_TIMEOUT,
+                echo=False
+            )
+        AsyncReplicaSessionLocal = async_sessionmaker(
+            bind=async_replica_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        pool_metrics.instrument("async_replica", async_replica_engine)
+    except ImportError:
+        async_replica_engine = None
+        AsyncReplicaSessionLocal = None
+else:
+    replica_health = None
+    ReplicaSessionLocal = None
+    async_replica_engine = None
+    AsyncReplicaSessionLocal = None
+
+def replica_status() -> dict:
+    if replica_health is None:
+        return {"configured": False}
+    return replica_health.status()
+
+def open_replica_session():
+    """Session on the read replica when it is healthy, on the primary otherwise"""
+    if ReplicaSessionLocal is not None and replica_health.check():
+        return ReplicaSessionLocal()
+    return SessionLocal()
+
+def get_replica_db():
+    """Request-scoped ``open_replica_session``.
+
+    Only for routes that never write and tolerate data a few seconds old.
+    """
+    db = open_replica_session()
+    try:
+        yield db
+    except Exception as e:
+        db.rollback()
+        if not isinstance(e, HTTPException):
+            print(f"Database session error: {e}")
+        raise e
+    finally:
+        db.close()
+
+async def get_async_replica_db():
+    """Async counterpart of ``get_replica_db``"""
+    if AsyncReplicaSessionLocal is not None and await replica_health.check_async():
+        session_factory = AsyncReplicaSessionLocal
+    elif AsyncSessionLocal is not None:
+        session_factory = AsyncSessionLocal
+    else:
+        raise RuntimeError("Async database driver is not installed")
+    async with session_factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            if not isinstance(e, HTTPException):
+                print(f"Database session error: {e}")
+            raise
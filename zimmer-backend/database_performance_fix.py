@@ -8,80 +8,19 @@ import sqlite3
 from sqlalchemy import create_engine, text
 from database import engine, get_db
 from sqlalchemy.orm import Session
+from index_advisor import create_model_indexes
 
 def add_performance_indexes():
-    """Add additional performance indexes for slow queries"""
+    """Add the model-declared indexes missing from the database"""
     print("🔧 Adding performance indexes for timeout fixes...")
     
-    # Additional indexes for authentication and user queries
-    indexes_to_create = [
-        # User table indexes
-        ("users", "is_active", "idx_users_is_active"),
-        ("users", "email_verified", "idx_users_email_verified"),
-        ("users", "role", "idx_users_role"),
-        
-        # UserAutomation table indexes
-        ("user_automations", "user_id", "idx_user_automations_user_id"),
-        ("user_automations", "automation_id", "idx_user_automations_automation_id"),
-        ("user_automations", "status", "idx_user_automations_status"),
-        ("user_automations", "tokens_remaining", "idx_user_automations_tokens"),
-        
-        # TokenUsage table indexes
-        ("token_usage", "user_id", "idx_token_usage_user_id"),
-        ("token_usage", "user_automation_id", "idx_token_usage_user_automation_id"),
-        ("token_usage", "created_at", "idx_token_usage_created_at"),
-        ("token_usage", "tokens_used", "idx_token_usage_tokens_used"),
-        
-        # TwoFA table indexes
-        ("twofa", "user_id", "idx_twofa_user_id"),
-        ("twofa", "is_enabled", "idx_twofa_is_enabled"),
-        
-        # EmailVerification table indexes
-        ("email_verifications", "user_id", "idx_email_verifications_user_id"),
-        ("email_verifications", "token", "idx_email_verifications_token"),
-        ("email_verifications", "expires_at", "idx_email_verifications_expires_at"),
-        
-        # Session table indexes
-        ("sessions", "user_id", "idx_sessions_user_id"),
-        ("sessions", "expires_at", "idx_sessions_expires_at"),
-        ("sessions", "revoked_at", "idx_sessions_revoked_at"),
-        
-        # Composite indexes for common query patterns
-        ("user_automations", ["user_id", "status"], "idx_user_automations_user_status"),
-        ("token_usage", ["user_id", "created_at"], "idx_token_usage_user_date"),
-        ("users", ["is_active", "email_verified"], "idx_users_active_verified"),
-        ("sessions", ["user_id", "expires_at"], "idx_sessions_user_expires"),
-    ]
-    
-    with engine.connect() as conn:
-        for table, columns, index_name in indexes_to_create:
-            try:
-                if isinstance(columns, list):
-                    # Composite index
-                    columns_str = ", ".join(columns)
-                else:
-                    # Single column index
-                    columns_str = columns
-                
-                # Check if index already exists
-                check_sql = f"""
-                SELECT name FROM sqlite_master 
-                WHERE type='index' AND name='{index_name}'
-                """
-                result = conn.execute(text(check_sql)).fetchone()
-                
-                if not result:
-                    create_sql = f"CREATE INDEX {index_name} ON {table} ({columns_str})"
-                    conn.execute(text(create_sql))
-                    print(f"  ✅ Created index: {index_name}")
-                else:
-                    print(f"  ⚠️  Index already exists: {index_name}")
-                    
-            except Exception as e:
-                print(f"  ❌ Failed to create index {index_name}: {e}")
-        
-        conn.commit()
-        print("✅ Performance indexes added successfully!")
+    try:
+        created = create_model_indexes(engine)
+        for name in created:
+            print(f"  ✅ Created index: {name}")
+        print(f"✅ Performance indexes added successfully! ({len(created)} created)")
+    except Exception as e:
+        print(f"  ❌ Failed to create indexes: {e}")
 
 def optimize_sqlite_settings():
     """Optimize SQLite settings for better performance"""
@@ -140,12 +79,12 @@ def analyze_slow_queries():
             "name": "Recent token usage",
             "query": """
             SELECT tu.*, ua.automation_id
-            FROM token_usage tu
+            FROM token_usages tu
             JOIN user_automations ua ON tu.user_automation_id = ua.id
-            WHERE tu.user_id = ? AND tu.created_at >= ?
+            WHERE ua.user_id = ? AND tu.created_at >= ?
             ORDER BY tu.created_at DESC
             """,
-            "optimization": "Index on token_usage(user_id, created_at)"
+            "optimization": "Index on token_usages(user_automation_id, created_at)"
         }
     ]
     
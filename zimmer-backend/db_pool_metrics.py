@@ -0,0 +1,211 @@
+"""
+Connection Pool Metrics for Zimmer AI Platform
+Checkout wait, in-use and overflow connections, timeouts and connection
+churn of every SQLAlchemy pool, exposed as JSON and in the Prometheus
+text format for the monitoring router
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from cache_metrics import Histogram
+
+# Checkout wait bounds in seconds; the top ones only fill up under starvation
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Counters of one engine's pool, fed by pool events and checkout timing"""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.recycles = 0
+        self.invalidations = 0
+        self.overflow_opened = 0
+        self.peak_in_use = 0
+        self.wait = Histogram(CHECKOUT_BUCKETS)
+        self._records = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    # Called by the instrumented pool classes below
+
+    def waited(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait.observe(seconds)
+
+    def timed_out(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait.observe(seconds)
+
+    # Pool event listeners
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+            # A slot that already had a connection is reconnecting after
+            # pool_recycle or an invalidation
+            if connection_record in self._records:
+                self.recycles += 1
+            else:
+                self._records.add(connection_record)
+            pool = self.engine.pool
+            if hasattr(pool, "overflow") and pool.overflow() > 0:
+                self.overflow_opened += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        pool = self.engine.pool
+        in_use = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        with self._lock:
+            if in_use > self.peak_in_use:
+                self.peak_in_use = in_use
+
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.closes += 1
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        in_use = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        with self._lock:
+            return {
+                'pool_class': type(pool).__name__,
+                'size': pool.size() if hasattr(pool, "size") else None,
+                'max_overflow': getattr(pool, "_max_overflow", None),
+                'timeout_seconds': pool.timeout() if hasattr(pool, "timeout") else None,
+                'in_use': in_use,
+                'idle': pool.checkedin() if hasattr(pool, "checkedin") else 0,
+                'overflow': max(0, pool.overflow()) if hasattr(pool, "overflow") else 0,
+                'peak_in_use': self.peak_in_use,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'closes': self.closes,
+                'recycles': self.recycles,
+                'invalidations': self.invalidations,
+                'overflow_opened': self.overflow_opened,
+                'checkout_wait': self.wait.snapshot()
+            }
+
+
+class _TimedCheckout:
+    """Times every checkout, including the wait for a free connection"""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.timed_out(time.perf_counter() - started)
+            raise
+        if self.stats is not None:
+            self.stats.waited(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolMetrics:
+    """Registry of instrumented engines"""
+
+    def __init__(self):
+        self._pools: Dict[str, PoolStats] = {}
+
+    def instrument(self, name: str, engine) -> PoolStats:
+        """Start collecting metrics for ``engine`` (sync or async) under ``name``"""
+        engine = getattr(engine, "sync_engine", engine)
+        stats = PoolStats(name, engine)
+        if isinstance(engine.pool, _TimedCheckout):
+            engine.pool.stats = stats
+        event.listen(engine, "connect", stats.on_connect)
+        event.listen(engine, "checkout", stats.on_checkout)
+        event.listen(engine, "close", stats.on_close)
+        event.listen(engine, "invalidate", stats.on_invalidate)
+        self._pools[name] = stats
+        return stats
+
+    def total_in_use(self) -> int:
+        return sum(stats.engine.pool.checkedout() for stats in self._pools.values()
+                   if hasattr(stats.engine.pool, "checkedout"))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.snapshot() for name, stats in sorted(self._pools.items())}
+
+    def render_prometheus(self, name: str = "zimmer_db_pool") -> str:
+        """Metrics in the Prometheus text exposition format"""
+        counters = (
+            ("checkouts", "Connections handed out by the pool"),
+            ("timeouts", "Checkouts that gave up waiting for a connection"),
+            ("connects", "New DBAPI connections opened"),
+            ("closes", "DBAPI connections closed"),
+            ("recycles", "Pool slots reconnected after pool_recycle or invalidation"),
+            ("invalidations", "Connections invalidated after errors"),
+            ("overflow_opened", "Connections opened beyond pool_size"),
+        )
+        gauges = (
+            ("size", "Configured pool size"),
+            ("in_use", "Connections currently checked out"),
+            ("idle", "Connections idle in the pool"),
+            ("overflow", "Overflow connections currently open"),
+            ("peak_in_use", "Most connections checked out at once"),
+        )
+        snapshots = self.snapshot()
+        lines: List[str] = []
+        for field, help_text in counters:
+            lines.append(f"# HELP {name}_{field}_total {help_text}")
+            lines.append(f"# TYPE {name}_{field}_total counter")
+            for pool, values in snapshots.items():
+                lines.append(f'{name}_{field}_total{{pool="{pool}"}} {values[field]}')
+        for field, help_text in gauges:
+            lines.append(f"# HELP {name}_{field} {help_text}")
+            lines.append(f"# TYPE {name}_{field} gauge")
+            for pool, values in snapshots.items():
+                lines.append(f'{name}_{field}{{pool="{pool}"}} {values[field] or 0}')
+        metric = f"{name}_checkout_wait_seconds"
+        lines.append(f"# HELP {metric} Time to obtain a connection from the pool")
+        lines.append(f"# TYPE {metric} histogram")
+        for pool, stats in sorted(self._pools.items()):
+            histogram = stats.wait
+            with stats._lock:
+                cumulative = 0
+                for bound, bucket in zip(histogram.bounds, histogram.counts):
+                    cumulative += bucket
+                    lines.append(f'{metric}_bucket{{pool="{pool}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{pool="{pool}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{pool="{pool}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{pool="{pool}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Every engine in database.py registers here
+pool_metrics = PoolMetrics()
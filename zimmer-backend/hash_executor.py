@@ -0,0 +1,167 @@
+"""
+Password Hashing Executor for Zimmer AI Platform
+bcrypt hashes and checks (100-300ms of CPU each) run in a process pool sized
+to the machine instead of on the event loop, so a login burst uses every
+core without freezing unrelated requests. Jobs in flight are capped; past
+the cap callers get a 429 instead of queueing without bound.
+"""
+
+import os
+import time
+import atexit
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from cache_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+HASH_POOL_ENABLED = os.getenv("HASH_POOL_ENABLED", "true").lower() == "true"
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+# Jobs queued or running before new ones are refused with 429
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(HASH_POOL_WORKERS * 8)))
+# Seconds suggested to refused clients
+HASH_POOL_RETRY_AFTER = int(os.getenv("HASH_POOL_RETRY_AFTER", "1"))
+
+# Submit-to-result latency bounds in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HashPoolSaturated(HTTPException):
+    """Raised when the hash job cap is reached; an HTTPException so handlers
+    that re-raise those pass it through as 429"""
+
+    def __init__(self, retry_after: int = HASH_POOL_RETRY_AFTER):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests in progress, retry shortly",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class HashExecutor:
+    """Process pool for CPU-bound hashing with an async API and a job cap"""
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING,
+                 enabled: bool = HASH_POOL_ENABLED):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.enabled = enabled
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self.peak_pending = 0
+        self.last_rejected_at: Optional[float] = None
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Fresh interpreters rather than fork(): the server process
+                # runs threads (write-behind, cache pub/sub) that fork would copy mid-lock
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                )
+            return self._pool
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+                self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` off the event loop; raises HashPoolSaturated at the cap.
+
+        ``fn`` must be a module-level function so it can be sent to a worker,
+        from a module without application imports (see utils.hashing): the
+        worker imports that module.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                self.last_rejected_at = time.time()
+                raise HashPoolSaturated()
+            self._pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if not self.enabled:
+                # bcrypt releases the GIL, so the default thread pool still
+                # keeps the loop free, just without process isolation
+                result = await loop.run_in_executor(None, fn, *args)
+            else:
+                pool = self._get_pool()
+                try:
+                    result = await loop.run_in_executor(pool, fn, *args)
+                except BrokenProcessPool:
+                    # A worker died (OOM kill, segfault): start a new pool once
+                    logger.error("Hash worker pool broke; restarting it")
+                    self._reset_pool(pool)
+                    result = await loop.run_in_executor(self._get_pool(), fn, *args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self.completed += 1
+            self.latency.observe(time.perf_counter() - started)
+        return result
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'started': self._pool is not None,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'queued': max(0, self._pending - self.workers),
+                'peak_pending': self.peak_pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'pool_restarts': self.pool_restarts,
+                'last_rejected_at': datetime.utcfromtimestamp(self.last_rejected_at).isoformat() if self.last_rejected_at else None,
+                'latency': self.latency.snapshot()
+            }
+
+
+# Workers start with the first job; main.py shuts the pool down on shutdown
+# and the atexit hook covers scripts that never reach one
+hash_executor = HashExecutor()
+atexit.register(hash_executor.shutdown)
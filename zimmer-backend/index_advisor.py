@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Index Advisor for Zimmer AI Platform
+Compares the filter and order columns of recorded query fingerprints (see
+utils/query_profiler.py) with the indexes that exist in the database and
+reports missing, partially covering and unused indexes.
+
+Usage:
+    python index_advisor.py report.json    # saved GET /api/admin/system/queries?limit=200
+    python index_advisor.py --create        # create model-declared indexes missing from the database
+"""
+
+import re
+import sys
+import json
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, text
+
+_KEYWORDS = {
+    "ON", "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "FULL", "ORDER",
+    "GROUP", "LIMIT", "OFFSET", "SET", "VALUES", "USING", "HAVING", "UNION", "RETURNING"
+}
+_TABLE_REF = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?'
+    r'(?:\s+(?:AS\s+)?(?!(?:' + "|".join(_KEYWORDS) + r')\b)"?(\w+)"?)?',
+    re.IGNORECASE
+)
+_PREDICATE = re.compile(
+    r'(?:"?(\w+)"?\.)?"?(\w+)"?\s*(=|!=|<>|>=|<=|<|>|\bIN\b|\bIS\b|\bLIKE\b|\bBETWEEN\b)\s*'
+    r'(?:NOT\s+)?(?:"?(\w+)"?\."?(\w+)"?|\(\.\.\.\)|\?|NULL|\w+)',
+    re.IGNORECASE
+)
+_ORDER_BY = re.compile(r"\bORDER BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\)|$)", re.IGNORECASE)
+_ORDER_COLUMN = re.compile(r'(?:"?(\w+)"?\.)?"?(\w+)"?(?:\s+(?:ASC|DESC))?\s*(?:,|$)', re.IGNORECASE)
+_EQUALITY = {"=", "IN", "IS"}
+
+
+class AccessPattern:
+    """Columns one statement filters and orders a table by"""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.equality: List[str] = []
+        self.range: List[str] = []
+        self.order: List[str] = []
+        self.joined: List[str] = []
+
+    def used_columns(self) -> Set[str]:
+        return set(self.equality) | set(self.range) | set(self.order) | set(self.joined)
+
+    def candidate(self) -> Tuple[str, ...]:
+        """Index serving this access: equality columns, then one range or sort column"""
+        columns = list(dict.fromkeys(self.equality))
+        tail = next((c for c in self.range + self.order if c not in columns), None)
+        if tail is not None:
+            columns.append(tail)
+        return tuple(columns)
+
+
+def extract_access_patterns(fingerprint: str, known_tables: Iterable[str]) -> Dict[str, AccessPattern]:
+    """Per-table filter, join and order columns of a statement fingerprint"""
+    known = set(known_tables)
+    aliases: Dict[str, str] = {}
+    for table, alias in _TABLE_REF.findall(fingerprint):
+        if table not in known:
+            continue
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    tables = set(aliases.values())
+    patterns = {table: AccessPattern(table) for table in tables}
+    if not patterns:
+        return patterns
+
+    def resolve(qualifier: Optional[str]) -> Optional[str]:
+        if qualifier:
+            return aliases.get(qualifier)
+        return next(iter(tables)) if len(tables) == 1 else None
+
+    for left_qualifier, left_column, operator, right_qualifier, right_column in _PREDICATE.findall(fingerprint):
+        table = resolve(left_qualifier)
+        if table is None:
+            continue
+        pattern = patterns[table]
+        if right_qualifier and right_qualifier in aliases:
+            # Join condition: both sides are looked up through their column
+            pattern.joined.append(left_column)
+            patterns[aliases[right_qualifier]].joined.append(right_column)
+        elif operator.upper() in _EQUALITY:
+            pattern.equality.append(left_column)
+        else:
+            pattern.range.append(left_column)
+
+    for clause in _ORDER_BY.findall(fingerprint):
+        for qualifier, column in _ORDER_COLUMN.findall(clause.strip()):
+            table = resolve(qualifier)
+            if table is not None:
+                patterns[table].order.append(column)
+
+    return {table: p for table, p in patterns.items() if p.used_columns()}
+
+
+def existing_indexes(engine) -> Dict[str, List[Dict[str, Any]]]:
+    """Every index per table, primary keys and unique constraints included"""
+    inspector = inspect(engine)
+    indexes: Dict[str, List[Dict[str, Any]]] = {}
+    for table in inspector.get_table_names():
+        entries = []
+        primary_key = inspector.get_pk_constraint(table).get("constrained_columns") or []
+        if primary_key:
+            entries.append({"name": f"pk_{table}", "columns": primary_key, "kind": "primary"})
+        for constraint in inspector.get_unique_constraints(table):
+            entries.append({"name": constraint["name"], "columns": constraint["column_names"], "kind": "unique"})
+        for index in inspector.get_indexes(table):
+            entries.append({
+                "name": index["name"],
+                "columns": [c for c in index["column_names"] if c],
+                "kind": "unique" if index.get("unique") else "index"
+            })
+        indexes[table] = entries
+    return indexes
+
+
+def _served_columns(index_columns: List[str], candidate: Tuple[str, ...], equality: Set[str]) -> int:
+    """How many leading candidate columns an index can seek on"""
+    served = 0
+    remaining = set(equality)
+    for column in index_columns:
+        if column in remaining:
+            remaining.discard(column)
+            served += 1
+        elif served == len(equality) and served < len(candidate) and column == candidate[served]:
+            served += 1
+            break
+        else:
+            break
+    return served
+
+
+def _postgres_unscanned(engine) -> Set[str]:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT indexrelname FROM pg_stat_user_indexes WHERE idx_scan = 0"))
+        return {row[0] for row in rows}
+
+
+def advise(queries: List[Dict[str, Any]], engine) -> Dict[str, Any]:
+    """Missing, partial and unused indexes for the recorded ``queries``.
+
+    ``queries`` are rows of the profiler report: ``fingerprint``, ``count``
+    and ``total_ms``.
+    """
+    indexes = existing_indexes(engine)
+    used: Dict[str, Set[str]] = defaultdict(set)
+    findings: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+
+    for query in queries:
+        patterns = extract_access_patterns(query["fingerprint"], indexes.keys())
+        for table, pattern in patterns.items():
+            used[table] |= pattern.used_columns()
+            candidate = pattern.candidate()
+            if not candidate:
+                continue
+            equality = set(candidate[:len(set(pattern.equality))])
+            served = max(
+                (_served_columns(index["columns"], candidate, equality) for index in indexes[table]),
+                default=0
+            )
+            if served == len(candidate):
+                continue
+            key = (table, candidate)
+            finding = findings.setdefault(key, {
+                "table": table,
+                "columns": list(candidate),
+                "status": "missing" if served == 0 else "partial",
+                "served_columns": served,
+                "statements": 0,
+                "total_ms": 0.0,
+                "example": query["fingerprint"]
+            })
+            finding["statements"] += query.get("count", 0)
+            finding["total_ms"] = round(finding["total_ms"] + query.get("total_ms", 0.0), 3)
+
+    unscanned: Set[str] = set()
+    if engine.dialect.name == "postgresql":
+        try:
+            unscanned = _postgres_unscanned(engine)
+        except Exception as e:
+            print(f"⚠️  Could not read pg_stat_user_indexes: {e}")
+
+    primary_keys = {
+        table: index["columns"]
+        for table, entries in indexes.items()
+        for index in entries
+        if index["kind"] == "primary"
+    }
+    unused = []
+    for table, entries in indexes.items():
+        for index in entries:
+            if index["kind"] != "index" or not index["columns"]:
+                continue
+            if index["columns"] == primary_keys.get(table):
+                reason = "duplicates the primary key"
+            elif index["name"] in unscanned:
+                reason = "never scanned (pg_stat_user_indexes)"
+            elif table not in used:
+                reason = "table not queried in the recorded window"
+            elif index["columns"][0] not in used[table]:
+                reason = f"leading column {index['columns'][0]} never filtered, joined or sorted on"
+            else:
+                continue
+            unused.append({"table": table, "index": index["name"], "columns": index["columns"], "reason": reason})
+
+    ranked = sorted(findings.values(), key=lambda f: f["total_ms"], reverse=True)
+    for finding in ranked:
+        name = f"idx_{finding['table']}_{'_'.join(finding['columns'])}"
+        finding["suggestion"] = f"Index('{name}', {', '.join(repr(c) for c in finding['columns'])})"
+    return {
+        "analyzed_fingerprints": len(queries),
+        "missing": [f for f in ranked if f["status"] == "missing"],
+        "partial": [f for f in ranked if f["status"] == "partial"],
+        "unused": unused
+    }
+
+
+def create_model_indexes(engine) -> List[str]:
+    """Create indexes declared on the models that the database lacks"""
+    import models  # noqa: F401  registers every model on Base.metadata
+    from database import Base
+
+    existing = {
+        index["name"]
+        for entries in existing_indexes(engine).values()
+        for index in entries
+    }
+    tables = set(inspect(engine).get_table_names())
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"📊 Analyzed {report['analyzed_fingerprints']} query fingerprints")
+    for status, title in (("missing", "Missing indexes"), ("partial", "Partially covering indexes")):
+        print(f"\n🔍 {title}:")
+        if not report[status]:
+            print("  none")
+        for finding in report[status]:
+            print(f"  {finding['table']}({', '.join(finding['columns'])}): "
+                  f"{finding['statements']} statements, {finding['total_ms']:.1f}ms total")
+            print(f"     {finding['suggestion']}")
+            print(f"     e.g. {finding['example'][:160]}")
+    print("\n🧹 Unused indexes:")
+    if not report["unused"]:
+        print("  none")
+    for index in report["unused"]:
+        print(f"  {index['index']} on {index['table']}({', '.join(index['columns'])}): {index['reason']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recommend indexes from recorded query fingerprints")
+    parser.add_argument("report", nargs="?", help="JSON saved from GET /api/admin/system/queries")
+    parser.add_argument("--create", action="store_true", help="create model-declared indexes missing from the database")
+    args = parser.parse_args(argv)
+
+    from database import engine
+
+    if args.create:
+        created = create_model_indexes(engine)
+        print(f"✅ Created {len(created)} model-declared indexes: {', '.join(created) or 'none'}")
+    if args.report:
+        with open(args.report) as f:
+            data = json.load(f)
+        print_report(advise(data.get("queries", data), engine))
+    elif not args.create:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,19 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from database import Base, engine
+from database import Base, engine, read_engine, async_engine, replica_engine, async_replica_engine, replica_status
 import os
 import time
+import asyncio
 import psutil
 import gc
 from asyncio import Semaphore
 from dotenv import load_dotenv
 from cache_manager import cache as cache_manager
+from warmup import warmup, WARMUP_ENABLED
+from write_behind import write_behind
+from hash_executor import hash_executor
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +22,8 @@ load_dotenv()
 from utils.security_headers import SecurityHeadersMiddleware, configure_cors
 from utils.csrf import CSRFMiddleware
 from utils.rate_limit import RateLimitMiddleware
+from utils.query_budget import QueryBudgetMiddleware, install_query_tracking
+from utils.query_profiler import QUERY_PROFILER_ENABLED, query_profiler
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,6 +48,15 @@ app.add_middleware(CSRFMiddleware)
 # 4. Trusted host middleware
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])  # Configure appropriately for production
 
+# 5. Per-request SQL statement count, query budget and N+1 detection,
+# plus the slow-query log
+for db_engine in (engine, read_engine, async_engine, replica_engine, async_replica_engine):
+    if db_engine is not None:
+        install_query_tracking(db_engine)
+        if QUERY_PROFILER_ENABLED:
+            query_profiler.install(db_engine)
+app.add_middleware(QueryBudgetMiddleware)
+
 # Configure CORS with tight security settings
 configure_cors(app, allowed_origins=[
     "http://localhost:3000",  # User panel dev
@@ -68,7 +84,7 @@ async def health_check():
     
     if cached_health:
         print(f"✅ Cache HIT for {cache_key}")
-        return cached_health
+        return dict(cached_health, warmup=warmup.status(), replica=replica_status())
     
     print(f"❌ Cache MISS for {cache_key}")
     
@@ -84,7 +100,33 @@ async def health_check():
     cache_manager.set(cache_key, health_data, ttl=30)
     print(f"💾 Cached {cache_key} for 30 seconds")
     
-    return health_data
+    return dict(health_data, warmup=warmup.status(), replica=replica_status())
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the cache warm-up finished or ran out of budget"""
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+# Registers the reference datasets preloaded by the warm-up
+import services.reference_data
+
+@app.on_event("startup")
+async def start_cache_warmup():
+    """Run the warm-up in the background so startup itself is not delayed"""
+    if WARMUP_ENABLED:
+        app.state.warmup_task = asyncio.create_task(warmup.run())
+    else:
+        warmup.skip()
+
+@app.on_event("shutdown")
+def flush_write_behind():
+    """Write out queued event rows before the worker exits"""
+    write_behind.stop()
+
+@app.on_event("shutdown")
+def stop_hash_executor():
+    """Stop the password hashing worker processes"""
+    hash_executor.shutdown()
 
 @app.get("/circuit-breaker/stats")
 async def get_circuit_breaker_stats():
@@ -92,38 +134,11 @@ async def get_circuit_breaker_stats():
     from utils.circuit_breaker import get_circuit_breaker_stats
     return get_circuit_breaker_stats()
 
-# Auth optimization middleware (MUST be first)
-auth_semaphore = Semaphore(5)  # Limit auth requests to 5 concurrent
-
-@app.middleware("http")
-async def auth_optimization_middleware(request: Request, call_next):
-    """Optimize authentication for public endpoints - FIRST MIDDLEWARE"""
-    # Skip auth middleware for public endpoints
-    public_endpoints = [
-        "/api/automations/marketplace",
-        "/api/optimized/automations/marketplace",
-        "/api/optimized/cache/stats",
-        "/health",
-        "/docs",
-        "/redoc",
-        "/openapi.json"
-    ]
-    
-    if request.url.path in public_endpoints:
-        response = await call_next(request)
-        return response
-    
-    # For auth endpoints, use limited concurrency
-    if request.url.path.startswith("/api/auth/"):
-        async with auth_semaphore:
-            response = await call_next(request)
-            return response
-    
-    # For other endpoints, proceed normally
-    response = await call_next(request)
-    return response
+# Auth endpoints are not serialized behind a semaphore: their bcrypt work
+# runs in hash_executor's process pool, which caps jobs in flight and answers
+# 429 past the cap
 
-# Performance optimization middleware (SECOND)
+# Performance optimization middleware
 request_semaphore = Semaphore(10)  # Max 10 concurrent requests
 
 @app.middleware("http")
@@ -137,7 +152,7 @@ async def performance_middleware(request: Request, call_next):
         gc.collect()  # Force garbage collection
         print(f"High memory usage: {memory_percent}% - forced GC")
     
-    # Rate limiting with semaphore (but not for auth endpoints - they have their own)
+    # Rate limiting with semaphore (but not for auth endpoints - bounded by the hash executor)
     if not request.url.path.startswith("/api/auth/"):
         async with request_semaphore:
             try:
@@ -210,6 +225,8 @@ from routers.admin.kb_history import router as kb_history_router
 app.include_router(kb_history_router, prefix="/api/admin", tags=["kb-history"])
 from routers.admin.backups import router as backups_router
 app.include_router(backups_router, prefix="/api/admin", tags=["backups"])
+from routers.admin.exports import router as exports_router
+app.include_router(exports_router, prefix="/api/admin", tags=["exports"])
 from routers.admin.kb_templates import router as kb_templates_router
 app.include_router(kb_templates_router, prefix="/api/admin", tags=["kb-templates"])
 from routers.admin.automation_integrations import router as automation_integrations_router
@@ -0,0 +1,52 @@
+"""Composite indexes for the filters and orderings of hot queries
+
+Revision ID: b5d2c8e41f07
+Revises: 3f12e8f73391
+Create Date: 2026-10-17 10:12:40.512931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2c8e41f07'
+down_revision: Union[str, None] = '3f12e8f73391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('token_usages', schema=None) as batch_op:
+        batch_op.create_index('idx_token_usages_user_automation_created', ['user_automation_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('idx_notifications_user_read_created', ['user_id', 'is_read', 'created_at'], unique=False)
+
+    with op.batch_alter_table('kb_status_history', schema=None) as batch_op:
+        batch_op.create_index('idx_kb_status_history_automation_timestamp', ['automation_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('idx_payments_user_status_created', ['user_id', 'status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('user_automations', schema=None) as batch_op:
+        batch_op.create_index('idx_user_automations_user_automation', ['user_id', 'automation_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_automations', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_automations_user_automation')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('idx_payments_user_status_created')
+
+    with op.batch_alter_table('kb_status_history', schema=None) as batch_op:
+        batch_op.drop_index('idx_kb_status_history_automation_timestamp')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('idx_notifications_user_read_created')
+
+    with op.batch_alter_table('token_usages', schema=None) as batch_op:
+        batch_op.drop_index('idx_token_usages_user_automation_created')
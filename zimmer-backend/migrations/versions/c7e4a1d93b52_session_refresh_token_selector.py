@@ -0,0 +1,31 @@
+"""Indexed selector for split selector/verifier refresh tokens
+
+Revision ID: c7e4a1d93b52
+Revises: b5d2c8e41f07
+Create Date: 2026-10-17 11:03:18.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e4a1d93b52'
+down_revision: Union[str, None] = 'b5d2c8e41f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable: existing bcrypt sessions get a selector on their next refresh
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('refresh_token_selector', sa.String(length=32), nullable=True))
+        batch_op.create_index(batch_op.f('ix_sessions_refresh_token_selector'), ['refresh_token_selector'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sessions_refresh_token_selector'))
+        batch_op.drop_column('refresh_token_selector')
@@ -0,0 +1,29 @@
+"""Per-user auth_version for the principal cache and access-token revocation
+
+Revision ID: e3f8b6c21a94
+Revises: c7e4a1d93b52
+Create Date: 2026-10-17 14:26:41.583902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f8b6c21a94'
+down_revision: Union[str, None] = 'c7e4a1d93b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Access tokens issued before this column existed carry no version and count as 0
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('auth_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('auth_version')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -18,4 +18,9 @@ class KBStatusHistory(Base):
     # Relationships
     user = relationship("User", back_populates="kb_status_history")
     user_automation = relationship("UserAutomation", back_populates="kb_status_history")
-    automation = relationship("Automation", back_populates="kb_status_history") 
\ No newline at end of file
+    automation = relationship("Automation", back_populates="kb_status_history")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_kb_status_history_automation_timestamp', 'automation_id', 'timestamp'),
+    ) 
\ No newline at end of file
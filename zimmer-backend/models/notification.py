@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -16,3 +16,8 @@ class Notification(Base):
     read_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", backref="notifications")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -22,4 +22,9 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    token_adjustments = relationship("TokenAdjustment", back_populates="related_payment") 
\ No newline at end of file
+    token_adjustments = relationship("TokenAdjustment", back_populates="related_payment")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_payments_user_status_created', 'user_id', 'status', 'created_at'),
+    ) 
\ No newline at end of file
@@ -10,6 +10,10 @@ class Session(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Indexed half of a "<selector>.<verifier>" refresh token; NULL for
+    # legacy sessions whose hash is a bcrypt hash of the whole token
+    refresh_token_selector = Column(String(32), nullable=True, unique=True, index=True)
+    # SHA-256 digest of the verifier (bcrypt for legacy sessions)
     refresh_token_hash = Column(Text, nullable=False, index=True)
     user_agent = Column(Text, nullable=True)
     ip_address = Column(Text, nullable=True)
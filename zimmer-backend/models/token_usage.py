@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -9,4 +9,9 @@ class TokenUsage(Base):
     tokens_used = Column(Integer, nullable=False)
     usage_type = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_token_usages_user_automation_created', 'user_automation_id', 'created_at'),
+    )
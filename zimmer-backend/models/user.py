@@ -23,6 +23,9 @@ class User(Base):
     email_verified_at = Column(DateTime(timezone=True), nullable=True)
     twofa_enabled = Column(Boolean, nullable=False, default=False, server_default='0')
     twofa_secret = Column(String(64), nullable=True)
+    # Bumped on role, active-flag and password changes; access tokens carry
+    # the version they were issued at and stop working once it moves on
+    auth_version = Column(Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     knowledge_entries = relationship("KnowledgeEntry", back_populates="client")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -21,6 +21,7 @@ class UserAutomation(Base):
     # Add unique constraint for bot token
     __table_args__ = (
         UniqueConstraint('telegram_bot_token', name='uq_telegram_bot_token'),
+        Index('idx_user_automations_user_automation', 'user_id', 'automation_id'),
     )
     
     # Relationships
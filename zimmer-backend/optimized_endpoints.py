@@ -3,7 +3,8 @@ Optimized Endpoints for Zimmer AI Platform
 High-performance versions of critical endpoints with caching and query optimization
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_, or_
 from typing import Optional, List
@@ -20,14 +21,20 @@ from utils.auth import get_current_user, get_current_admin_user
 from cache_manager import (
     cached, cache_user_data, get_cached_user_data, invalidate_user_cache,
     cache_dashboard_data, get_cached_dashboard_data,
-    cache_marketplace_data, get_cached_marketplace_data,
-    cache_admin_stats, get_cached_admin_stats
+    cache_admin_stats, get_cached_admin_stats, user_tag
 )
+from services.marketplace import get_marketplace_data
+from utils.http_cache import json_response, PUBLIC_SHORT
 
 router = APIRouter(prefix="/api/optimized", tags=["optimized"])
 
 @router.get("/me")
-@cached(ttl=300, key_prefix="user_me:")
+@cached(
+    ttl=300,
+    key_prefix="user_me:",
+    key_args=["current_user.id"],
+    tags=lambda current_user: [user_tag(current_user.id)]
+)
 async def get_current_user_optimized(
     current_user: User = Depends(get_current_user)
 ):
@@ -51,7 +58,7 @@ async def get_current_user_optimized(
             "twofa_enabled": current_user.twofa_enabled
         }
         
-        cache_user_data(current_user.id, user_data, ttl=300)
+        cache_user_data(current_user.id, user_data)
         return user_data
         
     except Exception as e:
@@ -127,8 +134,12 @@ async def get_user_dashboard_optimized(
             "has_expired_demo": has_expired_demo
         }
         
-        # Cache the result
-        cache_dashboard_data(current_user.id, dashboard_data, ttl=120)
+        # Cache the result until a balance or automation change invalidates it
+        cache_dashboard_data(
+            current_user.id,
+            dashboard_data,
+            automation_ids=[a["automation_id"] for a in automations]
+        )
         
         return dashboard_data
         
@@ -139,48 +150,10 @@ async def get_user_dashboard_optimized(
         )
 
 @router.get("/automations/marketplace")
-async def get_marketplace_automations_optimized(
-    db: Session = Depends(get_db)
-):
-    """Optimized marketplace endpoint with caching"""
+async def get_marketplace_automations_optimized(request: Request):
+    """Optimized marketplace endpoint with stale-while-revalidate caching"""
     try:
-        # Check cache first
-        cached_data = get_cached_marketplace_data()
-        if cached_data:
-            return cached_data
-        
-        # Optimized query with proper indexing
-        automations = db.query(Automation).filter(
-            and_(
-                Automation.status == True,
-                Automation.is_listed == True,
-                Automation.health_status == "healthy"
-            )
-        ).order_by(Automation.created_at.desc()).all()
-        
-        marketplace_data = []
-        for automation in automations:
-            marketplace_data.append({
-                "id": automation.id,
-                "name": automation.name,
-                "description": automation.description,
-                "pricing_type": automation.pricing_type,
-                "price_per_token": automation.price_per_token,
-                "health_status": automation.health_status,
-                "last_health_at": automation.last_health_at,
-                "created_at": automation.created_at
-            })
-        
-        response_data = {
-            "automations": marketplace_data,
-            "total": len(marketplace_data),
-            "message": "Available automations in marketplace"
-        }
-        
-        # Cache the result
-        cache_marketplace_data(response_data, ttl=600)
-        
-        return response_data
+        return json_response(request, await get_marketplace_data(), PUBLIC_SHORT)
         
     except Exception as e:
         raise HTTPException(
@@ -315,7 +288,7 @@ async def get_admin_dashboard_optimized(
         }
         
         # Cache the result
-        cache_admin_stats(dashboard_data, ttl=120)
+        cache_admin_stats(dashboard_data)
         
         return dashboard_data
         
@@ -326,18 +299,32 @@ async def get_admin_dashboard_optimized(
         )
 
 @router.get("/cache/stats")
-async def get_cache_statistics():
-    """Get cache statistics for monitoring"""
+async def get_cache_statistics(
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Get cache statistics for monitoring (admin only)"""
     from cache_manager import get_cache_stats
     return get_cache_stats()
 
+@router.get("/cache/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics(
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Per-prefix cache metrics in the Prometheus text format (admin only)"""
+    from cache_metrics import cache_metrics
+    return PlainTextResponse(
+        cache_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @router.post("/cache/clear")
 async def clear_cache(
     current_admin: User = Depends(get_current_admin_user)
 ):
     """Clear all cache entries (admin only)"""
-    from cache_manager import cache
+    from cache_manager import cache, negative_cache
     cache.clear()
+    negative_cache.clear()
     return {"message": "Cache cleared successfully"}
 
 @router.post("/cache/cleanup")
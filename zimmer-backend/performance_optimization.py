@@ -9,85 +9,24 @@ import sys
 from datetime import datetime, timedelta
 from sqlalchemy import create_engine, text, Index, func
 from sqlalchemy.orm import sessionmaker
-from database import Base, engine, SessionLocal
+from database import Base, engine, SessionLocal, SQLITE_PRAGMAS
+from index_advisor import create_model_indexes
 
 def create_performance_indexes():
-    """Create additional indexes for frequently queried columns"""
+    """Create the indexes declared on the models that the database lacks.
+
+    Indexes live on the models (and ship as Alembic migrations); run
+    ``python index_advisor.py`` against a query report to find new ones.
+    """
     print("🔧 Creating performance indexes...")
     
-    db = SessionLocal()
     try:
-        # Create indexes for frequently queried columns
-        indexes_to_create = [
-            # User queries
-            "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
-            "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
-            "CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active)",
-            
-            # UserAutomation queries
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_user_id ON user_automations(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_automation_id ON user_automations(automation_id)",
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_status ON user_automations(status)",
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_provisioned_at ON user_automations(provisioned_at)",
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_integration_status ON user_automations(integration_status)",
-            
-            # TokenUsage queries
-            "CREATE INDEX IF NOT EXISTS idx_token_usage_user_id ON token_usage(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_token_usage_created_at ON token_usage(created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_token_usage_user_automation_id ON token_usage(user_automation_id)",
-            
-            # Payment queries
-            "CREATE INDEX IF NOT EXISTS idx_payments_user_id ON payments(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status)",
-            "CREATE INDEX IF NOT EXISTS idx_payments_created_at ON payments(created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_payments_automation_id ON payments(automation_id)",
-            
-            # Ticket queries
-            "CREATE INDEX IF NOT EXISTS idx_tickets_user_id ON tickets(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_importance ON tickets(importance)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)",
-            
-            # Automation queries
-            "CREATE INDEX IF NOT EXISTS idx_automations_status ON automations(status)",
-            "CREATE INDEX IF NOT EXISTS idx_automations_health_status ON automations(health_status)",
-            "CREATE INDEX IF NOT EXISTS idx_automations_is_listed ON automations(is_listed)",
-            "CREATE INDEX IF NOT EXISTS idx_automations_created_at ON automations(created_at)",
-            
-            # Session queries
-            "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)",
-            "CREATE INDEX IF NOT EXISTS idx_sessions_revoked_at ON sessions(revoked_at)",
-            
-            # KB Status History queries
-            "CREATE INDEX IF NOT EXISTS idx_kb_status_history_user_id ON kb_status_history(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_kb_status_history_automation_id ON kb_status_history(automation_id)",
-            "CREATE INDEX IF NOT EXISTS idx_kb_status_history_timestamp ON kb_status_history(timestamp)",
-            "CREATE INDEX IF NOT EXISTS idx_kb_status_history_kb_health ON kb_status_history(kb_health)",
-            
-            # Composite indexes for common query patterns
-            "CREATE INDEX IF NOT EXISTS idx_user_automations_user_status ON user_automations(user_id, status)",
-            "CREATE INDEX IF NOT EXISTS idx_payments_user_status ON payments(user_id, status)",
-            "CREATE INDEX IF NOT EXISTS idx_token_usage_user_date ON token_usage(user_id, created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_user_status ON tickets(user_id, status)",
-        ]
-        
-        for index_sql in indexes_to_create:
-            try:
-                db.execute(text(index_sql))
-                print(f"  ✅ Created index: {index_sql.split('idx_')[1].split(' ')[0]}")
-            except Exception as e:
-                print(f"  ⚠️  Index creation warning: {e}")
-        
-        db.commit()
-        print("✅ Performance indexes created successfully!")
-        
+        created = create_model_indexes(engine)
+        for name in created:
+            print(f"  ✅ Created index: {name}")
+        print(f"✅ Performance indexes up to date ({len(created)} created)")
     except Exception as e:
         print(f"❌ Error creating indexes: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 def optimize_database_settings():
     """Optimize database settings for better performance"""
@@ -95,23 +34,17 @@ def optimize_database_settings():
     
     db = SessionLocal()
     try:
-        # SQLite specific optimizations
+        # SQLite specific optimizations. The per-connection settings
+        # (WAL, cache, mmap...) are applied by database.apply_sqlite_pragmas
+        # on every new connection; only the one-off maintenance runs here.
         if "sqlite" in str(engine.url):
-            optimizations = [
-                "PRAGMA journal_mode = WAL",  # Write-Ahead Logging
-                "PRAGMA synchronous = NORMAL",  # Balance between safety and speed
-                "PRAGMA cache_size = -64000",  # 64MB cache
-                "PRAGMA temp_store = MEMORY",  # Store temp tables in memory
-                "PRAGMA mmap_size = 268435456",  # 256MB memory mapping
-                "PRAGMA optimize",  # Optimize the database
-            ]
-            
-            for pragma in optimizations:
-                try:
-                    db.execute(text(pragma))
-                    print(f"  ✅ Applied: {pragma}")
-                except Exception as e:
-                    print(f"  ⚠️  Pragma warning: {e}")
+            for name, value in SQLITE_PRAGMAS:
+                print(f"  ✅ Per-connection: PRAGMA {name} = {value}")
+            try:
+                db.execute(text("PRAGMA optimize"))
+                print("  ✅ Applied: PRAGMA optimize")
+            except Exception as e:
+                print(f"  ⚠️  Pragma warning: {e}")
         
         db.commit()
         print("✅ Database settings optimized!")
@@ -130,7 +63,7 @@ def analyze_query_performance():
     try:
         # Check table sizes
         tables = [
-            'users', 'user_automations', 'token_usage', 'payments', 
+            'users', 'user_automations', 'token_usages', 'payments', 
             'tickets', 'automations', 'sessions', 'kb_status_history'
         ]
         
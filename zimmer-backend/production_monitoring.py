@@ -13,10 +13,12 @@ from enum import Enum
 import json
 import logging
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
 from models.automation import Automation
 from models.user_automation import UserAutomation
@@ -24,6 +26,9 @@ from models.payment import Payment
 from models.ticket import Ticket
 from utils.auth import get_current_admin_user
 from cache_manager import cache, get_cache_stats
+from db_pool_metrics import pool_metrics
+from write_behind import write_behind
+from hash_executor import hash_executor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -67,7 +72,9 @@ class ProductionMonitor:
             "response_time_ms": 500.0,
             "error_rate_percent": 5.0,
             "active_connections": 150,
+            "pool_timeouts": 0,
         }
+        self._pool_timeouts_seen = 0
         self.start_time = datetime.utcnow()
     
     def collect_system_metrics(self) -> SystemMetrics:
@@ -79,7 +86,7 @@ class ProductionMonitor:
             disk = psutil.disk_usage('/')
             
             # Application metrics (simplified)
-            active_connections = 0  # Would be collected from connection pool
+            active_connections = pool_metrics.total_in_use()
             response_time_avg = 0.0  # Would be collected from request logs
             error_rate = 0.0  # Would be collected from error logs
             throughput = 0.0  # Would be collected from request logs
@@ -180,6 +187,20 @@ class ProductionMonitor:
             )
             new_alerts.append(alert)
         
+        # Connection pool starvation: any checkout timeout since the last check
+        pool_timeouts = sum(pool["timeouts"] for pool in pool_metrics.snapshot().values())
+        if pool_timeouts - self._pool_timeouts_seen > self.thresholds["pool_timeouts"]:
+            alert = Alert(
+                level=AlertLevel.CRITICAL,
+                message=f"Database pool starvation: {pool_timeouts - self._pool_timeouts_seen} checkout timeouts",
+                timestamp=datetime.utcnow(),
+                metric="pool_timeouts",
+                value=pool_timeouts - self._pool_timeouts_seen,
+                threshold=self.thresholds["pool_timeouts"]
+            )
+            new_alerts.append(alert)
+        self._pool_timeouts_seen = pool_timeouts
+        
         # Add new alerts to the list
         self.alerts.extend(new_alerts)
         
@@ -334,12 +355,12 @@ async def get_alerts(level: Optional[str] = None, hours: int = 24):
         raise HTTPException(status_code=500, detail=f"Alerts retrieval failed: {str(e)}")
 
 @router.get("/database/health")
-async def get_database_health(db: Session = Depends(get_db)):
+async def get_database_health(db: AsyncSession = Depends(get_async_db)):
     """Get database health status"""
     try:
         # Test database connection
         start_time = time.time()
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         response_time = (time.time() - start_time) * 1000
         
         # Get database statistics
@@ -349,7 +370,7 @@ async def get_database_health(db: Session = Depends(get_db)):
         tables = ['users', 'automations', 'user_automations', 'payments', 'tickets']
         for table in tables:
             try:
-                result = db.execute(text(f"SELECT COUNT(*) FROM {table}"))
+                result = await db.execute(text(f"SELECT COUNT(*) FROM {table}"))
                 stats[f"{table}_count"] = result.scalar()
             except Exception as e:
                 stats[f"{table}_count"] = f"Error: {str(e)}"
@@ -358,7 +379,8 @@ async def get_database_health(db: Session = Depends(get_db)):
             "status": "healthy",
             "response_time_ms": response_time,
             "timestamp": datetime.utcnow().isoformat(),
-            "statistics": stats
+            "statistics": stats,
+            "pools": pool_metrics.snapshot()
         }
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -368,6 +390,39 @@ async def get_database_health(db: Session = Depends(get_db)):
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@router.get("/database/pool")
+async def get_database_pool_metrics():
+    """Connection pool sizing, checkout waits, timeouts and churn per engine"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "active_connections": pool_metrics.total_in_use(),
+        "pools": pool_metrics.snapshot()
+    }
+
+@router.get("/database/pool/metrics", response_class=PlainTextResponse)
+async def get_database_pool_prometheus():
+    """Connection pool metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        pool_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/database/write-behind")
+async def get_write_behind_metrics():
+    """Queued event rows, bulk flushes, failures and backpressure of the write-behind buffer"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **write_behind.snapshot()
+    }
+
+@router.get("/auth/hash-pool")
+async def get_hash_pool_metrics():
+    """Queue depth, rejections (429) and latency of the password hashing process pool"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **hash_executor.snapshot()
+    }
+
 @router.get("/cache/health")
 async def get_cache_health():
     """Get cache health status"""
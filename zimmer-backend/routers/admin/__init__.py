@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from typing import Optional, List
 from datetime import datetime, timedelta
-from database import SessionLocal
+from database import SessionLocal, get_replica_db
 from models.user import User
 from models.payment import Payment
 from models.token_usage import TokenUsage
@@ -14,21 +14,27 @@ from models.kb_status_history import KBStatusHistory
 from models.kb_template import KBTemplate
 from schemas.admin import UserListResponse, PaymentListResponse, UserTokenUsageResponse, UserAutomationAdminResponse, PaymentResponse, UsageStatsResponse, PeriodInfo
 from utils.auth_dependency import get_current_admin_user, get_db
-from cache_manager import cache as cache_manager
+from cache_manager import cache as cache_manager, swr, invalidated_ttl, ADMIN_USERS_TAG, ADMIN_STATS_TAG
+from utils.pagination import Keyset, PageParams, paginate
 
 router = APIRouter()
 
+USERS_KEYSET = Keyset(User.created_at.desc(), User.id.desc())
+PAYMENTS_KEYSET = Keyset(Payment.created_at.desc(), Payment.id.desc())
+TICKETS_KEYSET = Keyset(Ticket.created_at.desc(), Ticket.id.desc())
+
 @router.get("/users", response_model=UserListResponse)
 async def get_users(
     is_admin: Optional[bool] = Query(None, description="Filter by admin status"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """
-    Get list of all users/clients (admin only) - Main endpoint
+    Get list of all users/clients (admin only) - Main endpoint, newest first, keyset paginated
     """
     # Check cache first
-    cache_key = f"admin_users_{is_admin}"
+    cache_key = f"admin_users_{is_admin}_{page.cursor}_{page.limit}_{page.count}"
     cached_data = cache_manager.get(cache_key)
     
     if cached_data:
@@ -42,15 +48,12 @@ async def get_users(
         if is_admin is not None:
             query = query.filter(User.is_admin == is_admin)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get users
-        users = query.all()
+        # Get one page of users and the total
+        result_page = paginate(query, USERS_KEYSET, page)
         
         # Format response
         formatted_users = []
-        for user in users:
+        for user in result_page.items:
             formatted_users.append({
                 "id": user.id,
                 "email": user.email,
@@ -63,15 +66,19 @@ async def get_users(
             })
         
         result = UserListResponse(
-            total_count=total_count,
-            users=formatted_users
+            total_count=result_page.total,
+            users=formatted_users,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
-        # Cache the result for 3 minutes
-        cache_manager.set(cache_key, result.dict(), ttl=180)
+        # Cache until a user is created or changed
+        cache_manager.set(cache_key, result.dict(), ttl=invalidated_ttl(3600, 180), tags=[ADMIN_USERS_TAG])
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -88,7 +95,7 @@ async def get_users_legacy(
     Get list of all users/clients (admin only)
     """
     # Check cache first
-    cache_key = f"admin_users_{is_admin}"
+    cache_key = f"admin_users_legacy_{is_admin}"
     cached_data = cache_manager.get(cache_key)
     
     if cached_data:
@@ -125,8 +132,8 @@ async def get_users_legacy(
             users=formatted_users
         )
         
-        # Cache the result for 3 minutes
-        cache_manager.set(cache_key, result.dict(), ttl=180)
+        # Cache until a user is created or changed
+        cache_manager.set(cache_key, result.dict(), ttl=invalidated_ttl(3600, 180), tags=[ADMIN_USERS_TAG])
         
         return result
         
@@ -140,11 +147,12 @@ async def get_users_legacy(
 async def get_payments(
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     status: Optional[str] = Query(None, description="Filter by payment status"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """
-    Get payment history (admin only)
+    Get payment history (admin only), newest first, keyset paginated
     """
     try:
         # Build base query with user join
@@ -162,15 +170,12 @@ async def get_payments(
         if status is not None:
             query = query.filter(Payment.status == status)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get payments ordered by newest first
-        payment_records = query.order_by(Payment.created_at.desc()).all()
+        # Get one page of payments and the total
+        result_page = paginate(query, PAYMENTS_KEYSET, page)
         
         # Format response
         formatted_payments = []
-        for payment, user_name in payment_records:
+        for payment, user_name in result_page.items:
             formatted_payments.append(PaymentResponse(
                 id=payment.id,
                 user_id=payment.user_id,
@@ -184,10 +189,14 @@ async def get_payments(
             ))
         
         return PaymentListResponse(
-            total_count=total_count,
-            payments=formatted_payments
+            total_count=result_page.total,
+            payments=formatted_payments,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -324,11 +333,12 @@ async def get_user_automations_admin(
 async def get_tickets(
     status: Optional[str] = Query(None, description="Filter by ticket status"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """
-    Get all support tickets (admin only)
+    Get all support tickets (admin only), newest first, keyset paginated
     """
     try:
         # Build base query with user join
@@ -346,15 +356,12 @@ async def get_tickets(
         if priority is not None:
             query = query.filter(Ticket.importance == priority)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get tickets ordered by newest first
-        ticket_records = query.order_by(Ticket.created_at.desc()).all()
+        # Get one page of tickets and the total
+        result_page = paginate(query, TICKETS_KEYSET, page)
         
         # Format response
         formatted_tickets = []
-        for ticket, user_name in ticket_records:
+        for ticket, user_name in result_page.items:
             formatted_tickets.append({
                 "id": ticket.id,
                 "user_id": ticket.user_id,
@@ -371,10 +378,14 @@ async def get_tickets(
             })
         
         return {
-            "total_count": total_count,
-            "tickets": formatted_tickets
+            "total_count": result_page.total,
+            "tickets": formatted_tickets,
+            "next_cursor": result_page.next_cursor,
+            "total_is_estimate": result_page.total_is_estimate
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -499,46 +510,62 @@ async def test_endpoint():
     """
     return {"message": "Admin router is working", "status": "ok"}
 
+def _compute_dashboard_stats(db: Session) -> dict:
+    """Headline numbers for the admin dashboard"""
+    from models.ticket import Ticket
+    from models.payment import Payment
+    from models.token_usage import TokenUsage
+    
+    # Get total users
+    total_users = db.query(User).count()
+    
+    # Get active tickets (open status)
+    active_tickets = db.query(Ticket).filter(Ticket.status == "open").count()
+    
+    # Get tokens used in the last 30 days
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    tokens_used = db.query(func.sum(TokenUsage.tokens_used)).filter(
+        TokenUsage.created_at >= thirty_days_ago
+    ).scalar() or 0
+    
+    # Get monthly revenue (current month)
+    current_month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    monthly_revenue = db.query(func.sum(Payment.amount)).filter(
+        Payment.status == "completed",
+        Payment.created_at >= current_month_start
+    ).scalar() or 0
+    
+    return {
+        "total_users": total_users,
+        "active_tickets": active_tickets,
+        "tokens_used": int(tokens_used),
+        "monthly_revenue": float(monthly_revenue)
+    }
+
+def _load_dashboard_stats() -> dict:
+    """Compute dashboard stats on a dedicated session (runs in the background)"""
+    db = SessionLocal()
+    try:
+        return _compute_dashboard_stats(db)
+    finally:
+        db.close()
+
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """
     Get dashboard statistics for admin panel
     """
     try:
-        from sqlalchemy import func
-        from datetime import datetime, timedelta
-        from models.ticket import Ticket
-        from models.payment import Payment
-        from models.token_usage import TokenUsage
-        
-        # Get total users
-        total_users = db.query(User).count()
-        
-        # Get active tickets (open status)
-        active_tickets = db.query(Ticket).filter(Ticket.status == "open").count()
-        
-        # Get tokens used in the last 30 days
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        tokens_used = db.query(func.sum(TokenUsage.tokens_used)).filter(
-            TokenUsage.created_at >= thirty_days_ago
-        ).scalar() or 0
-        
-        # Get monthly revenue (current month)
-        current_month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_revenue = db.query(func.sum(Payment.amount)).filter(
-            Payment.status == "completed",
-            Payment.created_at >= current_month_start
-        ).scalar() or 0
-        
-        return {
-            "total_users": total_users,
-            "active_tickets": active_tickets,
-            "tokens_used": int(tokens_used),
-            "monthly_revenue": float(monthly_revenue)
-        }
+        # Served from cache; refreshed in the background after a minute
+        return await swr.get(
+            "admin:dashboard-stats",
+            _load_dashboard_stats,
+            soft_ttl=60,
+            hard_ttl=900,
+            tags=[ADMIN_STATS_TAG]
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -9,9 +9,10 @@ from models.user_automation import UserAutomation
 from models.user import User
 from schemas.automation import ProvisionRequest, ProvisionResponse
 from utils.auth_dependency import get_current_admin_user, get_current_user, get_db
-from utils.service_tokens import verify_token
+from utils.service_tokens import verify_service_token_async
 from datetime import datetime, timezone
 from services.automation_health import probe, classify
+from cache_manager import invalidate_automation_cache, invalidate_user_cache
 import logging
 
 router = APIRouter()
@@ -98,6 +99,7 @@ async def create_automation(
         
         db.commit()
         db.refresh(automation)
+        invalidate_automation_cache(automation.id)
         return automation
     except Exception as e:
         db.rollback()
@@ -142,6 +144,7 @@ async def update_automation(
             
             db.commit()
             db.refresh(automation)
+            invalidate_automation_cache(automation_id)
         
         return automation
     except HTTPException:
@@ -170,6 +173,7 @@ async def delete_automation(
         
         db.delete(automation)
         db.commit()
+        invalidate_automation_cache(automation_id)
         return {"message": "Automation deleted successfully"}
     except HTTPException:
         raise
@@ -224,7 +228,7 @@ async def provision_automation(
         )
     
     # Verify service token hash
-    if not verify_token(service_token, automation.service_token_hash):
+    if not await verify_service_token_async(automation_id, service_token, automation.service_token_hash):
         logger.error(f"Invalid service token for automation {automation_id}")
         raise HTTPException(
             status_code=500,
@@ -264,6 +268,7 @@ async def provision_automation(
                     pass  # Add field to UserAutomation if needed
                 
                 db.commit()
+                invalidate_user_cache(current_user.id)
                 
                 return ProvisionResponse(
                     success=True,
@@ -5,7 +5,7 @@ from models.automation import Automation
 from models.user import User
 from schemas.automation import TokenRotationResponse, AutomationIntegrationResponse
 from utils.auth_dependency import get_current_admin_user, get_db
-from utils.service_tokens import generate_token, hash_token, mask_token
+from utils.service_tokens import generate_token, hash_token, invalidate_service_token, mask_token
 from datetime import datetime
 import logging
 
@@ -33,6 +33,8 @@ def rotate_service_token(
     automation.service_token_hash = token_hash
     automation.updated_at = datetime.utcnow()
     db.commit()
+    # Cached verifications of the old token stop counting right away
+    invalidate_service_token(automation_id)
     
     # Log the rotation event
     logger.info(f"Service token rotated for automation {automation_id} by admin {current_admin.id}")
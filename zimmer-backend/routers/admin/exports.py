@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime, timedelta
+from database import open_replica_session
+from models.user import User
+from services.exports import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+from utils.auth_dependency import get_current_admin_user
+
+router = APIRouter()
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {name} format. Use YYYY-MM-DD"
+        )
+
+@router.get("/exports/{dataset}")
+def export_dataset(
+    dataset: str = Path(..., description="payments, token-usage, openai-key-usage or kb-history"),
+    format: str = Query("ndjson", pattern=f"^({'|'.join(EXPORT_FORMATS)})$", description="ndjson or csv"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    from_date: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="Filter to date, inclusive (YYYY-MM-DD)"),
+    automation_id: Optional[int] = Query(None, description="Filter by automation ID"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Stream a full dataset for accounting as NDJSON or CSV.
+
+    Rows are read in batches through a server-side cursor and written out as
+    they arrive, so memory use does not depend on the size of the export.
+    """
+    export = EXPORT_DATASETS.get(dataset)
+    if export is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown export '{dataset}'. Available: {', '.join(EXPORT_DATASETS)}"
+        )
+
+    start = _parse_date(from_date, "from_date")
+    end = _parse_date(to_date, "to_date")
+    if end is not None:
+        end += timedelta(days=1)
+
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format}"
+    media_type = _MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        stream_export(open_replica_session, export, format, compress=gzip,
+                      start=start, end=end, automation_id=automation_id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store"
+        }
+    )
@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_
 from typing import List, Optional
 from datetime import datetime, timedelta
-from database import get_db
+from database import get_replica_db
 from models.kb_status_history import KBStatusHistory
 from models.user import User
 from models.automation import Automation
 from utils.auth_dependency import get_current_admin_user
+from utils.pagination import Keyset, MAX_PAGE_SIZE
 from pydantic import BaseModel
 
 router = APIRouter()
 
+KB_HISTORY_KEYSET = Keyset(KBStatusHistory.timestamp.desc(), KBStatusHistory.id.desc())
+
 class KBHistoryResponse(BaseModel):
     id: int
     user_id: int
@@ -35,16 +38,21 @@ class KBHistoryStats(BaseModel):
 
 @router.get("/kb-history", response_model=List[KBHistoryResponse])
 async def get_kb_history(
+    response: Response,
     automation_id: Optional[int] = Query(None, description="Filter by automation ID"),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     from_date: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
-    page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=100, description="Records per page"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    page: int = Query(1, ge=1, description="Page number (OFFSET based; use cursor instead)", deprecated=True),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Records per page"),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
-    """Get paginated KB status history with filters"""
+    """Get KB status history with filters, newest first, keyset paginated.
+
+    The cursor of the next page is returned in the ``X-Next-Cursor`` header.
+    """
     
     # Build query
     query = db.query(
@@ -84,19 +92,17 @@ async def get_kb_history(
                 detail="Invalid to_date format. Use YYYY-MM-DD"
             )
     
-    # Order by timestamp (newest first)
-    query = query.order_by(desc(KBStatusHistory.timestamp))
-    
-    # Apply pagination
-    offset = (page - 1) * limit
-    total_count = query.count()
-    
-    # Get paginated results
-    results = query.offset(offset).limit(limit).all()
+    # Seek past the cursor (newest first); page numbers are kept for older clients
+    query = KB_HISTORY_KEYSET.apply(query, cursor, limit)
+    if cursor is None and page > 1:
+        query = query.offset((page - 1) * limit)
+    result_page = KB_HISTORY_KEYSET.page(query.all(), limit)
+    if result_page.next_cursor:
+        response.headers["X-Next-Cursor"] = result_page.next_cursor
     
     # Format response
     history_records = []
-    for kb_history, user_name, automation_name in results:
+    for kb_history, user_name, automation_name in result_page.items:
         history_records.append({
             "id": kb_history.id,
             "user_id": kb_history.user_id,
@@ -116,7 +122,7 @@ async def get_kb_history_stats(
     automation_id: Optional[int] = Query(None, description="Filter by automation ID"),
     from_date: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """Get KB history statistics"""
@@ -167,7 +173,7 @@ async def get_kb_history_stats(
 async def get_kb_history_chart_data(
     automation_id: Optional[int] = Query(None, description="Filter by automation ID"),
     days: int = Query(7, ge=1, le=30, description="Number of days to include"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """Get chart data for KB history (last N days)"""
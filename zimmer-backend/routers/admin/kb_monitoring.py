@@ -10,6 +10,7 @@ from models.user_automation import UserAutomation
 from models.user import User
 from models.kb_status_history import KBStatusHistory
 from utils.auth_dependency import get_current_admin_user
+from write_behind import write_behind
 
 router = APIRouter()
 
@@ -108,15 +109,14 @@ async def get_kb_status(
             
             # Save to history
             try:
-                history_record = KBStatusHistory(
+                write_behind.add(db, KBStatusHistory, dict(
                     user_id=user.id,
                     user_automation_id=user_automation.id,
                     automation_id=automation_id,
                     kb_health=kb_health,
                     backup_status=backup_status,
                     error_logs=error_logs if error_logs else None
-                )
-                db.add(history_record)
+                ))
             except Exception as e:
                 # Log error but don't fail the main request
                 print(f"Error saving KB history: {e}")
@@ -136,20 +136,19 @@ async def get_kb_status(
             
             # Save error status to history
             try:
-                history_record = KBStatusHistory(
+                write_behind.add(db, KBStatusHistory, dict(
                     user_id=user.id,
                     user_automation_id=user_automation.id,
                     automation_id=automation_id,
                     kb_health="error",
                     backup_status=False,
                     error_logs=["Failed to connect to automation API"]
-                )
-                db.add(history_record)
+                ))
             except Exception as e:
                 # Log error but don't fail the main request
                 print(f"Error saving KB history: {e}")
     
-    # Commit all history records
+    # Commit history records the buffer could not take (write-behind disabled)
     try:
         db.commit()
     except Exception as e:
@@ -8,17 +8,21 @@ from models.automation import Automation
 from models.user import User
 from schemas.kb_template import KBTemplateCreate, KBTemplateUpdate, KBTemplateResponse, KBTemplateListResponse
 from utils.auth_dependency import get_current_admin_user, get_db
+from utils.pagination import Keyset, PageParams, paginate
 
 router = APIRouter()
 
+KB_TEMPLATES_KEYSET = Keyset(KBTemplate.created_at.desc(), KBTemplate.id.desc())
+
 @router.get("/kb-templates", response_model=KBTemplateListResponse)
 def list_kb_templates(
     automation_id: Optional[int] = Query(None, description="Filter by automation ID"),
     category: Optional[str] = Query(None, description="Filter by category"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
-    """Get all KB templates with optional filtering"""
+    """Get KB templates with optional filtering, newest first, keyset paginated"""
     try:
         # Build base query with automation join
         query = db.query(
@@ -35,17 +39,12 @@ def list_kb_templates(
         if category is not None:
             query = query.filter(KBTemplate.category == category)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get templates ordered by newest first
-        template_records = query.order_by(
-            KBTemplate.created_at.desc()
-        ).all()
+        # Get one page of templates and the total
+        result_page = paginate(query, KB_TEMPLATES_KEYSET, page)
         
         # Format response
         formatted_templates = []
-        for record, automation_name in template_records:
+        for record, automation_name in result_page.items:
             formatted_templates.append({
                 "id": record.id,
                 "automation_id": record.automation_id,
@@ -58,10 +57,14 @@ def list_kb_templates(
             })
         
         return KBTemplateListResponse(
-            total_count=total_count,
-            templates=formatted_templates
+            total_count=result_page.total,
+            templates=formatted_templates,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -16,6 +16,7 @@ from schemas.openai_key import (
 )
 from utils.crypto import encrypt_secret, mask_secret
 from services.openai_key_manager import OpenAIKeyManager
+from services.reference_data import invalidate_key_pool
 
 router = APIRouter(tags=["admin-openai-keys"])
 
@@ -60,6 +61,7 @@ async def create_openai_key(
     db.add(new_key)
     db.commit()
     db.refresh(new_key)
+    invalidate_key_pool(new_key.automation_id)
     
     # Return with masked key
     return OpenAIKeyOut(
@@ -339,8 +341,10 @@ async def delete_openai_key(
     if not key:
         raise HTTPException(status_code=404, detail="کلید OpenAI یافت نشد")
     
+    automation_id = key.automation_id
     db.delete(key)
     db.commit()
+    invalidate_key_pool(automation_id)
     
     return {"message": "کلید با موفقیت حذف شد"}
 
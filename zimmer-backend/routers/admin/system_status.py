@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from database import SessionLocal
+from database import SessionLocal, engine
 from models.user import User
 from models.automation import Automation
 from models.backup import BackupLog
 from models.payment import Payment
 from models.ticket import Ticket
 from utils.auth_dependency import get_current_admin_user, get_db
+from utils.query_budget import suspend_tracking
+from utils.query_profiler import MAX_FINGERPRINTS, query_profiler
+from index_advisor import advise
 from datetime import datetime, timedelta
 import os
 
@@ -162,3 +166,37 @@ async def get_system_health(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve system health: {str(e)}"
         )
+
+@router.get("/queries")
+async def get_query_report(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total", pattern="^(total|p95|max|count|slow)$"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Hottest SQL statement fingerprints with timings and captured plans (admin only)
+    """
+    return query_profiler.report(limit, sort)
+
+@router.get("/queries/indexes")
+async def get_index_advice(
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Missing and unused indexes for the statements recorded since the last reset (admin only)
+    """
+    def run_advisor():
+        # Schema inspection is not part of the workload being analysed
+        with suspend_tracking():
+            return advise(query_profiler.top(MAX_FINGERPRINTS), engine)
+    return await run_in_threadpool(run_advisor)
+
+@router.delete("/queries")
+async def reset_query_report(
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Start a fresh slow-query measurement window (admin only)
+    """
+    query_profiler.reset()
+    return {"message": "Query statistics reset"}
@@ -6,7 +6,8 @@ from database import SessionLocal
 from models.user import User, UserRole
 from schemas.user import UserCreateRequest, UserUpdateRoleRequest, UserUpdateRequest, UserListResponse
 from utils.auth_dependency import get_current_manager_user, get_db
-from utils.security import hash_password
+from utils.security import hash_password_async
+from cache_manager import invalidate_user_cache, invalidate_admin_user_list, negative_cache, USER_NS
 import logging
 
 router = APIRouter()
@@ -68,7 +69,7 @@ async def create_user(
         )
     
     # Hash the password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     
     # Create new user
     new_user = User(
@@ -83,6 +84,8 @@ async def create_user(
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    invalidate_admin_user_list()
+    negative_cache.forget(USER_NS, new_user.id)
     
     logger.info(f"Manager {current_manager.email} created user {new_user.email} with role {new_user.role}")
     
@@ -122,6 +125,8 @@ async def update_user_role(
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id)
+    invalidate_admin_user_list()
     
     logger.info(f"Manager {current_manager.email} updated user {user.email} role to {user.role}")
     
@@ -227,10 +232,12 @@ async def update_user(
     if user_data.is_active is not None:
         user.is_active = user_data.is_active
     if user_data.password is not None:
-        user.password_hash = hash_password(user_data.password)
+        user.password_hash = await hash_password_async(user_data.password)
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id)
+    invalidate_admin_user_list()
     
     logger.info(f"Manager {current_manager.email} updated user {user.email}")
     
@@ -265,6 +272,8 @@ async def deactivate_user(
     
     user.is_active = False
     db.commit()
+    invalidate_user_cache(user.id)
+    invalidate_admin_user_list()
     
     logger.info(f"Manager {current_manager.email} deactivated user {user.email}")
     
@@ -285,6 +294,8 @@ async def activate_user(
     
     user.is_active = True
     db.commit()
+    invalidate_user_cache(user.id)
+    invalidate_admin_user_list()
     
     logger.info(f"Manager {current_manager.email} activated user {user.email}")
     
@@ -325,6 +336,9 @@ async def bulk_deactivate_users(
             deactivated_count += 1
     
     db.commit()
+    for user in users:
+        invalidate_user_cache(user.id)
+    invalidate_admin_user_list()
     
     logger.info(f"Manager {current_manager.email} bulk deactivated {deactivated_count} users")
     
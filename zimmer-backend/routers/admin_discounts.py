@@ -4,6 +4,8 @@ from typing import List
 from database import get_db
 from schemas.discounts import DiscountCodeCreateIn, DiscountCodeOut
 from models.discount import DiscountCode, DiscountCodeAutomation
+from cache_manager import negative_cache, DISCOUNT_CODE_NS
+from services.reference_data import invalidate_discount_codes
 from utils.auth import get_current_user
 from models.user import User, UserRole
 
@@ -38,6 +40,8 @@ def create_discount(payload: DiscountCodeCreateIn, db: Session = Depends(get_db)
         max_redemptions=payload.max_redemptions, per_user_limit=payload.per_user_limit
     )
     db.add(dc); db.commit(); db.refresh(dc)
+    negative_cache.forget(DISCOUNT_CODE_NS, dc.code)
+    invalidate_discount_codes()
     if payload.automation_ids:
         links = [DiscountCodeAutomation(discount_id=dc.id, automation_id=a) for a in payload.automation_ids]
         db.add_all(links); db.commit()
@@ -68,6 +72,8 @@ def update_discount(id: int, payload: DiscountCodeCreateIn, db: Session = Depend
         links = [DiscountCodeAutomation(discount_id=dc.id, automation_id=a) for a in payload.automation_ids]
         db.add_all(links)
     db.commit(); db.refresh(dc)
+    negative_cache.forget(DISCOUNT_CODE_NS, dc.code)
+    invalidate_discount_codes()
     return {
         "id": dc.id, "code": dc.code, "percent_off": dc.percent_off, "active": dc.active,
         "starts_at": dc.starts_at, "ends_at": dc.ends_at, "max_redemptions": dc.max_redemptions,
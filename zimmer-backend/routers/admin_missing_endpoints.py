@@ -5,7 +5,7 @@ These endpoints are expected by tests but were missing from the main admin route
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_replica_db
 from models.user import User
 from models.openai_key import OpenAIKey
 from models.automation import Automation
@@ -59,7 +59,7 @@ async def get_openai_keys(
 @router.get("/analytics")
 async def get_analytics(
     period: str = "30d",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_replica_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """
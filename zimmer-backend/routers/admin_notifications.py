@@ -7,6 +7,7 @@ from models.user import User
 from models.notification import Notification
 from database import get_db
 from datetime import datetime
+from cache_manager import invalidate_notifications
 
 router = APIRouter(prefix="/api/admin/notifications", tags=["admin:notifications"])
 
@@ -49,6 +50,8 @@ def create_notifications(
         db.add(n)
         ctr += 1
     db.commit()
+    for (uid,) in users:
+        invalidate_notifications(uid)
     return {"created": ctr}
 
 @router.post("/broadcast")
@@ -77,4 +80,5 @@ def broadcast_notifications(
         ))
     db.bulk_save_objects(batch)
     db.commit()
+    invalidate_notifications()
     return {"created": len(batch)}
@@ -17,8 +17,8 @@ from models.email_verification import EmailVerificationToken
 from utils.auth_optimized import get_current_user_optimized, rate_limit_dependency
 from utils.circuit_breaker import auth_circuit_breaker, login_circuit_breaker
 from utils.jwt import create_access_token, create_jwt_token
-from utils.security import hash_password, verify_password
-from cache_manager import cache_manager
+from utils.security import hash_password_async, verify_password_async
+from cache_manager import cache_manager, invalidate_admin_user_list, negative_cache, USER_NS
 from schemas.user import UserSignupRequest, UserSignupResponse
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -42,7 +42,7 @@ async def login(request: dict, db: Session = Depends(get_db)):
         
         # Find user in database
         user = db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not await verify_password_async(password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -70,7 +70,7 @@ async def login(request: dict, db: Session = Depends(get_db)):
             }
         
         # Create proper JWT access token
-        access_token = create_access_token(user.id, user.is_admin if hasattr(user, 'is_admin') else False)
+        access_token = create_access_token(user.id, user.is_admin if hasattr(user, 'is_admin') else False, auth_version=user.auth_version)
         
         # Store token in cache for validation
         cache_manager.set(f"token_{access_token}", user.id, ttl=3600)  # 1 hour
@@ -111,7 +111,7 @@ async def register(user_data: UserSignupRequest, db: Session = Depends(get_db)):
             )
         
         # Hash the password
-        password_hash = hash_password(user_data.password)
+        password_hash = await hash_password_async(user_data.password)
         
         # Create new user
         new_user = User(
@@ -129,9 +129,11 @@ async def register(user_data: UserSignupRequest, db: Session = Depends(get_db)):
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        negative_cache.forget(USER_NS, new_user.id)
+        invalidate_admin_user_list()
         
         # Create JWT access token
-        access_token = create_access_token(new_user.id, new_user.is_admin)
+        access_token = create_access_token(new_user.id, new_user.is_admin, auth_version=new_user.auth_version)
         
         # Store token in cache for validation
         cache_manager.set(f"token_{access_token}", new_user.id, ttl=3600)  # 1 hour
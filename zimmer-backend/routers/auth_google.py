@@ -15,7 +15,8 @@ from settings import settings
 from database import get_db
 from models.user import User
 from utils.jwt import create_access_token
-from utils.security import hash_password
+from utils.security import hash_password_async
+from cache_manager import invalidate_admin_user_list, negative_cache, USER_NS
 
 router = APIRouter(prefix="/api/auth/google", tags=["auth-google"])
 
@@ -81,7 +82,7 @@ async def google_callback(request: Request, response: Response, db: Session = De
         user = User(
             email=email,
             name=userinfo.get("name") or email.split("@")[0],
-            password_hash=hash_password(secrets.token_urlsafe(32)),  # Random password for OAuth users
+            password_hash=await hash_password_async(secrets.token_urlsafe(32)),  # Random password for OAuth users
             is_active=True,
             created_at=datetime.utcnow()
         )
@@ -91,6 +92,8 @@ async def google_callback(request: Request, response: Response, db: Session = De
         db.add(user)
         db.commit()
         db.refresh(user)
+        negative_cache.forget(USER_NS, user.id)
+        invalidate_admin_user_list()
     else:
         # If Google says verified and we haven't set it, set it
         if userinfo.get("email_verified") is True and user.email_verified_at is None:
@@ -98,7 +101,7 @@ async def google_callback(request: Request, response: Response, db: Session = De
             db.commit()
 
     # Issue tokens
-    access_token = create_access_token(user.id, user.is_admin if hasattr(user, 'is_admin') else False)
+    access_token = create_access_token(user.id, user.is_admin if hasattr(user, 'is_admin') else False, auth_version=user.auth_version)
     
     # Set refresh cookie (using existing pattern)
     from utils.jwt import create_refresh_token
@@ -23,14 +23,17 @@ from schemas.auth_session import (
 from utils.jwt import (
     create_access_token, 
     create_refresh_token, 
-    hash_refresh_token,
+    refresh_token_fields,
+    split_refresh_token,
     verify_refresh_token,
+    verify_refresh_token_async,
     ACCESS_TOKEN_TTL_MIN,
     REFRESH_TOKEN_TTL_DAYS,
     SESSION_IDLE_TIMEOUT_MIN
 )
-from utils.security import verify_password, hash_password
+from utils.security import verify_password_async, hash_password_async
 from utils.csrf import get_csrf_token, set_csrf_cookie
+from cache_manager import invalidate_admin_user_list, negative_cache, USER_NS
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -40,6 +43,9 @@ router = APIRouter()
 # Security scheme for Bearer token (for logout validation)
 security = HTTPBearer(auto_error=False)
 
+# Sessions without a selector (bcrypt-hashed legacy tokens) checked per lookup
+LEGACY_SESSION_SCAN_LIMIT = 100
+
 
 @router.get("/csrf")
 async def get_csrf_token_endpoint(response: Response):
@@ -69,6 +75,53 @@ def get_client_info(request: Request) -> tuple[str, str]:
     return user_agent, ip_address
 
 
+def set_refresh_cookie(response: Response, refresh_token: str):
+    """Store the refresh token in a secure HTTP-only cookie"""
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        max_age=REFRESH_TOKEN_TTL_DAYS * 24 * 60 * 60,  # Convert days to seconds
+        httponly=True,
+        secure=False,  # Set to True in production with HTTPS
+        samesite="lax",  # Use 'strict' in production if no cross-site issues
+        path="/api/auth"
+    )
+
+
+async def find_active_session(db: Session, refresh_token: str) -> Optional[UserSession]:
+    """
+    Find the active session a refresh token belongs to
+
+    Split tokens cost one indexed lookup by selector and one constant-time
+    digest compare, however many sessions exist. Legacy single-part tokens
+    fall back to a bcrypt scan over the sessions that have no selector yet,
+    run in the hash executor's process pool.
+    """
+    active = and_(
+        UserSession.revoked_at.is_(None),
+        UserSession.expires_at > datetime.utcnow()
+    )
+    parts = split_refresh_token(refresh_token)
+    if parts is not None:
+        session = db.query(UserSession).filter(
+            UserSession.refresh_token_selector == parts[0],
+            active
+        ).first()
+        if session and verify_refresh_token(refresh_token, session.refresh_token_hash):
+            return session
+        return None
+
+    legacy_sessions = db.query(UserSession).filter(
+        UserSession.refresh_token_selector.is_(None),
+        active
+    ).limit(LEGACY_SESSION_SCAN_LIMIT).all()
+    logger.debug(f"Searching through {len(legacy_sessions)} legacy sessions for refresh token")
+    for session in legacy_sessions:
+        if await verify_refresh_token_async(refresh_token, session.refresh_token_hash):
+            return session
+    return None
+
+
 def cleanup_expired_sessions(db: Session):
     """Clean up expired and revoked sessions"""
     try:
@@ -121,7 +174,7 @@ async def signup(
         new_user = User(
             name=request.name,
             email=request.email,
-            password_hash=hash_password(request.password),
+            password_hash=await hash_password_async(request.password),
             is_active=True,
             role=UserRole.support_staff  # Default role for new users
         )
@@ -129,6 +182,8 @@ async def signup(
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        negative_cache.forget(USER_NS, new_user.id)
+        invalidate_admin_user_list()
         
         # Get client information
         user_agent, ip_address = get_client_info(http_request)
@@ -136,12 +191,12 @@ async def signup(
         # Create access token
         access_token = create_access_token(
             user_id=new_user.id,
-            is_admin=new_user.is_admin
+            is_admin=new_user.is_admin,
+            auth_version=new_user.auth_version
         )
         
         # Create refresh token
         refresh_token = create_refresh_token()
-        refresh_token_hash = hash_refresh_token(refresh_token)
         
         # Calculate expiration times
         now = datetime.utcnow()
@@ -150,7 +205,7 @@ async def signup(
         # Create session record
         session = UserSession(
             user_id=new_user.id,
-            refresh_token_hash=refresh_token_hash,
+            **refresh_token_fields(refresh_token),
             user_agent=user_agent,
             ip_address=ip_address,
             last_used_at=now,
@@ -161,15 +216,7 @@ async def signup(
         db.commit()
         
         # Set secure HTTP-only cookie
-        response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            max_age=REFRESH_TOKEN_TTL_DAYS * 24 * 60 * 60,  # Convert days to seconds
-            httponly=True,
-            secure=False,  # Set to True in production with HTTPS
-            samesite="lax",  # Use 'strict' in production if no cross-site issues
-            path="/api/auth"
-        )
+        set_refresh_cookie(response, refresh_token)
         
         # Log successful signup
         logger.info(
@@ -218,7 +265,7 @@ async def login(
             )
         ).first()
         
-        if not user or not verify_password(request.password, user.password_hash):
+        if not user or not await verify_password_async(request.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="ایمیل یا رمز عبور اشتباه است"
@@ -246,12 +293,12 @@ async def login(
         # Create access token
         access_token = create_access_token(
             user_id=user.id,
-            is_admin=user.is_admin
+            is_admin=user.is_admin,
+            auth_version=user.auth_version
         )
         
         # Create refresh token
         refresh_token = create_refresh_token()
-        refresh_token_hash = hash_refresh_token(refresh_token)
         
         # Calculate expiration times
         now = datetime.utcnow()
@@ -260,7 +307,7 @@ async def login(
         # Create session record
         session = UserSession(
             user_id=user.id,
-            refresh_token_hash=refresh_token_hash,
+            **refresh_token_fields(refresh_token),
             user_agent=user_agent,
             ip_address=ip_address,
             last_used_at=now,
@@ -271,15 +318,7 @@ async def login(
         db.commit()
         
         # Set secure HTTP-only cookie
-        response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            max_age=REFRESH_TOKEN_TTL_DAYS * 24 * 60 * 60,  # Convert days to seconds
-            httponly=True,
-            secure=False,  # Set to True in production with HTTPS
-            samesite="lax",  # Use 'strict' in production if no cross-site issues
-            path="/api/auth"
-        )
+        set_refresh_cookie(response, refresh_token)
         
         # Log successful login
         logger.info(
@@ -327,29 +366,11 @@ async def refresh_token(
                 detail="توکن تازه‌سازی یافت نشد"
             )
         
-        # Find active session by refresh token hash
-        # We'll use a more efficient approach by limiting the search scope
-        sessions = db.query(UserSession).filter(
-            and_(
-                UserSession.revoked_at.is_(None),
-                UserSession.expires_at > datetime.utcnow()
-            )
-        ).limit(100).all()  # Limit to prevent excessive memory usage
-        
-        logger.debug(f"Searching through {len(sessions)} active sessions for refresh token")
-        
-        matching_session = None
-        for session in sessions:
-            if verify_refresh_token(refresh_token, session.refresh_token_hash):
-                matching_session = session
-                logger.debug(f"Found matching session for user {session.user_id}")
-                break
+        # Find active session by refresh token selector
+        matching_session = await find_active_session(db, refresh_token)
         
         if not matching_session:
-            logger.warning(f"Refresh token not found in {len(sessions)} active sessions")
-            # Log some session details for debugging
-            if sessions:
-                logger.debug(f"Active sessions: {[(s.user_id, s.last_used_at) for s in sessions[:5]]}")
+            logger.warning("Refresh token does not match an active session")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="توکن تازه‌سازی نامعتبر است"
@@ -387,7 +408,8 @@ async def refresh_token(
         # Create new access token
         access_token = create_access_token(
             user_id=user.id,
-            is_admin=user.is_admin
+            is_admin=user.is_admin,
+            auth_version=user.auth_version
         )
         
         # Update session timestamp (don't rotate refresh token to avoid cookie issues)
@@ -404,6 +426,13 @@ async def refresh_token(
             
             # Update session timestamp only (keep same refresh token)
             matching_session.last_used_at = now
+            
+            # Legacy bcrypt sessions move to a split token on their next use
+            migrated_refresh_token = None
+            if matching_session.refresh_token_selector is None:
+                migrated_refresh_token = create_refresh_token()
+                for field, value in refresh_token_fields(migrated_refresh_token).items():
+                    setattr(matching_session, field, value)
             db.commit()
             
         except Exception as e:
@@ -414,6 +443,9 @@ async def refresh_token(
                 detail="خطا در به‌روزرسانی جلسه"
             )
         
+        if migrated_refresh_token:
+            set_refresh_cookie(response, migrated_refresh_token)
+        
         # Log token refresh
         logger.info(
             f"Access token refreshed for user {user.id} ({user.email})"
@@ -447,18 +479,10 @@ async def logout(
         if refresh_token:
             # Find and revoke session
             try:
-                sessions = db.query(UserSession).filter(
-                    and_(
-                        UserSession.revoked_at.is_(None),
-                        UserSession.expires_at > datetime.utcnow()
-                    )
-                ).limit(100).all()
-                
-                for session in sessions:
-                    if verify_refresh_token(refresh_token, session.refresh_token_hash):
-                        session.revoked_at = datetime.utcnow()
-                        logger.debug(f"Revoked session for user {session.user_id}")
-                        break
+                session = await find_active_session(db, refresh_token)
+                if session:
+                    session.revoked_at = datetime.utcnow()
+                    logger.debug(f"Revoked session for user {session.user_id}")
                         
             except Exception as e:
                 logger.error(f"Error during logout session lookup: {str(e)}")
@@ -6,7 +6,7 @@ from models.automation import Automation
 from models.user_automation import UserAutomation
 from schemas.automation import UsageConsumeRequest, UsageConsumeResponse
 from utils.auth_dependency import get_db
-from utils.service_tokens import verify_token
+from utils.service_tokens import verify_service_token
 from services.token_manager import deduct_tokens
 import logging
 
@@ -40,7 +40,7 @@ def consume_usage(
         logger.error(f"No service token hash for automation {automation.id}")
         raise HTTPException(status_code=401, detail="دسترسی غیرمجاز: توکن سرویس نامعتبر است.")
     
-    if not verify_token(x_zimmer_service_token, automation.service_token_hash):
+    if not verify_service_token(automation.id, x_zimmer_service_token, automation.service_token_hash):
         logger.warning(f"Invalid service token for automation {automation.id}")
         raise HTTPException(status_code=401, detail="دسترسی غیرمجاز: توکن سرویس نامعتبر است.")
     
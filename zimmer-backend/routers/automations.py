@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Request
 from sqlalchemy.orm import Session
 import httpx
 import os
@@ -8,7 +8,10 @@ from models.user_automation import UserAutomation
 from models.user import User
 from schemas.automation import ProvisionRequest, ProvisionResponse
 from utils.auth_dependency import get_current_user, get_db
-from utils.service_tokens import verify_token
+from utils.service_tokens import verify_service_token_async
+from services.marketplace import get_marketplace_data
+from utils.http_cache import json_response, PUBLIC_SHORT
+from cache_manager import invalidate_user_cache
 from datetime import datetime
 import logging
 
@@ -22,32 +25,9 @@ def list_automations(db: Session = Depends(get_db)):
     return {"automations": automations}
 
 @router.get("/automations/marketplace")
-def get_marketplace_automations(db: Session = Depends(get_db)):
+async def get_marketplace_automations(request: Request):
     """Get automations available in the marketplace"""
-    automations = db.query(Automation).filter(
-        Automation.status == True,
-        Automation.is_listed == True,
-        Automation.health_status == "healthy"
-    ).all()
-    
-    marketplace_data = []
-    for automation in automations:
-        marketplace_data.append({
-            "id": automation.id,
-            "name": automation.name,
-            "description": automation.description,
-            "pricing_type": automation.pricing_type,
-            "price_per_token": automation.price_per_token,
-            "health_status": automation.health_status,
-            "last_health_at": automation.last_health_at,
-            "created_at": automation.created_at
-        })
-    
-    return {
-        "automations": marketplace_data,
-        "total": len(marketplace_data),
-        "message": "Available automations in marketplace"
-    }
+    return json_response(request, await get_marketplace_data(), PUBLIC_SHORT)
 
 @router.post("/automations/{automation_id}/provision", response_model=ProvisionResponse)
 async def provision_automation(
@@ -77,7 +57,7 @@ async def provision_automation(
         logger.error(f"No service token found for automation {automation_id}")
         raise HTTPException(status_code=500, detail="خطا در پیکربندی سرویس")
     
-    if not verify_token(service_token, automation.service_token_hash):
+    if not await verify_service_token_async(automation_id, service_token, automation.service_token_hash):
         logger.error(f"Invalid service token for automation {automation_id}")
         raise HTTPException(status_code=500, detail="خطا در احراز هویت سرویس")
     
@@ -105,6 +85,7 @@ async def provision_automation(
                 user_automation.provisioned_at = datetime.utcnow()
                 user_automation.integration_status = "active"
                 db.commit()
+                invalidate_user_cache(current_user.id)
                 
                 return ProvisionResponse(
                     success=True,
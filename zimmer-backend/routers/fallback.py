@@ -2,32 +2,28 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import SessionLocal
+from database import get_db
 from models.user import User
 from models.fallback_log import FallbackLog
 from models.user_automation import UserAutomation
 from models.automation import Automation
 from schemas.fallback import FallbacksResponse
 from utils.auth import require_admin
+from utils.pagination import Keyset, PageParams, paginate
 
 router = APIRouter()
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+FALLBACKS_KEYSET = Keyset(FallbackLog.created_at.desc(), FallbackLog.id.desc())
 
 @router.get("/fallbacks", response_model=FallbacksResponse)
 async def get_fallbacks(
     client_id: Optional[int] = Query(None, description="Filter by client ID"),
+    page: PageParams = Depends(),
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
-    Get fallback logs with optional client filtering (admin only)
+    Get fallback logs with optional client filtering (admin only), newest first, keyset paginated
     """
     try:
         # Build base query with joins
@@ -47,17 +43,12 @@ async def get_fallbacks(
         if client_id is not None:
             query = query.filter(User.id == client_id)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get fallbacks ordered by newest first
-        fallback_records = query.order_by(
-            FallbackLog.created_at.desc()
-        ).all()
+        # Get one page of fallbacks and the total
+        result_page = paginate(query, FALLBACKS_KEYSET, page)
         
         # Format response
         formatted_fallbacks = []
-        for record, client_name, automation_name in fallback_records:
+        for record, client_name, automation_name in result_page.items:
             formatted_fallbacks.append({
                 "id": record.id,
                 "client_name": client_name,
@@ -69,8 +60,10 @@ async def get_fallbacks(
             })
         
         return FallbacksResponse(
-            total_count=total_count,
-            fallbacks=formatted_fallbacks
+            total_count=result_page.total,
+            fallbacks=formatted_fallbacks,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
     except HTTPException:
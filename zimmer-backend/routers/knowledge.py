@@ -2,21 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import SessionLocal
+from database import get_db
 from models.user import User
 from models.knowledge import KnowledgeEntry
 from schemas.knowledge import KnowledgeCreate, KnowledgeOut, KnowledgeListResponse
 from utils.auth import require_admin
+from utils.pagination import Keyset, PageParams, paginate
 
 router = APIRouter()
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+KNOWLEDGE_KEYSET = Keyset(KnowledgeEntry.created_at.desc(), KnowledgeEntry.id.desc())
 
 @router.post("/admin/knowledge", response_model=KnowledgeOut)
 async def create_knowledge_entry(
@@ -86,11 +81,12 @@ async def create_knowledge_entry(
 async def get_knowledge_entries(
     client_id: Optional[int] = Query(None, description="Filter by client ID"),
     category: Optional[str] = Query(None, description="Filter by category"),
+    page: PageParams = Depends(),
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
-    Get knowledge base entries with optional filtering (admin only)
+    Get knowledge base entries with optional filtering (admin only), newest first, keyset paginated
     """
     try:
         # Build base query with user join
@@ -108,17 +104,12 @@ async def get_knowledge_entries(
         if category is not None:
             query = query.filter(KnowledgeEntry.category == category)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get entries ordered by newest first
-        knowledge_records = query.order_by(
-            KnowledgeEntry.created_at.desc()
-        ).all()
+        # Get one page of entries and the total
+        result_page = paginate(query, KNOWLEDGE_KEYSET, page)
         
         # Format response
         formatted_entries = []
-        for record, client_name in knowledge_records:
+        for record, client_name in result_page.items:
             formatted_entries.append({
                 "id": record.id,
                 "category": record.category,
@@ -128,8 +119,10 @@ async def get_knowledge_entries(
             })
         
         return KnowledgeListResponse(
-            total_count=total_count,
-            knowledge_entries=formatted_entries
+            total_count=result_page.total,
+            knowledge_entries=formatted_entries,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
     except HTTPException:
@@ -143,10 +136,11 @@ async def get_knowledge_entries(
 @router.get("/knowledge", response_model=KnowledgeListResponse)
 async def get_public_knowledge_entries(
     category: Optional[str] = Query(None, description="Filter by category"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db)
 ):
     """
-    Get public knowledge base entries (no authentication required)
+    Get public knowledge base entries (no authentication required), newest first, keyset paginated
     """
     try:
         # Build base query with user join
@@ -161,17 +155,12 @@ async def get_public_knowledge_entries(
         if category is not None:
             query = query.filter(KnowledgeEntry.category == category)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get entries ordered by newest first
-        knowledge_records = query.order_by(
-            KnowledgeEntry.created_at.desc()
-        ).all()
+        # Get one page of entries and the total
+        result_page = paginate(query, KNOWLEDGE_KEYSET, page)
         
         # Format response
         formatted_entries = []
-        for record, client_name in knowledge_records:
+        for record, client_name in result_page.items:
             formatted_entries.append({
                 "id": record.id,
                 "category": record.category,
@@ -181,10 +170,14 @@ async def get_public_knowledge_entries(
             })
         
         return KnowledgeListResponse(
-            total_count=total_count,
-            knowledge_entries=formatted_entries
+            total_count=result_page.total,
+            knowledge_entries=formatted_entries,
+            next_cursor=result_page.next_cursor,
+            total_is_estimate=result_page.total_is_estimate
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
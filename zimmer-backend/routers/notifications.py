@@ -1,29 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from schemas.notification import NotificationOut, MarkReadIn
 from models.notification import Notification
 from utils.auth_dependency import get_current_user
-from database import get_db
+from utils.auth import get_current_user_async
+from database import get_db, get_async_db
+from cache_manager import notifications_tag, invalidate_notifications, NOTIFICATIONS_TAG
+from utils.http_cache import versioned_etag, etag_matches, not_modified, json_response, PRIVATE_REVALIDATE
+from utils.pagination import Keyset
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
+# Unread first, then newest; served by idx_notifications_user_read_created
+NOTIFICATIONS_KEYSET = Keyset(Notification.is_read.asc(), Notification.created_at.desc(), Notification.id.desc())
+
 @router.get("", response_model=List[NotificationOut])
-def list_notifications(
+async def list_notifications(
+    request: Request,
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    offset: int = Query(0, ge=0, description="OFFSET based paging; use cursor instead", deprecated=True),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
-    q = (
-        db.query(Notification)
-        .filter(Notification.user_id == current_user.id)
-        .order_by(Notification.is_read.asc(), Notification.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+    # Answer repeat polls from the version token, before touching the table
+    etag = versioned_etag(request, notifications_tag(current_user.id), NOTIFICATIONS_TAG)
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    
+    q = NOTIFICATIONS_KEYSET.apply(
+        select(Notification).where(Notification.user_id == current_user.id), cursor, limit
     )
-    return q.all()
+    if cursor is None and offset:
+        q = q.offset(offset)
+    result = await db.execute(q)
+    page = NOTIFICATIONS_KEYSET.page(result.scalars().all(), limit)
+    items = [NotificationOut.from_orm(n) for n in page.items]
+    response = json_response(request, items, PRIVATE_REVALIDATE, etag=etag)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
 
 @router.post("/mark-read")
 def mark_read(
@@ -45,6 +65,7 @@ def mark_read(
         )
     )
     db.commit()
+    invalidate_notifications(current_user.id)
     return {"updated": rows}
 
 @router.post("/mark-all-read")
@@ -64,6 +85,7 @@ def mark_all_read(
         )
     )
     db.commit()
+    invalidate_notifications(current_user.id)
     return {"updated": rows}
 
 # (Optional) Admin-only create endpoint — only if your admin auth is ready:
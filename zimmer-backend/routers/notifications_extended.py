@@ -15,6 +15,7 @@ from database import get_db
 from models.user import User
 from models.notification import Notification
 from utils.auth import get_current_user
+from cache_manager import invalidate_notifications
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications-extended"])
 
@@ -160,6 +161,7 @@ async def mark_notification_read(
         if notification.read_at is None:
             notification.read_at = datetime.utcnow()
             db.commit()
+            invalidate_notifications(current_user.id)
         
         return {
             "message": "Notification marked as read",
@@ -190,6 +192,7 @@ async def mark_all_notifications_read(
         })
         
         db.commit()
+        invalidate_notifications(current_user.id)
         
         return {
             "message": f"Marked {updated_count} notifications as read",
@@ -224,6 +227,7 @@ async def delete_notification(
         
         db.delete(notification)
         db.commit()
+        invalidate_notifications(current_user.id)
         
         return {
             "message": "Notification deleted successfully",
@@ -7,7 +7,7 @@ from models.user import User
 from models.password_reset_token import PasswordResetToken
 from schemas.password_reset import ForgotPasswordRequest, ForgotPasswordResponse, ResetPasswordRequest, ResetPasswordResponse
 from services.email_service import email_service
-import bcrypt
+from utils.security import hash_password_async
 
 router = APIRouter()
 
@@ -112,11 +112,7 @@ async def reset_password(
             )
         
         # Hash new password
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(request.new_password.encode('utf-8'), salt)
-        
-        # Update user password
-        user.password_hash = hashed_password.decode('utf-8')
+        user.password_hash = await hash_password_async(request.new_password)
         
         # Delete all reset tokens for this user
         db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user.id).delete()
@@ -16,6 +16,7 @@ from models.payment import Payment
 from models.automation import Automation
 from utils.auth import get_current_user
 from schemas.payment import CreatePaymentRequest, VerifyPaymentRequest, PaymentResponse
+from cache_manager import invalidate_user_cache, invalidate_admin_stats
 
 router = APIRouter(prefix="/api/payments", tags=["payments"])
 
@@ -148,6 +149,8 @@ async def verify_payment(
                 db.add(user_automation)
             
             db.commit()
+            invalidate_user_cache(current_user.id)
+            invalidate_admin_stats()
             
             return {
                 "payment_id": payment.id,
@@ -23,6 +23,7 @@ from schemas.payment_zp import (
 )
 from services.pricing import compute_amount_rial, validate_token_range
 from utils.zarinpal import ZarinpalClient, PaymentMode
+from cache_manager import invalidate_user_cache, invalidate_admin_stats
 import os
 from dotenv import load_dotenv
 
@@ -279,6 +280,8 @@ async def payment_callback(
             )
             
             db.commit()
+            invalidate_user_cache(payment.user_id)
+            invalidate_admin_stats()
             
             logger.info(
                 f"Payment {payment_id} succeeded: ref_id={verification_result['ref_id']}, "
@@ -4,6 +4,7 @@ Handles support tickets and customer service
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
@@ -52,12 +53,26 @@ async def get_support_tickets(
         # Get tickets with pagination
         tickets = query.order_by(Ticket.created_at.desc()).offset(offset).limit(limit).all()
         
+        # Latest message of every ticket on the page in one query
+        latest_messages = {}
+        if tickets:
+            ranked = db.query(
+                TicketMessage.id,
+                func.row_number().over(
+                    partition_by=TicketMessage.ticket_id,
+                    order_by=(TicketMessage.created_at.desc(), TicketMessage.id.desc())
+                ).label("position")
+            ).filter(TicketMessage.ticket_id.in_([t.id for t in tickets])).subquery()
+            latest_messages = {
+                message.ticket_id: message
+                for message in db.query(TicketMessage).join(
+                    ranked, TicketMessage.id == ranked.c.id
+                ).filter(ranked.c.position == 1)
+            }
+        
         ticket_list = []
         for ticket in tickets:
-            # Get latest message
-            latest_message = db.query(TicketMessage).filter(
-                TicketMessage.ticket_id == ticket.id
-            ).order_by(TicketMessage.created_at.desc()).first()
+            latest_message = latest_messages.get(ticket.id)
             
             ticket_list.append({
                 "id": ticket.id,
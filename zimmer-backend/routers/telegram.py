@@ -1,32 +1,46 @@
 from fastapi import APIRouter, Request, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import SessionLocal, get_async_db
 from models.user_automation import UserAutomation
 from models.user import User
 from models.fallback_log import FallbackLog
 from services.gpt import search_knowledge_base, generate_gpt_response
-from services.token_manager import deduct_tokens
+from services.token_manager import deduct_tokens_async
+from cache_manager import negative_cache, BOT_TOKEN_NS
+from write_behind import write_behind
 import requests
 
 router = APIRouter()
 
-def get_db():
+def _find_answer(message_text: str, client_id: int, category: str):
+    """Knowledge base first, then GPT; blocking, so run it in the threadpool"""
     db = SessionLocal()
     try:
-        yield db
+        answer = search_knowledge_base(db, client_id, category)
+        if not answer:
+            answer = generate_gpt_response(db, message_text, client_id, category)
+        return answer
     finally:
         db.close()
 
+async def _find_bot(db: AsyncSession, bot_token: str):
+    result = await db.execute(select(UserAutomation).where(UserAutomation.telegram_bot_token == bot_token))
+    return result.scalars().first()
+
 @router.post("/webhook/telegram/{bot_token}")
-async def telegram_webhook(bot_token: str, request: Request, db: Session = Depends(get_db)):
+async def telegram_webhook(bot_token: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 1. Match bot_token to UserAutomation
-        ua = db.query(UserAutomation).filter(UserAutomation.telegram_bot_token == bot_token).first()
+        # Unknown bots are remembered briefly so Telegram's retries skip the DB
+        ua = await negative_cache.lookup_async(BOT_TOKEN_NS, bot_token, lambda: _find_bot(db, bot_token))
         if not ua:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot token not recognized")
 
         # 2. Get client_id from related User
-        user = db.query(User).filter(User.id == ua.user_id).first()
+        user = await db.get(User, ua.user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found for automation")
         client_id = user.id
@@ -41,36 +55,31 @@ async def telegram_webhook(bot_token: str, request: Request, db: Session = Depen
         except (KeyError, TypeError):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Telegram payload")
 
-        # 4. Call search_knowledge_base()
+        # 4-5. Knowledge base, then GPT if nothing found
         category = "faq"  # You may want to extract/guess category from message or automation context
-        kb_answer = search_knowledge_base(db, client_id, category)
-
-        # 5. If not found → call generate_gpt_response()
-        response_text = kb_answer
-        if not response_text:
-            response_text = generate_gpt_response(db, message_text, client_id, category)
+        response_text = await run_in_threadpool(_find_answer, message_text, client_id, category)
 
         # 6. If GPT returns None → log to FallbackLog
         if not response_text:
-            fallback = FallbackLog(
+            write_behind.add(db, FallbackLog, dict(
                 user_automation_id=ua.id,
                 message=message_text,
                 error_type="no_answer"
-            )
-            db.add(fallback)
-            db.commit()
+            ))
+            await db.commit()
             # Reply to user: fallback message
             reply_text = "Sorry, I couldn't answer your question. Our team will follow up soon."
-            send_telegram_message(bot_token, chat_id, reply_text)
+            await run_in_threadpool(send_telegram_message, bot_token, chat_id, reply_text)
             return {"status": "fallback", "detail": "No answer found, fallback logged."}
 
         # 7. If response found: Deduct 1 token, send reply
-        if deduct_tokens(db, ua.id, 1):
-            send_telegram_message(bot_token, chat_id, response_text)
+        deduction = await deduct_tokens_async(db, ua.id, 1)
+        if deduction["success"]:
+            await run_in_threadpool(send_telegram_message, bot_token, chat_id, response_text)
             return {"status": "ok", "detail": "Response sent and token deducted."}
         else:
             # 8. If not enough tokens → reply: "Please top up"
-            send_telegram_message(bot_token, chat_id, "You have run out of tokens. Please top up to continue using the service.")
+            await run_in_threadpool(send_telegram_message, bot_token, chat_id, "You have run out of tokens. Please top up to continue using the service.")
             return {"status": "no_tokens", "detail": "Not enough tokens."}
             
     except HTTPException:
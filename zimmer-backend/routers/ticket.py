@@ -7,7 +7,7 @@ import os
 import shutil
 from pathlib import Path as PathLib
 
-from database import SessionLocal
+from database import get_db
 from models.user import User
 from models.ticket import Ticket, TicketStatus
 from schemas.ticket import TicketCreate, TicketUpdate, TicketOut, TicketListResponse
@@ -23,14 +23,6 @@ ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx", ".txt", ".jpg", ".jpeg", ".png",
 # Ensure upload directory exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def save_uploaded_file(file: UploadFile) -> Optional[str]:
     """Save uploaded file and return the file path"""
     if not file:
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
 from sqlalchemy.orm import Session
 from database import get_db
-from utils.auth_dependency import get_current_user
+from utils.auth_dependency import get_current_user, get_current_user_record
 from schemas.twofa import TwoFAInitiateOut, TwoFAActivateIn, TwoFAStatusOut, TwoFAVerifyIn, RecoveryCodesOut
 from services.twofa import generate_secret, make_otpauth_uri, verify_code, generate_recovery_codes, store_recovery_codes, consume_recovery_code, now_utc
-from utils.jwt import create_access_token, create_refresh_token, hash_refresh_token, JWT_SECRET_KEY
+from utils.jwt import create_access_token, create_refresh_token, refresh_token_fields, JWT_SECRET_KEY
 from models.user import User
 from models.session import Session as UserSession
 from models.twofa import TwoFactorRecoveryCode
@@ -27,7 +27,7 @@ def status(user=Depends(get_current_user)):
     return TwoFAStatusOut(enabled=bool(user.twofa_enabled))
 
 @router.post("/initiate", response_model=TwoFAInitiateOut)
-def initiate(user=Depends(get_current_user), db: Session = Depends(get_db)):
+def initiate(user=Depends(get_current_user_record), db: Session = Depends(get_db)):
     if user.twofa_enabled:
         raise HTTPException(status_code=400, detail="already_enabled")
     secret = generate_secret()
@@ -36,7 +36,7 @@ def initiate(user=Depends(get_current_user), db: Session = Depends(get_db)):
     return TwoFAInitiateOut(otpauth_uri=make_otpauth_uri(secret, user.email, issuer="Zimmer"))
 
 @router.post("/activate")
-def activate(payload: TwoFAActivateIn, user=Depends(get_current_user), db: Session = Depends(get_db)):
+def activate(payload: TwoFAActivateIn, user=Depends(get_current_user_record), db: Session = Depends(get_db)):
     if not user.twofa_secret:
         raise HTTPException(status_code=400, detail="initiate_first")
     if not verify_code(user.twofa_secret, payload.otp_code):
@@ -48,7 +48,7 @@ def activate(payload: TwoFAActivateIn, user=Depends(get_current_user), db: Sessi
     return {"ok": True, "recovery_codes": codes}
 
 @router.post("/disable")
-def disable(user=Depends(get_current_user), db: Session = Depends(get_db)):
+def disable(user=Depends(get_current_user_record), db: Session = Depends(get_db)):
     user.twofa_enabled = False
     user.twofa_secret = None
     db.query(TwoFactorRecoveryCode).filter_by(user_id=user.id).delete()
@@ -56,7 +56,7 @@ def disable(user=Depends(get_current_user), db: Session = Depends(get_db)):
     return {"ok": True}
 
 @router.post("/recovery-codes/regenerate", response_model=RecoveryCodesOut)
-def regenerate(user=Depends(get_current_user), db: Session = Depends(get_db)):
+def regenerate(user=Depends(get_current_user_record), db: Session = Depends(get_db)):
     db.query(TwoFactorRecoveryCode).filter_by(user_id=user.id).delete()
     codes = generate_recovery_codes()
     store_recovery_codes(db, user.id, codes, TwoFactorRecoveryCode)
@@ -84,11 +84,11 @@ def verify(payload: TwoFAVerifyIn, request: Request, response: Response, db: Ses
     if not ok:
         raise HTTPException(status_code=400, detail="invalid_otp")
 
-    access = create_access_token(user.id, user.is_admin)
+    access = create_access_token(user.id, user.is_admin, auth_version=user.auth_version)
     refresh = create_refresh_token()
     sess = UserSession(
         user_id=user.id,
-        refresh_token_hash=hash_refresh_token(refresh),
+        **refresh_token_fields(refresh),
         user_agent=request.headers.get("user-agent"),
         ip_address=request.client.host if request.client else None,
         expires_at=now_utc() + datetime.timedelta(days=7),
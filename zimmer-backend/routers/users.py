@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
-from database import SessionLocal
+from database import get_db
 from models.user import User
 from models.payment import Payment
 from models.token_usage import TokenUsage
@@ -11,21 +11,16 @@ from models.user_automation import UserAutomation
 from models.automation import Automation
 from schemas.user import UserSignupRequest, UserSignupResponse, UserLoginRequest, UserLoginResponse, UserResponse, UserUpdateRequest, UserDashboardResponse, UserAutomationCreate, UserAutomationUpdate, UserAutomationResponse, UserSettingsResponse
 from schemas.admin import TokenUsageResponse, PaymentResponse
-from utils.security import hash_password, verify_password
+from utils.security import hash_password_async, verify_password_async
 from utils.jwt import create_jwt_token
-from utils.auth_dependency import get_current_user
-from cache_manager import cache as cache_manager
+from utils.auth_dependency import get_current_user, get_current_user_record
+from cache_manager import cache as cache_manager, invalidated_ttl, user_tag, automation_tag, invalidate_user_cache, MARKETPLACE_TAG
+from cache_manager import negative_cache, BOT_TOKEN_NS
+from services.reference_data import get_automation_row
+from utils.http_cache import versioned_etag, etag_matches, not_modified, json_response, PRIVATE_REVALIDATE
 
 router = APIRouter()
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Signup endpoint removed - only managers can create users via /api/admin/users
 
 @router.post("/login", response_model=UserLoginResponse)
@@ -46,7 +41,7 @@ async def login_user(
             )
         
         # Verify password
-        if not verify_password(login_data.password, user.password_hash):
+        if not await verify_password_async(login_data.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -103,8 +98,8 @@ async def get_current_user_info(
     try:
         user_data = UserResponse.from_orm(current_user)
         
-        # Cache the result for 5 minutes
-        cache_manager.set(cache_key, user_data.dict(), ttl=300)
+        # Cache until the profile changes
+        cache_manager.set(cache_key, user_data.dict(), ttl=invalidated_ttl(3600, 300), tags=[user_tag(current_user.id)])
         
         return user_data
     except Exception as e:
@@ -211,6 +206,7 @@ async def update_user_profile(
         
         db.commit()
         db.refresh(user)
+        invalidate_user_cache(user.id)
         
         return user
         
@@ -224,7 +220,7 @@ async def update_user_profile(
 @router.post("/user/change-password")
 async def change_password(
     request: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """Change user password"""
@@ -239,14 +235,14 @@ async def change_password(
             )
         
         # Verify current password
-        if not verify_password(current_password, current_user.password_hash):
+        if not await verify_password_async(current_password, current_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="رمز عبور فعلی اشتباه است"
             )
         
         # Hash new password
-        current_user.password_hash = hash_password(new_password)
+        current_user.password_hash = await hash_password_async(new_password)
         db.commit()
         
         return {"message": "رمز عبور با موفقیت تغییر یافت"}
@@ -263,7 +259,7 @@ async def change_password(
 @router.post("/user/password")
 async def change_user_password(
     request: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """Change user password with current password or email verification"""
@@ -294,7 +290,7 @@ async def change_user_password(
         # Check verification method
         if current_password:
             # Method 1: Current password verification
-            if not verify_password(current_password, current_user.password_hash):
+            if not await verify_password_async(current_password, current_user.password_hash):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="رمز عبور فعلی اشتباه است"
@@ -326,7 +322,7 @@ async def change_user_password(
             )
         
         # Hash new password
-        current_user.password_hash = hash_password(new_password)
+        current_user.password_hash = await hash_password_async(new_password)
         db.commit()
         
         return {"message": "رمز عبور با موفقیت تغییر یافت"}
@@ -450,6 +446,9 @@ async def create_user_automation(
         db.add(new_user_automation)
         db.commit()
         db.refresh(new_user_automation)
+        invalidate_user_cache(current_user.id)
+        if new_user_automation.telegram_bot_token:
+            negative_cache.forget(BOT_TOKEN_NS, new_user_automation.telegram_bot_token)
         
         # Return response with automation name
         return UserAutomationResponse(
@@ -531,6 +530,9 @@ async def update_user_automation(
         
         db.commit()
         db.refresh(user_automation)
+        invalidate_user_cache(current_user.id)
+        if user_automation.telegram_bot_token:
+            negative_cache.forget(BOT_TOKEN_NS, user_automation.telegram_bot_token)
         
         # Get automation name for response
         automation = db.query(Automation).filter(Automation.id == user_automation.automation_id).first()
@@ -621,6 +623,7 @@ async def get_user_automations(
 
 @router.get("/user/dashboard", response_model=UserDashboardResponse)
 async def get_user_dashboard(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -632,7 +635,7 @@ async def get_user_dashboard(
     cached_data = cache_manager.get(cache_key)
     
     if cached_data:
-        return cached_data
+        return json_response(request, cached_data, PRIVATE_REVALIDATE)
     
     try:
         # Get user's automations with automation details
@@ -681,10 +684,12 @@ async def get_user_dashboard(
             has_expired_demo=has_expired_demo
         )
         
-        # Cache the result for 2 minutes
-        cache_manager.set(cache_key, dashboard_data.dict(), ttl=120)
+        # Cache until a balance, automation or profile change invalidates it
+        tags = [user_tag(current_user.id)] + [automation_tag(a["automation_id"]) for a in automations]
+        payload = dashboard_data.dict()
+        cache_manager.set(cache_key, payload, ttl=invalidated_ttl(3600, 120), tags=tags)
         
-        return dashboard_data
+        return json_response(request, payload, PRIVATE_REVALIDATE)
         
     except Exception as e:
         raise HTTPException(
@@ -731,7 +736,7 @@ async def get_available_automations(
             detail=f"Failed to retrieve available automations: {str(e)}"
         )
 
-@router.get("/automations/{automation_id}")
+@router.get("/automations/{automation_id:int}")
 async def get_automation_details(
     automation_id: int = Path(..., description="Automation ID"),
     current_user: User = Depends(get_current_user),
@@ -742,7 +747,7 @@ async def get_automation_details(
     """
     try:
         # Get the automation
-        automation = db.query(Automation).filter(Automation.id == automation_id).first()
+        automation = get_automation_row(db, automation_id)
         
         if not automation:
             raise HTTPException(
@@ -757,18 +762,7 @@ async def get_automation_details(
         ).first()
         
         # Format response
-        automation_details = {
-            "id": automation.id,
-            "name": automation.name,
-            "description": automation.description,
-            "pricing_type": automation.pricing_type,
-            "price_per_token": automation.price_per_token,
-            "status": automation.status,
-            "is_listed": automation.is_listed,
-            "health_status": automation.health_status,
-            "created_at": automation.created_at,
-            "user_has_automation": existing_automation is not None
-        }
+        automation_details = dict(automation, user_has_automation=existing_automation is not None)
         
         return automation_details
         
@@ -826,12 +820,18 @@ async def get_user_usage_distribution(
 
 @router.get("/user/automations/active")
 async def get_user_active_automations(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get user's active automations
     """
+    # Balances and automation edits rotate these versions
+    etag = versioned_etag(request, user_tag(current_user.id), MARKETPLACE_TAG)
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    
     try:
         # Get user automations with automation details
         user_automations = db.query(UserAutomation).filter(
@@ -860,7 +860,7 @@ async def get_user_active_automations(
                     "integration_status": ua.integration_status
                 })
         
-        return active_automations
+        return json_response(request, active_automations, PRIVATE_REVALIDATE, etag=etag)
         
     except Exception as e:
         raise HTTPException(
@@ -966,6 +966,7 @@ async def create_user_automation(
         db.add(user_automation)
         db.commit()
         db.refresh(user_automation)
+        invalidate_user_cache(current_user.id)
         
         return {
             "message": "Automation added to your collection successfully",
@@ -15,9 +15,10 @@ from models.user_automation import UserAutomation
 from models.automation import Automation
 from models.token_usage import TokenUsage
 from utils.auth_optimized import get_current_user_optimized, invalidate_user_cache
+from utils.auth_dependency import get_current_user_record
 from utils.circuit_breaker import user_circuit_breaker
 from schemas.user import UserResponse, UserUpdateRequest
-from cache_manager import cache_manager
+from cache_manager import cache_manager, cache, user_tag
 
 router = APIRouter(prefix="/api/optimized/user", tags=["users-optimized"])
 
@@ -53,7 +54,7 @@ async def get_current_user_info_optimized(
 @router.put("/profile", response_model=UserResponse)
 async def update_user_profile_optimized(
     user_data: UserUpdateRequest,
-    current_user: User = Depends(get_current_user_optimized),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -71,7 +72,7 @@ async def update_user_profile_optimized(
         
         # Invalidate user cache
         invalidate_user_cache(current_user.id)
-        cache_manager.delete(f"user_info_{current_user.id}")
+        cache.invalidate_tag(user_tag(current_user.id))
         
         return current_user
         
@@ -233,7 +234,7 @@ async def get_user_active_automations_optimized(
 @user_circuit_breaker
 async def change_user_password_optimized(
     request: dict,
-    current_user: User = Depends(get_current_user_optimized),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -262,13 +263,13 @@ async def change_user_password_optimized(
             )
         
         # Hash new password
-        from utils.auth import hash_password
-        current_user.password_hash = hash_password(new_password)
+        from utils.security import hash_password_async
+        current_user.password_hash = await hash_password_async(new_password)
         db.commit()
         
         # Invalidate user cache
         invalidate_user_cache(current_user.id)
-        cache_manager.delete(f"user_info_{current_user.id}")
+        cache.invalidate_tag(user_tag(current_user.id))
         
         return {"message": "رمز عبور با موفقیت تغییر یافت"}
         
@@ -3,8 +3,10 @@ from typing import List, Optional
 from datetime import datetime
 
 class UserListResponse(BaseModel):
-    total_count: int
+    total_count: Optional[int]
     users: List[dict]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 class UserAutomationAdminResponse(BaseModel):
     id: int
@@ -37,8 +39,10 @@ class PaymentResponse(BaseModel):
         from_attributes = True
 
 class PaymentListResponse(BaseModel):
-    total_count: int
+    total_count: Optional[int]
     payments: List[PaymentResponse]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 class TokenUsageResponse(BaseModel):
     id: int
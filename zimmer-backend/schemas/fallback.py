@@ -15,5 +15,7 @@ class FallbackLogResponse(BaseModel):
         from_attributes = True
 
 class FallbacksResponse(BaseModel):
-    total_count: int
-    fallbacks: List[FallbackLogResponse] 
\ No newline at end of file
+    total_count: Optional[int]
+    fallbacks: List[FallbackLogResponse]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
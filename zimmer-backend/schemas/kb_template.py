@@ -26,5 +26,7 @@ class KBTemplateResponse(KBTemplateBase):
     model_config = ConfigDict(from_attributes=True)
 
 class KBTemplateListResponse(BaseModel):
-    total_count: int
-    templates: List[KBTemplateResponse] 
\ No newline at end of file
+    total_count: Optional[int]
+    templates: List[KBTemplateResponse]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
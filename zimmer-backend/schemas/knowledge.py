@@ -27,5 +27,7 @@ class KnowledgeOut(BaseModel):
         from_attributes = True
 
 class KnowledgeListResponse(BaseModel):
-    total_count: int
-    knowledge_entries: List[KnowledgeOut] 
\ No newline at end of file
+    total_count: Optional[int]
+    knowledge_entries: List[KnowledgeOut]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
@@ -0,0 +1,67 @@
+"""
+Simulates a login burst: N concurrent bcrypt checks, run inline in async
+handlers (as before) and through the hash executor's process pool. Reports
+burst duration and how long an unrelated coroutine waited for the event
+loop meanwhile.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_executor import HashExecutor
+from utils.hashing import bcrypt_hash, bcrypt_verify
+
+BURST = 32
+TICK = 0.01
+
+async def watch_loop(stop, lags):
+    """Stands in for unrelated requests: how late does a 10ms timer fire?"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+async def inline_login(hashed):
+    return bcrypt_verify("correct horse", hashed)
+
+async def burst(login, hashed):
+    stop, lags = asyncio.Event(), []
+    watcher = asyncio.create_task(watch_loop(stop, lags))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed) for _ in range(BURST)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    assert all(results)
+    return elapsed, max(lags)
+
+def main():
+    hashed = bcrypt_hash("correct horse")
+    executor = HashExecutor(max_pending=BURST)
+
+    async def pooled_login(hashed):
+        return await executor.run(bcrypt_verify, "correct horse", hashed)
+
+    async def run():
+        # Start the workers outside the measurement
+        await asyncio.gather(*(pooled_login(hashed) for _ in range(executor.workers)))
+        return await burst(inline_login, hashed), await burst(pooled_login, hashed)
+
+    print(f"🔑 Login burst benchmark: {BURST} concurrent bcrypt checks, {executor.workers} worker(s)")
+    try:
+        (inline_time, inline_lag), (pool_time, pool_lag) = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    print()
+    print(f"{'mode':>12} {'burst':>9} {'max loop stall':>16}")
+    print(f"{'inline':>12} {inline_time:>8.2f}s {inline_lag * 1000:>13.0f} ms")
+    print(f"{'hash pool':>12} {pool_time:>8.2f}s {pool_lag * 1000:>13.0f} ms")
+    print()
+    print("✅ With the pool the event loop keeps serving other requests during the burst")
+
+if __name__ == "__main__":
+    main()
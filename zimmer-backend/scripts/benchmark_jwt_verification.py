@@ -0,0 +1,63 @@
+"""
+Micro-benchmark of access-token verification.
+Compares the old path (a full decode per helper call, two for legacy tokens)
+with the cached single-pass verify_access_claims, for current and legacy
+token formats, in verifications per second.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+
+from utils.jwt import (
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    create_access_token,
+    create_jwt_token,
+    decode_access_token,
+    get_principal_claims,
+    is_admin_from_access_token,
+)
+
+ITERATIONS = 20_000
+
+def uncached_request(token):
+    """What one authenticated request cost before: id, then admin flag"""
+    for _ in range(2):
+        payload = decode_access_token(token)
+        if payload is None:
+            # Legacy tokens failed the strict decode and were decoded again
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
+def cached_request(token):
+    get_principal_claims(token)
+    is_admin_from_access_token(token)
+
+def rate(fn, token):
+    fn(token)  # warm-up (and cache fill)
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(token)
+    return ITERATIONS / (time.perf_counter() - started)
+
+def main():
+    tokens = {
+        "current": create_access_token(42, True, auth_version=1),
+        "legacy": create_jwt_token(42, "bench", "bench@example.com", "manager"),
+    }
+    print("🔐 Access token verification benchmark")
+    print(f"   {ITERATIONS:,} requests per run, each reading user id and admin flag")
+    print()
+    print(f"{'format':>8} {'before (req/s)':>16} {'after (req/s)':>15} {'speed-up':>9}")
+    for name, token in tokens.items():
+        before = rate(uncached_request, token)
+        after = rate(cached_request, token)
+        print(f"{name:>8} {before:>16,.0f} {after:>15,.0f} {after / before:>8.1f}x")
+    print()
+    print("✅ Each token is verified once and served from the claims cache until it expires")
+
+if __name__ == "__main__":
+    main()
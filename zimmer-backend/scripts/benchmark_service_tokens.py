@@ -0,0 +1,38 @@
+"""
+Benchmarks service-token checks on /api/automation-usage/consume: a bcrypt
+verify_token per call (as before) against verify_service_token, which pays
+for bcrypt once and then answers from the cache.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.service_tokens import generate_token, hash_token, verify_service_token, verify_token
+
+CALLS = 50
+
+def per_call(check):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        assert check()
+    return (time.perf_counter() - started) / CALLS
+
+def main():
+    token = generate_token()
+    hashed = hash_token(token)
+    print(f"🔑 Service token benchmark: {CALLS} consume calls with one automation token")
+    before = per_call(lambda: verify_token(token, hashed))
+    verify_service_token(1, token, hashed)  # first call of the token fills the cache
+    after = per_call(lambda: verify_service_token(1, token, hashed))
+    print()
+    print(f"{'mode':>14} {'per call':>12}")
+    print(f"{'bcrypt':>14} {before * 1000:>9.2f} ms")
+    print(f"{'cached':>14} {after * 1000:>9.3f} ms")
+    print(f"{'speed-up':>14} {before / after:>11,.0f}x")
+    print()
+    print("✅ Only the first call per token pays for bcrypt; rotation drops the cached check")
+
+if __name__ == "__main__":
+    main()
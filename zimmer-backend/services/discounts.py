@@ -4,6 +4,8 @@ from sqlalchemy import func
 from datetime import datetime, timezone
 from models.discount import DiscountCode, DiscountCodeAutomation, DiscountRedemption
 from models.user import User
+from cache_manager import negative_cache, DISCOUNT_CODE_NS
+from services.reference_data import get_discount_code_ids
 
 UTC = timezone.utc
 def now_utc(): return datetime.now(UTC)
@@ -42,7 +44,17 @@ def compute_discount(percent_off: int, amount: int) -> tuple[int,int,int]:
 
 def validate_code(db: Session, code: str, automation_id: int, user_id: Optional[int], amount: int):
     codeN = normalize(code)
-    dc = db.query(DiscountCode).filter(func.upper(DiscountCode.code) == codeN).first()
+    # Active codes resolve to a primary-key lookup; UPPER(code) can't use an index
+    dc_id = get_discount_code_ids(db).get(codeN)
+    if dc_id is not None:
+        dc = db.get(DiscountCode, dc_id)
+    else:
+        # Inactive and unknown codes still need the row for the exact reason
+        dc = negative_cache.lookup(
+            DISCOUNT_CODE_NS,
+            codeN,
+            lambda: db.query(DiscountCode).filter(func.upper(DiscountCode.code) == codeN).first()
+        )
     if not dc: return False, "not_found", None
     if not is_code_active(dc): return False, "inactive_or_window", None
     if not code_applicable_to_automation(db, dc, automation_id): return False, "not_applicable", None
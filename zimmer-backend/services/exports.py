@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.payment import Payment
+from models.token_usage import TokenUsage
+from models.user_automation import UserAutomation
+from models.openai_key_usage import OpenAIKeyUsage
+from models.kb_status_history import KBStatusHistory
+
+# Rows fetched per round trip; with stream_results the driver keeps only
+# this many in memory (a server-side cursor on PostgreSQL)
+EXPORT_BATCH_SIZE = 1000
+# Encoded output is handed to the response in chunks of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+class ExportDataset:
+    """A flat SELECT over one table, filtered by time range and automation"""
+
+    def __init__(self, name: str, columns: list, time_column, automation_column,
+                 joins: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.columns = columns
+        self.time_column = time_column
+        self.automation_column = automation_column
+        self.joins = joins
+
+    @property
+    def fieldnames(self):
+        return [column.key for column in self.columns]
+
+    def statement(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  automation_id: Optional[int] = None):
+        q = select(*self.columns)
+        if self.joins is not None:
+            q = self.joins(q)
+        if start is not None:
+            q = q.where(self.time_column >= start)
+        if end is not None:
+            q = q.where(self.time_column < end)
+        if automation_id is not None:
+            q = q.where(self.automation_column == automation_id)
+        # Time order walks the (…, created_at) indexes; id breaks ties
+        return q.order_by(self.time_column, self.columns[0])
+
+EXPORT_DATASETS: Dict[str, ExportDataset] = {
+    "payments": ExportDataset(
+        "payments",
+        [Payment.id, Payment.user_id, Payment.automation_id, Payment.amount, Payment.tokens_purchased,
+         Payment.method, Payment.gateway, Payment.transaction_id, Payment.ref_id, Payment.status,
+         Payment.discount_code, Payment.discount_percent, Payment.created_at],
+        Payment.created_at, Payment.automation_id
+    ),
+    "token-usage": ExportDataset(
+        "token-usage",
+        [TokenUsage.id, TokenUsage.user_automation_id, UserAutomation.user_id, UserAutomation.automation_id,
+         TokenUsage.tokens_used, TokenUsage.usage_type, TokenUsage.description, TokenUsage.created_at],
+        TokenUsage.created_at, UserAutomation.automation_id,
+        joins=lambda q: q.select_from(TokenUsage).join(UserAutomation, UserAutomation.id == TokenUsage.user_automation_id)
+    ),
+    "openai-key-usage": ExportDataset(
+        "openai-key-usage",
+        [OpenAIKeyUsage.id, OpenAIKeyUsage.openai_key_id, OpenAIKeyUsage.automation_id, OpenAIKeyUsage.user_id,
+         OpenAIKeyUsage.model, OpenAIKeyUsage.prompt_tokens, OpenAIKeyUsage.completion_tokens,
+         OpenAIKeyUsage.total_tokens, OpenAIKeyUsage.status, OpenAIKeyUsage.error_code, OpenAIKeyUsage.created_at],
+        OpenAIKeyUsage.created_at, OpenAIKeyUsage.automation_id
+    ),
+    "kb-history": ExportDataset(
+        "kb-history",
+        [KBStatusHistory.id, KBStatusHistory.user_id, KBStatusHistory.user_automation_id,
+         KBStatusHistory.automation_id, KBStatusHistory.kb_health, KBStatusHistory.backup_status,
+         KBStatusHistory.error_logs, KBStatusHistory.timestamp],
+        KBStatusHistory.timestamp, KBStatusHistory.automation_id
+    ),
+}
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def _csv_cell(value: Any) -> Any:
+    value = _plain(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def iter_rows(db: Session, statement) -> Iterator[Any]:
+    """Rows of ``statement`` fetched EXPORT_BATCH_SIZE at a time"""
+    result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+def encode_rows(rows, fieldnames, fmt: str) -> Iterator[bytes]:
+    """NDJSON or CSV bytes for ``rows``, in chunks of about EXPORT_CHUNK_BYTES"""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(fieldnames)
+    for row in rows:
+        if writer is not None:
+            writer.writerow([_csv_cell(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fieldnames, map(_plain, row))), ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member as it goes"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def stream_export(session_factory: Callable[[], Session], dataset: ExportDataset, fmt: str,
+                  compress: bool = False, **filters) -> Iterator[bytes]:
+    """The whole export as a byte stream, in constant memory.
+
+    The session is opened and closed by the generator itself, so it lives
+    exactly as long as the response body is being sent.
+    """
+    db = session_factory()
+    try:
+        chunks = encode_rows(iter_rows(db, dataset.statement(**filters)), dataset.fieldnames, fmt)
+        yield from gzip_chunks(chunks) if compress else chunks
+    finally:
+        db.close()
@@ -0,0 +1,54 @@
+from typing import Any, Dict
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.automation import Automation
+from cache_manager import swr, MARKETPLACE_TAG
+
+MARKETPLACE_CACHE_KEY = "marketplace:automations"
+MARKETPLACE_SOFT_TTL = 300  # refresh in the background after 5 minutes
+MARKETPLACE_HARD_TTL = 3600
+
+def build_marketplace_data(db: Session) -> Dict[str, Any]:
+    """Listed, enabled and healthy automations, newest first."""
+    automations = db.query(Automation).filter(
+        Automation.status == True,
+        Automation.is_listed == True,
+        Automation.health_status == "healthy"
+    ).order_by(Automation.created_at.desc()).all()
+
+    marketplace_data = []
+    for automation in automations:
+        marketplace_data.append({
+            "id": automation.id,
+            "name": automation.name,
+            "description": automation.description,
+            "pricing_type": automation.pricing_type,
+            "price_per_token": automation.price_per_token,
+            "health_status": automation.health_status,
+            "last_health_at": automation.last_health_at,
+            "created_at": automation.created_at
+        })
+
+    return {
+        "automations": marketplace_data,
+        "total": len(marketplace_data),
+        "message": "Available automations in marketplace"
+    }
+
+def load_marketplace_data() -> Dict[str, Any]:
+    """Build the listing on its own session so it can run outside a request."""
+    db = SessionLocal()
+    try:
+        return build_marketplace_data(db)
+    finally:
+        db.close()
+
+async def get_marketplace_data() -> Dict[str, Any]:
+    """Cached marketplace listing, refreshed in the background once stale."""
+    return await swr.get(
+        MARKETPLACE_CACHE_KEY,
+        load_marketplace_data,
+        soft_ttl=MARKETPLACE_SOFT_TTL,
+        hard_ttl=MARKETPLACE_HARD_TTL,
+        tags=[MARKETPLACE_TAG]
+    )
@@ -1,78 +1,149 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
 from models.openai_key import OpenAIKey, OpenAIKeyStatus
 from models.openai_key_usage import OpenAIKeyUsage, UsageStatus
 from utils.crypto import decrypt_secret
+from services.reference_data import get_key_pool_ids, get_key_pool_ids_async
+from write_behind import write_behind
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _active_pool_filter(automation_id: int, key_ids: List[int]):
+    return and_(
+        OpenAIKey.id.in_(key_ids),
+        OpenAIKey.automation_id == automation_id,
+        OpenAIKey.status == OpenAIKeyStatus.ACTIVE
+    )
+
+def _pick_key(keys: List[OpenAIKey], automation_id: int, now: datetime) -> Tuple[Optional[OpenAIKey], bool]:
+    """Roll minute windows, mark exhausted keys and pick the best eligible one.
+    
+    Returns the key (or None) and whether any key was modified.
+    """
+    changed = False
+    eligible_keys = []
+    
+    for key in keys:
+        # Reset minute window if needed
+        if (key.last_minute_window is None or 
+            (now - key.last_minute_window) >= timedelta(minutes=1)):
+            key.used_requests_minute = 0
+            key.last_minute_window = now
+            changed = True
+        
+        # Check if key is eligible (not exceeding limits)
+        is_eligible = True
+        
+        # Check RPM limit
+        if key.rpm_limit and key.used_requests_minute >= key.rpm_limit:
+            is_eligible = False
+        
+        # Check daily token limit
+        if key.daily_token_limit and key.used_tokens_today >= key.daily_token_limit:
+            # Mark as exhausted
+            key.status = OpenAIKeyStatus.EXHAUSTED
+            changed = True
+            is_eligible = False
+        
+        if is_eligible:
+            eligible_keys.append(key)
+    
+    if not eligible_keys:
+        logger.warning(f"No eligible OpenAI keys found for automation {automation_id}")
+        return None, changed
+    
+    # Select the best key based on priority:
+    # 1. Lowest used_requests_minute
+    # 2. Lowest used_tokens_today
+    # 3. Least recently used
+    selected_key = min(eligible_keys, key=lambda k: (
+        k.used_requests_minute,
+        k.used_tokens_today,
+        k.last_used_at or datetime.min
+    ))
+    
+    return selected_key, changed
+
+def _apply_usage(key: OpenAIKey, key_id: int, tokens_used: int, ok: bool, error_code: Optional[str],
+                 error_message: Optional[str], model: str, prompt_tokens: int, completion_tokens: int,
+                 automation_id: Optional[int], user_id: Optional[int]) -> dict:
+    """Update the key's counters and return the ``OpenAIKeyUsage`` values to persist"""
+    now = datetime.utcnow()
+    
+    # Update key usage
+    key.used_requests_minute += 1
+    key.used_tokens_today += tokens_used
+    key.last_used_at = now
+    
+    # Check if daily limit exceeded
+    if key.daily_token_limit and key.used_tokens_today >= key.daily_token_limit:
+        key.status = OpenAIKeyStatus.EXHAUSTED
+    
+    return dict(
+        openai_key_id=key_id,
+        automation_id=automation_id or key.automation_id,
+        user_id=user_id,
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=tokens_used,
+        status=UsageStatus.OK if ok else UsageStatus.FAIL,
+        error_code=error_code,
+        error_message=error_message
+    )
+
+def _apply_failure(key: OpenAIKey, key_id: int, error_code: Optional[str]) -> bool:
+    """Record a failure on the key and return whether to retry with the next key"""
+    key.failure_count += 1
+    
+    # Handle specific error codes
+    if error_code in ["401", "403"]:
+        # Authentication errors - disable the key
+        key.status = OpenAIKeyStatus.DISABLED
+        logger.warning(f"Disabling OpenAI key {key_id} due to auth error {error_code}")
+        return True  # Retry with next key
+    
+    elif error_code == "429":
+        # Rate limit - temporary issue, keep key active but log
+        logger.warning(f"Rate limit hit for OpenAI key {key_id}")
+        return True  # Retry with next key
+    
+    elif error_code in ["500", "502", "503", "504"]:
+        # Server errors - temporary, retry
+        logger.warning(f"Server error {error_code} for OpenAI key {key_id}")
+        return True  # Retry with next key
+    
+    else:
+        # Other errors - log but keep key active
+        logger.error(f"Error {error_code} for OpenAI key {key_id}")
+        return False  # Don't retry for unknown errors
+
 class OpenAIKeyManager:
     def __init__(self, db: Session):
         self.db = db
     
     def get_pool(self, automation_id: int) -> List[OpenAIKey]:
         """Get all active keys for an automation"""
-        return self.db.query(OpenAIKey).filter(
-            and_(
-                OpenAIKey.automation_id == automation_id,
-                OpenAIKey.status == OpenAIKeyStatus.ACTIVE
-            )
-        ).all()
+        key_ids = get_key_pool_ids(self.db, automation_id)
+        if not key_ids:
+            return []
+        return self.db.query(OpenAIKey).filter(_active_pool_filter(automation_id, key_ids)).all()
     
     def select_key(self, automation_id: int) -> Optional[OpenAIKey]:
         """Select the best available key for an automation"""
-        now = datetime.utcnow()
-        
         # Get all active keys for this automation
         keys = self.get_pool(automation_id)
         if not keys:
             logger.warning(f"No active OpenAI keys found for automation {automation_id}")
             return None
         
-        eligible_keys = []
-        
-        for key in keys:
-            # Reset minute window if needed
-            if (key.last_minute_window is None or 
-                (now - key.last_minute_window) >= timedelta(minutes=1)):
-                key.used_requests_minute = 0
-                key.last_minute_window = now
-                self.db.commit()
-            
-            # Check if key is eligible (not exceeding limits)
-            is_eligible = True
-            
-            # Check RPM limit
-            if key.rpm_limit and key.used_requests_minute >= key.rpm_limit:
-                is_eligible = False
-            
-            # Check daily token limit
-            if key.daily_token_limit and key.used_tokens_today >= key.daily_token_limit:
-                # Mark as exhausted
-                key.status = OpenAIKeyStatus.EXHAUSTED
-                self.db.commit()
-                is_eligible = False
-            
-            if is_eligible:
-                eligible_keys.append(key)
-        
-        if not eligible_keys:
-            logger.warning(f"No eligible OpenAI keys found for automation {automation_id}")
-            return None
-        
-        # Select the best key based on priority:
-        # 1. Lowest used_requests_minute
-        # 2. Lowest used_tokens_today
-        # 3. Least recently used
-        selected_key = min(eligible_keys, key=lambda k: (
-            k.used_requests_minute,
-            k.used_tokens_today,
-            k.last_used_at or datetime.min
-        ))
-        
+        selected_key, changed = _pick_key(keys, automation_id, datetime.utcnow())
+        if changed:
+            self.db.commit()
         return selected_key
     
     def record_usage(self, key_id: int, tokens_used: int, ok: bool = True, 
@@ -85,32 +156,10 @@ class OpenAIKeyManager:
             logger.error(f"OpenAI key {key_id} not found for usage recording")
             return
         
-        now = datetime.utcnow()
-        
-        # Update key usage
-        key.used_requests_minute += 1
-        key.used_tokens_today += tokens_used
-        key.last_used_at = now
-        
-        # Check if daily limit exceeded
-        if key.daily_token_limit and key.used_tokens_today >= key.daily_token_limit:
-            key.status = OpenAIKeyStatus.EXHAUSTED
-        
-        # Create usage record
-        usage_record = OpenAIKeyUsage(
-            openai_key_id=key_id,
-            automation_id=automation_id or key.automation_id,
-            user_id=user_id,
-            model=model,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            total_tokens=tokens_used,
-            status=UsageStatus.OK if ok else UsageStatus.FAIL,
-            error_code=error_code,
-            error_message=error_message
-        )
-        
-        self.db.add(usage_record)
+        usage_record = _apply_usage(key, key_id, tokens_used, ok, error_code, error_message,
+                                    model, prompt_tokens, completion_tokens, automation_id, user_id)
+        # The usage row is queued once the key counters commit and follows in the next batch
+        write_behind.add(self.db, OpenAIKeyUsage, usage_record)
         self.db.commit()
         
         logger.info(f"Recorded usage for key {key_id}: {tokens_used} tokens, status={'OK' if ok else 'FAIL'}")
@@ -122,33 +171,9 @@ class OpenAIKeyManager:
             logger.error(f"OpenAI key {key_id} not found for failure handling")
             return False
         
-        key.failure_count += 1
-        
-        # Handle specific error codes
-        if error_code in ["401", "403"]:
-            # Authentication errors - disable the key
-            key.status = OpenAIKeyStatus.DISABLED
-            logger.warning(f"Disabling OpenAI key {key_id} due to auth error {error_code}")
-            self.db.commit()
-            return True  # Retry with next key
-        
-        elif error_code == "429":
-            # Rate limit - temporary issue, keep key active but log
-            logger.warning(f"Rate limit hit for OpenAI key {key_id}")
-            self.db.commit()
-            return True  # Retry with next key
-        
-        elif error_code in ["500", "502", "503", "504"]:
-            # Server errors - temporary, retry
-            logger.warning(f"Server error {error_code} for OpenAI key {key_id}")
-            self.db.commit()
-            return True  # Retry with next key
-        
-        else:
-            # Other errors - log but keep key active
-            logger.error(f"Error {error_code} for OpenAI key {key_id}")
-            self.db.commit()
-            return False  # Don't retry for unknown errors
+        retry = _apply_failure(key, key_id, error_code)
+        self.db.commit()
+        return retry
     
     def reset_daily_usage(self) -> int:
         """Reset daily token usage for all keys (called by scheduler)"""
@@ -171,3 +196,57 @@ class OpenAIKeyManager:
         except Exception as e:
             logger.error(f"Failed to decrypt key {key_id}: {e}")
             return None
+
+class AsyncOpenAIKeyManager:
+    """``OpenAIKeyManager`` on an ``AsyncSession``, for async handlers"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_pool(self, automation_id: int) -> List[OpenAIKey]:
+        """Get all active keys for an automation"""
+        key_ids = await get_key_pool_ids_async(self.db, automation_id)
+        if not key_ids:
+            return []
+        result = await self.db.execute(select(OpenAIKey).where(_active_pool_filter(automation_id, key_ids)))
+        return list(result.scalars())
+    
+    async def select_key(self, automation_id: int) -> Optional[OpenAIKey]:
+        """Select the best available key for an automation"""
+        keys = await self.get_pool(automation_id)
+        if not keys:
+            logger.warning(f"No active OpenAI keys found for automation {automation_id}")
+            return None
+        
+        selected_key, changed = _pick_key(keys, automation_id, datetime.utcnow())
+        if changed:
+            await self.db.commit()
+        return selected_key
+    
+    async def record_usage(self, key_id: int, tokens_used: int, ok: bool = True,
+                           error_code: Optional[str] = None, error_message: Optional[str] = None,
+                           model: str = "unknown", prompt_tokens: int = 0, completion_tokens: int = 0,
+                           automation_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+        """Record usage for a key"""
+        key = await self.db.get(OpenAIKey, key_id)
+        if not key:
+            logger.error(f"OpenAI key {key_id} not found for usage recording")
+            return
+        
+        usage_record = _apply_usage(key, key_id, tokens_used, ok, error_code, error_message,
+                                    model, prompt_tokens, completion_tokens, automation_id, user_id)
+        write_behind.add(self.db, OpenAIKeyUsage, usage_record)
+        await self.db.commit()
+        
+        logger.info(f"Recorded usage for key {key_id}: {tokens_used} tokens, status={'OK' if ok else 'FAIL'}")
+    
+    async def handle_failure(self, key_id: int, error_code: Optional[str] = None) -> bool:
+        """Handle key failure and return whether to retry with next key"""
+        key = await self.db.get(OpenAIKey, key_id)
+        if not key:
+            logger.error(f"OpenAI key {key_id} not found for failure handling")
+            return False
+        
+        retry = _apply_failure(key, key_id, error_code)
+        await self.db.commit()
+        return retry
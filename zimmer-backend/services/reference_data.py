@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.automation import Automation
+from models.openai_key import OpenAIKey
+from models.discount import DiscountCode
+from cache_manager import cache, automation_tag, cache_automation_data, get_cached_automation_data, invalidated_ttl
+from services.marketplace import get_marketplace_data
+from warmup import warmup
+
+KEY_POOL_TTL = 3600
+KEY_POOL_LOCAL_TTL = 120
+DISCOUNT_CODES_KEY = "discount_codes:active"
+DISCOUNT_CODES_TTL = 600
+
+def _automation_row(automation: Automation) -> Dict[str, Any]:
+    return {
+        "id": automation.id,
+        "name": automation.name,
+        "description": automation.description,
+        "pricing_type": automation.pricing_type,
+        "price_per_token": automation.price_per_token,
+        "status": automation.status,
+        "is_listed": automation.is_listed,
+        "health_status": automation.health_status,
+        "created_at": automation.created_at
+    }
+
+def get_automation_row(db: Session, automation_id: int) -> Optional[Dict[str, Any]]:
+    """Public fields of an automation, cached until the automation changes."""
+    row = get_cached_automation_data(automation_id)
+    if row is None:
+        automation = db.query(Automation).filter(Automation.id == automation_id).first()
+        if automation is None:
+            return None
+        row = _automation_row(automation)
+        cache_automation_data(automation_id, row)
+    return row
+
+def _key_pool_key(automation_id: int) -> str:
+    return f"openai_pool:{automation_id}"
+
+def get_key_pool_ids(db: Session, automation_id: int) -> List[int]:
+    """Ids of every OpenAI key assigned to an automation, whatever their status.
+
+    Membership only changes when keys are created, moved or deleted, so
+    status flips (exhausted, disabled) never need an invalidation.
+    """
+    ids = cache.get(_key_pool_key(automation_id))
+    if ids is None:
+        ids = [row.id for row in db.query(OpenAIKey.id).filter(OpenAIKey.automation_id == automation_id)]
+        cache.set(_key_pool_key(automation_id), ids, invalidated_ttl(KEY_POOL_TTL, KEY_POOL_LOCAL_TTL), tags=[automation_tag(automation_id)])
+    return ids
+
+async def get_key_pool_ids_async(db: AsyncSession, automation_id: int) -> List[int]:
+    """Async variant of ``get_key_pool_ids``"""
+    ids = cache.get(_key_pool_key(automation_id))
+    if ids is None:
+        result = await db.execute(select(OpenAIKey.id).where(OpenAIKey.automation_id == automation_id))
+        ids = list(result.scalars())
+        cache.set(_key_pool_key(automation_id), ids, invalidated_ttl(KEY_POOL_TTL, KEY_POOL_LOCAL_TTL), tags=[automation_tag(automation_id)])
+    return ids
+
+def invalidate_key_pool(automation_id: Optional[int]) -> None:
+    if automation_id is not None:
+        # The pool and every other entry cached for the automation
+        cache.invalidate_tag(automation_tag(automation_id))
+
+def get_discount_code_ids(db: Session) -> Dict[str, int]:
+    """Upper-cased code -> id for every active discount code."""
+    codes = cache.get(DISCOUNT_CODES_KEY)
+    if codes is None:
+        rows = db.query(DiscountCode.id, DiscountCode.code).filter(DiscountCode.active == True).all()
+        codes = {row.code.upper(): row.id for row in rows}
+        cache.set(DISCOUNT_CODES_KEY, codes, DISCOUNT_CODES_TTL)
+    return codes
+
+def invalidate_discount_codes() -> None:
+    cache.delete(DISCOUNT_CODES_KEY)
+
+# Startup warm-up of the datasets above
+
+@warmup.register("marketplace")
+async def warm_marketplace() -> int:
+    return (await get_marketplace_data())["total"]
+
+@warmup.register("automations")
+def warm_automations() -> int:
+    db = SessionLocal()
+    try:
+        automations = db.query(Automation).all()
+        for automation in automations:
+            cache_automation_data(automation.id, _automation_row(automation))
+        return len(automations)
+    finally:
+        db.close()
+
+@warmup.register("openai_key_pools")
+def warm_key_pools() -> int:
+    db = SessionLocal()
+    try:
+        pools: Dict[int, List[int]] = {a.id: [] for a in db.query(Automation.id)}
+        for key in db.query(OpenAIKey.id, OpenAIKey.automation_id):
+            pools.setdefault(key.automation_id, []).append(key.id)
+        for automation_id, ids in pools.items():
+            cache.set(_key_pool_key(automation_id), ids, invalidated_ttl(KEY_POOL_TTL, KEY_POOL_LOCAL_TTL), tags=[automation_tag(automation_id)])
+        return len(pools)
+    finally:
+        db.close()
+
+@warmup.register("discount_codes")
+def warm_discount_codes() -> int:
+    db = SessionLocal()
+    try:
+        invalidate_discount_codes()
+        return len(get_discount_code_ids(db))
+    finally:
+        db.close()
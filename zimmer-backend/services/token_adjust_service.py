@@ -8,6 +8,7 @@ from models.user_automation import UserAutomation
 from models.user import User
 from schemas.token_adjustment import TokenAdjustmentCreate
 from fastapi import HTTPException, status
+from cache_manager import invalidate_user_cache
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,7 @@ def apply_adjustment(db: Session, admin: User, payload: TokenAdjustmentCreate) -
     db.add(adjustment)
     db.commit()
     db.refresh(adjustment)
+    invalidate_user_cache(user_automation.user_id)
     
     # Log the adjustment for audit
     logger.info(
@@ -1,21 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.user_automation import UserAutomation
 from models.token_usage import TokenUsage
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from cache_manager import invalidate_user_cache
+from write_behind import write_behind
 
-def deduct_tokens(db: Session, user_automation_id: int, amount: int = 1, usage_type: str = "message", meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """
-    Deduct tokens from a user's automation. Prioritize demo tokens if available.
-    Args:
-        db (Session): SQLAlchemy DB session
-        user_automation_id (int): UserAutomation record ID
-        amount (int): Number of tokens to deduct (default 1)
-    Returns:
-        Dict[str, Any]: Result with success status and message
-    """
-    ua = db.query(UserAutomation).filter(UserAutomation.id == user_automation_id).first()
+def _apply_deduction(ua: Optional[UserAutomation], user_automation_id: int, amount: int, usage_type: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Update ``ua`` in memory and return the result plus the ``TokenUsage`` values to persist"""
     if not ua:
-        return {"success": False, "message": "User automation not found"}
+        return {"success": False, "message": "User automation not found"}, None
     
     # Check if demo is active and has tokens
     if ua.is_demo_active and ua.demo_tokens > 0:
@@ -27,33 +21,58 @@ def deduct_tokens(db: Session, user_automation_id: int, amount: int = 1, usage_t
                 ua.is_demo_active = False
                 ua.demo_expired = True
             
-            usage = TokenUsage(
+            usage = dict(
                 user_automation_id=user_automation_id,
                 tokens_used=amount,
                 usage_type=usage_type,
                 description=f"Used {amount} demo token(s) for {usage_type}"
             )
-            db.add(usage)
-            db.commit()
-            return {"success": True, "message": "demo mode used", "demo_tokens_remaining": ua.demo_tokens}
+            return {"success": True, "message": "demo mode used", "demo_tokens_remaining": ua.demo_tokens}, usage
         else:
-            return {"success": False, "message": "Insufficient demo tokens"}
+            return {"success": False, "message": "Insufficient demo tokens"}, None
     
     # Check if demo has expired and no paid tokens
     if ua.demo_expired and (ua.tokens_remaining is None or ua.tokens_remaining <= 0):
-        return {"success": False, "message": "دوره آزمایشی شما به پایان رسیده است. لطفا بسته توکن خریداری کنید."}
+        return {"success": False, "message": "دوره آزمایشی شما به پایان رسیده است. لطفا بسته توکن خریداری کنید."}, None
     
     # Fall back to regular token deduction
     if ua.tokens_remaining is None or ua.tokens_remaining < amount:
-        return {"success": False, "message": "Insufficient tokens"}
+        return {"success": False, "message": "Insufficient tokens"}, None
     
     ua.tokens_remaining -= amount
-    usage = TokenUsage(
+    usage = dict(
         user_automation_id=user_automation_id,
         tokens_used=amount,
         usage_type=usage_type,
         description=f"Deducted {amount} token(s) for {usage_type}"
     )
-    db.add(usage)
-    db.commit()
-    return {"success": True, "message": "paid tokens used", "tokens_remaining": ua.tokens_remaining} 
\ No newline at end of file
+    return {"success": True, "message": "paid tokens used", "tokens_remaining": ua.tokens_remaining}, usage
+
+def deduct_tokens(db: Session, user_automation_id: int, amount: int = 1, usage_type: str = "message", meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Deduct tokens from a user's automation. Prioritize demo tokens if available.
+    Args:
+        db (Session): SQLAlchemy DB session
+        user_automation_id (int): UserAutomation record ID
+        amount (int): Number of tokens to deduct (default 1)
+    Returns:
+        Dict[str, Any]: Result with success status and message
+    """
+    ua = db.query(UserAutomation).filter(UserAutomation.id == user_automation_id).first()
+    result, usage = _apply_deduction(ua, user_automation_id, amount, usage_type)
+    if usage is not None:
+        # The usage row is queued once the balance commits and follows in the next batch
+        write_behind.add(db, TokenUsage, usage)
+        db.commit()
+        invalidate_user_cache(ua.user_id)
+    return result
+
+async def deduct_tokens_async(db: AsyncSession, user_automation_id: int, amount: int = 1, usage_type: str = "message", meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async variant of ``deduct_tokens`` for handlers using ``get_async_db``"""
+    ua = await db.get(UserAutomation, user_automation_id)
+    result, usage = _apply_deduction(ua, user_automation_id, amount, usage_type)
+    if usage is not None:
+        write_behind.add(db, TokenUsage, usage)
+        await db.commit()
+        invalidate_user_cache(ua.user_id)
+    return result
@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, literal, case
+from sqlalchemy import func, literal, case, select
 from sqlalchemy.sql import label, text
 from models.token_usage import TokenUsage
 from models.automation import Automation
+from models.user_automation import UserAutomation
 
 def _date_floor_day(dialect_name: str, column):
     if dialect_name == "sqlite":
@@ -17,24 +19,23 @@ def _date_floor_month(dialect_name: str, column):
         return func.strftime("%Y-%m", column)
     return func.to_char(func.date_trunc("month", column), "YYYY-MM")
 
-def get_weekly_usage(db: Session, user_id: int, automation_id: Optional[int] = None):
-    """Last 7 full days (including today). Returns list of dicts with day, tokens, sessions."""
-    now = datetime.utcnow()
-    start = now - timedelta(days=6)  # 7-day window
-    dialect = db.bind.dialect.name
+# Each report is a statement plus a row formatter, shared by the sync and
+# async entry points below
 
-    q = db.query(
+def _weekly_usage_query(dialect: str, user_id: int, automation_id: Optional[int], start: datetime):
+    q = select(
         label("day", _date_floor_day(dialect, TokenUsage.created_at)),
         func.coalesce(func.sum(TokenUsage.tokens_used), 0).label("tokens"),
         func.count(TokenUsage.id).label("sessions"),
-    ).filter(TokenUsage.user_id == user_id, TokenUsage.created_at >= start)
+    ).join(UserAutomation, UserAutomation.id == TokenUsage.user_automation_id
+    ).where(UserAutomation.user_id == user_id, TokenUsage.created_at >= start)
 
     if automation_id:
-        q = q.filter(TokenUsage.automation_id == automation_id)
+        q = q.where(UserAutomation.automation_id == automation_id)
 
-    q = q.group_by("day").order_by("day")
-    rows = q.all()
+    return q.group_by("day").order_by("day")
 
+def _weekly_usage_rows(rows, start: datetime):
     # Fill missing days with zeros
     by_day = {r.day: {"day": r.day, "tokens": int(r.tokens or 0), "sessions": int(r.sessions or 0)} for r in rows}
     res = []
@@ -43,32 +44,67 @@ def get_weekly_usage(db: Session, user_id: int, automation_id: Optional[int] = N
         res.append(by_day.get(d, {"day": d, "tokens": 0, "sessions": 0}))
     return res
 
-def get_six_months_usage(db: Session, user_id: int):
-    """Last 6 full months (including current month). Returns month + total tokens."""
+def _weekly_window() -> datetime:
+    now = datetime.utcnow()
+    return now - timedelta(days=6)  # 7-day window
+
+def _six_months_query(dialect: str, user_id: int):
     now = datetime.utcnow()
     # Consider last 6 months including current
     six_months_ago = (now.replace(day=1) - timedelta(days=150))  # approx 5 months back
-    dialect = db.bind.dialect.name
-
-    q = db.query(
+    return select(
         label("month", _date_floor_month(dialect, TokenUsage.created_at)),
         func.coalesce(func.sum(TokenUsage.tokens_used), 0).label("value"),
-    ).filter(TokenUsage.user_id == user_id, TokenUsage.created_at >= six_months_ago
+    ).join(UserAutomation, UserAutomation.id == TokenUsage.user_automation_id
+    ).where(UserAutomation.user_id == user_id, TokenUsage.created_at >= six_months_ago
     ).group_by("month").order_by("month")
 
-    rows = q.all()
+def _six_months_rows(rows):
     # No strict zero-fill for months; return existing months in order
     return [{"month": r.month, "value": int(r.value or 0)} for r in rows]
 
-def get_distribution(db: Session, user_id: int):
-    """Tokens grouped by automation for the user's usages."""
-    q = db.query(
+def _distribution_query(user_id: int):
+    return select(
         Automation.name.label("name"),
         func.coalesce(func.sum(TokenUsage.tokens_used), 0).label("value"),
-    ).join(Automation, Automation.id == TokenUsage.automation_id, isouter=True
-    ).filter(TokenUsage.user_id == user_id
+    ).select_from(TokenUsage
+    ).join(UserAutomation, UserAutomation.id == TokenUsage.user_automation_id
+    ).join(Automation, Automation.id == UserAutomation.automation_id, isouter=True
+    ).where(UserAutomation.user_id == user_id
     ).group_by(Automation.name
     ).order_by(func.sum(TokenUsage.tokens_used).desc())
 
-    rows = q.all()
+def _distribution_rows(rows):
     return [{"name": r.name or "Unknown", "value": int(r.value or 0)} for r in rows]
+
+def get_weekly_usage(db: Session, user_id: int, automation_id: Optional[int] = None):
+    """Last 7 full days (including today). Returns list of dicts with day, tokens, sessions."""
+    start = _weekly_window()
+    rows = db.execute(_weekly_usage_query(db.bind.dialect.name, user_id, automation_id, start)).all()
+    return _weekly_usage_rows(rows, start)
+
+def get_six_months_usage(db: Session, user_id: int):
+    """Last 6 full months (including current month). Returns month + total tokens."""
+    rows = db.execute(_six_months_query(db.bind.dialect.name, user_id)).all()
+    return _six_months_rows(rows)
+
+def get_distribution(db: Session, user_id: int):
+    """Tokens grouped by automation for the user's usages."""
+    rows = db.execute(_distribution_query(user_id)).all()
+    return _distribution_rows(rows)
+
+async def get_weekly_usage_async(db: AsyncSession, user_id: int, automation_id: Optional[int] = None):
+    """Async variant of ``get_weekly_usage``"""
+    start = _weekly_window()
+    result = await db.execute(_weekly_usage_query(db.bind.dialect.name, user_id, automation_id, start))
+    return _weekly_usage_rows(result.all(), start)
+
+async def get_six_months_usage_async(db: AsyncSession, user_id: int):
+    """Async variant of ``get_six_months_usage``"""
+    result = await db.execute(_six_months_query(db.bind.dialect.name, user_id))
+    return _six_months_rows(result.all())
+
+async def get_distribution_async(db: AsyncSession, user_id: int):
+    """Async variant of ``get_distribution``"""
+    result = await db.execute(_distribution_query(user_id))
+    return _distribution_rows(result.all())
@@ -0,0 +1,175 @@
+"""Minimal in-process server speaking the Redis protocol, for cache tests"""
+
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and time.time() >= deadline:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+
+def _encode(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, (list, tuple, set)):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    raise TypeError(value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:].strip())
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:].strip())
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        try:
+            while True:
+                args = self._read_command()
+                if args is None:
+                    return
+                name = args[0].decode().upper()
+                with store.lock:
+                    if name == "SUBSCRIBE":
+                        reply = self.server.subscribe(self, args[1:])
+                    else:
+                        reply = self.server.dispatch(store, name, args[1:])
+                    self.wfile.write(reply)
+        finally:
+            with store.lock:
+                for handlers in self.server.subscribers.values():
+                    if self in handlers:
+                        handlers.remove(self)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server implementing the commands the cache layer uses"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.store = _Store()
+        self.commands = []
+        self.subscribers = {}
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def subscribe(self, handler, channels):
+        reply = b""
+        for channel in channels:
+            self.subscribers.setdefault(channel, []).append(handler)
+            reply += _encode([b"subscribe", channel, 1])
+        return reply
+
+    def drop_subscribers(self):
+        """Close every subscriber connection, as a Redis restart would"""
+        with self.store.lock:
+            for handlers in self.subscribers.values():
+                for handler in handlers:
+                    handler.connection.shutdown(2)
+                handlers.clear()
+
+    def dispatch(self, store, name, args):
+        self.commands.append(name)
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "GET":
+            key = args[0]
+            return _encode(store.data[key] if store.alive(key) else None)
+        if name == "MGET":
+            return _encode([store.data[k] if store.alive(k) else None for k in args])
+        if name == "SET":
+            key, value = args[0], args[1]
+            store.data[key] = value
+            store.expires.pop(key, None)
+            options = [a.decode().upper() for a in args[2:]]
+            if "EX" in options:
+                store.expires[key] = time.time() + int(options[options.index("EX") + 1])
+            return b"+OK\r\n"
+        if name in ("DEL", "UNLINK"):
+            removed = 0
+            for key in args:
+                if store.alive(key):
+                    del store.data[key]
+                    store.expires.pop(key, None)
+                    removed += 1
+            return _encode(removed)
+        if name == "SADD":
+            members = store.data.setdefault(args[0], set())
+            before = len(members)
+            members.update(args[1:])
+            return _encode(len(members) - before)
+        if name == "SMEMBERS":
+            return _encode(store.data[args[0]] if store.alive(args[0]) else set())
+        if name == "SREM":
+            members = store.data.get(args[0], set())
+            removed = len(members & set(args[1:]))
+            members.difference_update(args[1:])
+            return _encode(removed)
+        if name == "EXPIRE":
+            key, seconds = args[0], int(args[1])
+            if not store.alive(key):
+                return _encode(0)
+            deadline = time.time() + seconds
+            options = [a.decode().upper() for a in args[2:]]
+            current = store.expires.get(key)
+            if "NX" in options and current is not None:
+                return _encode(0)
+            if "GT" in options and (current is None or deadline <= current):
+                return _encode(0)
+            store.expires[key] = deadline
+            return _encode(1)
+        if name == "SCAN":
+            options = [a.decode() for a in args[1:]]
+            pattern = options[options.index("MATCH") + 1] if "MATCH" in options else "*"
+            keys = [k for k in list(store.data) if store.alive(k) and fnmatch.fnmatchcase(k.decode(), pattern)]
+            return _encode([b"0", keys])
+        if name == "DBSIZE":
+            return _encode(sum(1 for k in list(store.data) if store.alive(k)))
+        if name == "PUBLISH":
+            handlers = list(self.subscribers.get(args[0], ()))
+            for handler in handlers:
+                handler.wfile.write(_encode([b"message", args[0], args[1]]))
+            return _encode(len(handlers))
+        if name == "INFO":
+            return _encode("# Stats\r\nexpired_keys:0\r\nevicted_keys:0\r\nused_memory:1024\r\n")
+        return b"+OK\r\n"
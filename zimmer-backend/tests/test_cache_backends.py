@@ -0,0 +1,227 @@
+import asyncio
+import time
+
+import pytest
+
+from cache_backends import InMemoryBackend, LocalBus, RedisBackend, RedisBus, TieredBackend
+from cache_manager import CacheManager, NegativeCache, SingleFlight
+from cache_metrics import CacheMetrics
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = CacheManager(backend=InMemoryBackend(max_entries=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c"]) == {"a": 1, "c": 3}
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_memory_backend_expires_without_reads():
+    backend = InMemoryBackend()
+    backend.set("short", "x", ttl=1)
+    backend.set("long", "y", ttl=60)
+    time.sleep(1.05)
+    backend.set("other", "z", ttl=60)
+
+    stats = backend.get_stats()
+    assert stats["total_entries"] == 2
+    assert stats["expirations"] == 1
+
+
+def test_memory_backend_invalidates_by_tag():
+    cache = CacheManager(backend=InMemoryBackend())
+    cache.set("dashboard:42", {"tokens": 10}, ttl=3600, tags=["user:42", "automation:7"])
+    cache.set("user_dashboard_42", {"tokens": 10}, ttl=3600, tags=["user:42"])
+    cache.set("marketplace:automations", [7], ttl=3600, tags=["automation:7"])
+    cache.set("dashboard:43", {"tokens": 3}, ttl=3600, tags=["user:43"])
+
+    assert cache.invalidate_tag("user:42") == 2
+    assert cache.get("dashboard:42") is None
+    assert cache.get("marketplace:automations") == [7]
+    assert cache.invalidate_tag("automation:7") == 1
+    assert cache.get("dashboard:43") == {"tokens": 3}
+    assert cache.get_stats()["tags"] == 1
+
+
+def test_redis_backend_shares_values_between_managers():
+    pytest.importorskip("redis")
+    from tests.fake_redis import FakeRedisServer
+
+    with FakeRedisServer() as server:
+        worker_a = CacheManager(backend=RedisBackend(url=server.url))
+        worker_b = CacheManager(backend=RedisBackend(url=server.url))
+
+        worker_a.set_many({"marketplace:automations": [{"id": 1}], "user:7": {"name": "x"}}, ttl=60)
+        assert worker_b.get("marketplace:automations") == [{"id": 1}]
+        assert worker_b.get_many(["user:7", "missing"]) == {"user:7": {"name": "x"}}
+
+        worker_b.delete("user:7")
+        assert worker_a.get("user:7") is None
+
+        worker_a.clear()
+        assert worker_b.get("marketplace:automations") is None
+        assert worker_a.get_stats()["backend"] == "redis"
+
+
+def test_long_ttls_only_with_shared_backend(monkeypatch):
+    import cache_manager
+
+    monkeypatch.setattr(cache_manager, "cache", CacheManager(backend=InMemoryBackend()))
+    assert cache_manager.invalidated_ttl(3600, 180) == 180
+    monkeypatch.setattr(cache_manager, "cache", CacheManager(backend=RedisBackend(client=object())))
+    assert cache_manager.invalidated_ttl(3600, 180) == 3600
+
+
+def test_redis_backend_degrades_to_miss_when_unreachable():
+    pytest.importorskip("redis")
+    backend = RedisBackend(url="redis://127.0.0.1:1/0", socket_timeout=0.05)
+    backend.set("k", 1, ttl=10)
+    assert backend.get("k") is None
+    assert backend.errors == 2
+
+
+def test_redis_backend_invalidates_by_tag_across_workers():
+    pytest.importorskip("redis")
+    from tests.fake_redis import FakeRedisServer
+
+    with FakeRedisServer() as server:
+        worker_a = CacheManager(backend=RedisBackend(url=server.url))
+        worker_b = CacheManager(backend=RedisBackend(url=server.url))
+
+        worker_a.set("dashboard:42", {"tokens": 10}, ttl=3600, tags=["user:42"])
+        worker_a.set("user_info_42", {"name": "x"}, ttl=60, tags=["user:42"])
+        worker_a.set("dashboard:43", {"tokens": 3}, ttl=3600, tags=["user:43"])
+
+        assert worker_b.invalidate_tag("user:42") == 2
+        assert worker_a.get("dashboard:42") is None
+        assert worker_a.get("dashboard:43") == {"tokens": 3}
+
+
+def test_tiered_backend_serves_hot_reads_locally_and_stays_coherent():
+    shared = InMemoryBackend()
+    bus = LocalBus()
+    worker_a = TieredBackend(shared, bus, l1_ttl=30)
+    worker_b = TieredBackend(shared, bus, l1_ttl=30)
+
+    worker_a.set("automation:7", {"name": "old"}, ttl=300, tags=["automation:7"])
+    assert worker_b.get("automation:7") == {"name": "old"}
+    shared.delete("automation:7")
+    # Second read never reaches the shared store
+    assert worker_b.get("automation:7") == {"name": "old"}
+
+    worker_a.set("automation:7", {"name": "new"}, ttl=300, tags=["automation:7"])
+    assert worker_b.get("automation:7") == {"name": "new"}
+
+    assert worker_a.invalidate_tag("automation:7") == 1
+    assert worker_b.get("automation:7") is None
+    assert worker_b.get_stats()["l1"]["invalidations_received"] == 3
+
+
+def test_tiered_backend_fans_out_over_redis_pubsub():
+    pytest.importorskip("redis")
+    from tests.fake_redis import FakeRedisServer
+
+    with FakeRedisServer() as server:
+        buses = [RedisBus(url=server.url), RedisBus(url=server.url)]
+        worker_a, worker_b = (
+            TieredBackend(RedisBackend(url=server.url), bus, l1_ttl=30) for bus in buses
+        )
+        assert all(bus.wait_ready() for bus in buses)
+
+        worker_a.set("user_info_42", {"name": "x"}, ttl=60, tags=["user:42"])
+        assert worker_b.get("user_info_42") == {"name": "x"}
+
+        worker_a.invalidate_tag("user:42")
+        deadline = time.time() + 2
+        while worker_b.l1.get("user_info_42") is not None and time.time() < deadline:
+            time.sleep(0.01)
+        assert worker_b.get("user_info_42") is None
+
+        # A lost subscription flushes the L1 instead of serving stale data
+        worker_b.set("marketplace:automations", [1], ttl=60)
+        server.drop_subscribers()
+        deadline = time.time() + 2
+        while worker_b.l1.get("marketplace:automations") is not None and time.time() < deadline:
+            time.sleep(0.01)
+        assert worker_b.l1.get("marketplace:automations") is None
+        assert buses[1].wait_ready()
+
+        for bus in buses:
+            bus.close()
+
+
+def test_metrics_split_by_key_prefix():
+    metrics = CacheMetrics()
+    cache = CacheManager(backend=InMemoryBackend(max_entries=2), metrics=metrics)
+    cache.set("user_data_1", {"id": 1})
+    cache.set("user_data_2", {"id": 2})
+    cache.get("user_data_1")
+    cache.get("dashboard:9")
+    cache.set("dashboard:9", {"tokens": 3})
+
+    snapshot = metrics.snapshot()
+    assert snapshot["user_data"]["hits"] == 1
+    assert snapshot["user_data"]["evictions"] == 1
+    assert snapshot["user_data"]["entries"] == 1
+    assert snapshot["dashboard"]["misses"] == 1
+    assert snapshot["dashboard"]["bytes"] > 0
+    assert 'zimmer_cache_hits_total{prefix="user_data"} 1' in metrics.render_prometheus()
+
+
+def test_metrics_never_label_keys_by_their_variable_parts():
+    metrics = CacheMetrics()
+    cache = CacheManager(backend=InMemoryBackend(), metrics=metrics)
+    cache.set("email_verify_code_john@example.com", "123456")
+    cache.set("challenge_abcdefghijklmnop", 1)
+    cache.set('unknown_key"with\nquotes', 1)
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"email_verify_code", "challenge", "other"}
+    assert "example.com" not in metrics.render_prometheus()
+
+
+def test_negative_cache_skips_known_misses_until_forgotten():
+    negatives = NegativeCache(ttl=60, max_entries=2)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return None
+
+    assert negatives.lookup("bot_token", "123:abc", load) is None
+    assert negatives.lookup("bot_token", "123:abc", load) is None
+    assert len(calls) == 1
+
+    negatives.forget("bot_token", "123:abc")
+    assert negatives.lookup("bot_token", "123:abc", lambda: "row") == "row"
+
+    for code in ("A", "B", "C"):
+        negatives.mark_missing("discount_code", code)
+    assert negatives.get_stats()["total_entries"] == 2
+    assert not negatives.is_missing("discount_code", "A")
+
+
+def test_single_flight_survives_the_first_caller_being_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("k", load))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.run("k", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "value"
+        assert first.cancelled()
+
+    asyncio.run(scenario())
+    assert calls == [1] and flight.coalesced == 1
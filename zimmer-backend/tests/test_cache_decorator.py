@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from cache_manager import cache, cached
+
+
+def test_async_misses_share_one_computation():
+    calls = []
+
+    @cached(ttl=60, key_prefix="test:", key_args=["automation_id"])
+    async def load(automation_id, db=None):
+        calls.append(automation_id)
+        await asyncio.sleep(0.01)
+        return {"id": automation_id}
+
+    async def burst():
+        return await asyncio.gather(*[load(7, db=object()) for _ in range(200)])
+
+    results = asyncio.run(burst())
+
+    assert calls == [7]
+    assert all(r == {"id": 7} for r in results)
+    assert cache.get("test:load:7") == {"id": 7}
+    cache.delete("test:load:7")
+
+
+def test_key_ignores_undeclared_arguments():
+    calls = []
+
+    class Principal:
+        def __init__(self, id):
+            self.id = id
+
+    @cached(ttl=60, key_prefix="test:", key_args=["current_user.id"], tags=lambda current_user, db: [f"user:{current_user.id}"])
+    def profile(current_user, db):
+        calls.append(current_user.id)
+        return {"id": current_user.id}
+
+    assert profile(Principal(5), db=object()) == {"id": 5}
+    assert profile(Principal(5), db=object()) == {"id": 5}
+    assert calls == [5]
+
+    cache.invalidate_tag("user:5")
+    profile(Principal(5), db=object())
+    assert calls == [5, 5]
+    cache.invalidate_tag("user:5")
+
+
+def test_parameters_require_a_declared_key():
+    with pytest.raises(TypeError):
+        @cached(ttl=60)
+        def lookup(user_id):
+            return user_id
+
+
+def test_stale_value_is_served_while_refreshing():
+    from cache_backends import InMemoryBackend
+    from cache_manager import CacheManager, StaleWhileRevalidate
+
+    swr = StaleWhileRevalidate(CacheManager(backend=InMemoryBackend()))
+    versions = iter(range(1, 10))
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        return next(versions)
+
+    async def scenario():
+        first = await swr.get("stats", loader, soft_ttl=0, hard_ttl=60)
+        stale = await swr.get("stats", loader, soft_ttl=0, hard_ttl=60)
+        await asyncio.sleep(0.05)
+        refreshed = await swr.get("stats", loader, soft_ttl=60, hard_ttl=60)
+        return first, stale, refreshed
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+    stats = swr.get_stats()["stats"]
+    assert stats["blocking_loads"] == 1
+    assert stats["refreshes"] == 2
+
+
+def test_warmup_runs_concurrently_within_budget():
+    from warmup import WarmupRegistry
+
+    registry = WarmupRegistry()
+
+    @registry.register("fast")
+    async def fast():
+        await asyncio.sleep(0.05)
+        return 3
+
+    @registry.register("blocking")
+    def blocking():
+        import time
+        time.sleep(0.05)
+        return 2
+
+    @registry.register("slow")
+    async def slow():
+        await asyncio.sleep(5)
+
+    assert not registry.ready
+    status = asyncio.run(registry.run(budget=0.3))
+
+    assert registry.ready
+    assert status["state"] == "partial"
+    assert status["elapsed_ms"] < 1000
+    assert status["datasets"]["fast"]["items"] == 3
+    assert status["datasets"]["blocking"]["state"] == "done"
+    assert status["datasets"]["slow"]["state"] == "timed_out"
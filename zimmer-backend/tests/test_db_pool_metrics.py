@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from db_pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+
+def test_checkout_timeouts_and_overflow_are_recorded(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+    metrics = PoolMetrics()
+    metrics.instrument("primary", engine)
+
+    first, second = engine.connect(), engine.connect()
+    assert metrics.total_in_use() == 2
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+
+    stats = metrics.snapshot()["primary"]
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["peak_in_use"] == 2
+    assert stats["overflow_opened"] == 1
+    assert 'zimmer_db_pool_timeouts_total{pool="primary"} 1' in metrics.render_prometheus()
@@ -0,0 +1,34 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from enum import Enum
+
+from services.exports import encode_rows, gzip_chunks
+
+
+class Status(str, Enum):
+    OK = "ok"
+
+
+ROWS = [(i, Status.OK, datetime(2025, 1, 1, 0, i % 60), ["a", "b"]) for i in range(5000)]
+FIELDS = ["id", "status", "created_at", "logs"]
+
+
+def test_ndjson_rows_are_plain_json():
+    lines = b"".join(encode_rows(iter(ROWS), FIELDS, "ndjson")).decode().splitlines()
+    assert len(lines) == len(ROWS)
+    assert json.loads(lines[1]) == {"id": 1, "status": "ok", "created_at": "2025-01-01T00:01:00", "logs": ["a", "b"]}
+
+
+def test_csv_is_chunked_and_gzip_round_trips(monkeypatch):
+    monkeypatch.setattr("services.exports.EXPORT_CHUNK_BYTES", 4096)
+    chunks = list(encode_rows(iter(ROWS), FIELDS, "csv"))
+    assert len(chunks) > 10 and max(len(c) for c in chunks) < 8192
+
+    body = gzip.decompress(b"".join(gzip_chunks(iter(chunks)))).decode()
+    rows = list(csv.reader(io.StringIO(body)))
+    assert rows[0] == FIELDS
+    assert rows[1] == ["0", "ok", "2025-01-01T00:00:00", '["a", "b"]']
+    assert len(rows) == len(ROWS) + 1
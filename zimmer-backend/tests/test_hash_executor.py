@@ -0,0 +1,62 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import bcrypt
+import pytest
+
+from hash_executor import HashExecutor, HashPoolSaturated
+from utils.hashing import bcrypt_hash, bcrypt_verify
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_bcrypt_runs_in_worker_processes():
+    executor = HashExecutor(workers=2, max_pending=4)
+
+    async def scenario():
+        hashed = await executor.run(bcrypt_hash, "s3cret")
+        results = await asyncio.gather(
+            executor.run(bcrypt_verify, "s3cret", hashed),
+            executor.run(bcrypt_verify, "wrong", hashed),
+        )
+        return hashed, results
+
+    try:
+        hashed, results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert bcrypt.checkpw(b"s3cret", hashed.encode())
+    assert results == [True, False]
+    stats = executor.snapshot()
+    assert stats["completed"] == 3 and stats["pending"] == 0
+
+
+def test_jobs_past_the_cap_are_refused_with_429():
+    executor = HashExecutor(workers=1, max_pending=1, enabled=False)
+
+    async def scenario():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HashPoolSaturated) as refused:
+            await executor.run(time.sleep, 0)
+        await slow
+        await executor.run(time.sleep, 0)
+        return refused.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429 and "Retry-After" in error.headers
+    stats = executor.snapshot()
+    assert stats["rejected"] == 1 and stats["completed"] == 2
+
+
+def test_worker_module_has_no_application_imports():
+    # Workers import the module of each submitted function
+    code = (
+        "import sys, utils.hashing; "
+        "loaded = {'cache_manager', 'cache_backends', 'hash_executor', 'redis'} & set(sys.modules); "
+        "sys.exit(sorted(loaded) or 0)"
+    )
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
@@ -0,0 +1,34 @@
+from starlette.requests import Request
+
+import utils.http_cache as http_cache
+from cache_backends import InMemoryBackend
+from cache_manager import CacheManager
+from utils.http_cache import json_response, versioned_etag
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/notifications",
+                    "query_string": b"", "headers": headers})
+
+
+def test_per_worker_cache_falls_back_to_payload_etag(monkeypatch):
+    monkeypatch.setattr(http_cache, "cache", CacheManager(backend=InMemoryBackend()))
+    assert versioned_etag(make_request(), "notifications:1") is None
+
+    first = json_response(make_request(), [{"id": 1, "is_read": False}], http_cache.PRIVATE_REVALIDATE)
+    etag = first.headers["etag"]
+    assert json_response(make_request(etag), [{"id": 1, "is_read": False}], http_cache.PRIVATE_REVALIDATE).status_code == 304
+    # Changed on another worker: the body differs, so does the ETag
+    assert json_response(make_request(etag), [{"id": 1, "is_read": True}], http_cache.PRIVATE_REVALIDATE).status_code == 200
+
+
+def test_shared_cache_uses_version_tokens(monkeypatch):
+    shared = CacheManager(backend=InMemoryBackend())
+    monkeypatch.setattr(type(shared.backend), "shared", True, raising=False)
+    monkeypatch.setattr(http_cache, "cache", shared)
+
+    etag = versioned_etag(make_request(), "notifications:1")
+    assert versioned_etag(make_request(), "notifications:1") == etag
+    shared.invalidate_tag("notifications:1")
+    assert versioned_etag(make_request(), "notifications:1") != etag
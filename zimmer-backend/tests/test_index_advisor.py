@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, text
+
+from index_advisor import advise, extract_access_patterns
+
+
+def test_access_patterns_split_filters_joins_and_order():
+    patterns = extract_access_patterns(
+        "SELECT token_usages.id FROM token_usages JOIN user_automations "
+        "ON user_automations.id = token_usages.user_automation_id "
+        "WHERE user_automations.user_id = ? AND token_usages.created_at >= ? "
+        "ORDER BY token_usages.created_at DESC",
+        ["token_usages", "user_automations"]
+    )
+    assert patterns["user_automations"].candidate() == ("user_id",)
+    assert patterns["token_usages"].joined == ["user_automation_id"]
+    assert patterns["token_usages"].candidate() == ("created_at",)
+
+
+def test_advise_reports_missing_partial_and_unused(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'advisor.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE payments (id INTEGER PRIMARY KEY, user_id INTEGER, status TEXT, created_at TEXT, ref TEXT)"))
+        conn.execute(text("CREATE INDEX ix_payments_user ON payments (user_id)"))
+        conn.execute(text("CREATE INDEX ix_payments_ref ON payments (ref)"))
+
+    report = advise([
+        {"fingerprint": "SELECT payments.id FROM payments WHERE payments.user_id = ? ORDER BY payments.created_at DESC",
+         "count": 10, "total_ms": 50.0},
+        {"fingerprint": "SELECT payments.id FROM payments WHERE payments.status = ?", "count": 3, "total_ms": 9.0},
+    ], engine)
+
+    assert [(f["columns"], f["status"]) for f in report["partial"]] == [(["user_id", "created_at"], "partial")]
+    assert [f["columns"] for f in report["missing"]] == [["status"]]
+    assert [u["index"] for u in report["unused"]] == ["ix_payments_ref"]
@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta
+
+import jwt as pyjwt
+
+import utils.jwt as jwt_utils
+from utils.jwt import (
+    create_access_token,
+    create_jwt_token,
+    get_principal_claims,
+    get_user_id_from_access_token,
+    is_admin_from_access_token,
+    verify_access_claims,
+)
+
+
+def test_token_is_decoded_once(monkeypatch):
+    token = create_access_token(7, True, auth_version=3)
+    decodes = []
+    real_decode = pyjwt.decode
+    monkeypatch.setattr(jwt_utils.jwt, "decode", lambda *a, **k: decodes.append(1) or real_decode(*a, **k))
+
+    assert get_user_id_from_access_token(token) == 7
+    assert is_admin_from_access_token(token) is True
+    assert get_principal_claims(token) == (7, 3)
+    assert len(decodes) == 1
+
+
+def test_legacy_tokens_in_the_same_pass():
+    token = create_jwt_token(9, "n", "e@x.com", "technical_team")
+    assert get_principal_claims(token) == (9, 0)
+    assert is_admin_from_access_token(token) is True
+
+
+def test_invalid_and_expired_tokens_are_rejected():
+    assert verify_access_claims("not-a-token") is None
+    expired = pyjwt.encode(
+        {"sub": "1", "type": "access", "iat": datetime.utcnow() - timedelta(hours=1),
+         "exp": datetime.utcnow() - timedelta(minutes=1)},
+        jwt_utils.JWT_SECRET_KEY, algorithm=jwt_utils.JWT_ALGORITHM
+    )
+    assert verify_access_claims(expired) is None
+
+    # A cached token stops verifying once its exp has passed
+    token = pyjwt.encode(
+        {"sub": "5", "type": "access", "iat": int(time.time()), "exp": int(time.time()) + 1},
+        jwt_utils.JWT_SECRET_KEY, algorithm=jwt_utils.JWT_ALGORITHM
+    )
+    assert verify_access_claims(token).user_id == 5
+    time.sleep(1.1)
+    assert verify_access_claims(token) is None
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Boolean, Column, DateTime, Integer, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from utils.pagination import Keyset, count_rows, encode_cursor
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    flag = Column(Boolean, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    base = datetime(2025, 1, 1)
+    # Many rows share a timestamp so the id tie-breaker matters
+    session.add_all(Item(id=i, flag=bool(i % 3), created_at=base + timedelta(minutes=i // 4)) for i in range(1, 38))
+    session.commit()
+    yield session
+    session.close()
+
+
+def walk(db, keyset, limit):
+    rows, cursor = [], None
+    while True:
+        page = keyset.page(keyset.apply(db.query(Item), cursor, limit).all(), limit)
+        rows += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            return rows
+
+
+def test_pages_cover_every_row_once_in_order(db):
+    keyset = Keyset(Item.created_at.desc(), Item.id.desc())
+    rows = walk(db, keyset, limit=5)
+    expected = db.query(Item).order_by(Item.created_at.desc(), Item.id.desc()).all()
+    assert [r.id for r in rows] == [r.id for r in expected]
+
+
+def test_mixed_directions_with_boolean_column(db):
+    keyset = Keyset(Item.flag.asc(), Item.created_at.desc(), Item.id.desc())
+    rows = walk(db, keyset, limit=4)
+    expected = db.query(Item).order_by(Item.flag.asc(), Item.created_at.desc(), Item.id.desc()).all()
+    assert [r.id for r in rows] == [r.id for r in expected]
+
+
+def test_foreign_or_garbled_cursor_is_rejected(db):
+    keyset = Keyset(Item.created_at.desc(), Item.id.desc())
+    for cursor in ("not-a-cursor", encode_cursor([1, 2, 3])):
+        with pytest.raises(HTTPException) as e:
+            keyset.apply(db.query(Item), cursor, 5)
+        assert e.value.status_code == 400
+
+
+def test_approximate_count_is_capped(db, monkeypatch):
+    monkeypatch.setattr("utils.pagination.APPROXIMATE_COUNT_CAP", 10)
+    assert count_rows(db.query(Item), "exact") == (37, False)
+    assert count_rows(db.query(Item), "approximate") == (10, True)
+    assert count_rows(db.query(Item).filter(Item.id <= 5), "approximate") == (5, False)
+    assert count_rows(db.query(Item), "none") == (None, False)
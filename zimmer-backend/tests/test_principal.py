@@ -0,0 +1,111 @@
+import pickle
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import utils.principal
+from cache_backends import InMemoryBackend, RedisBackend
+from cache_manager import CacheManager
+from models.user import User, UserRole
+from utils.principal import Principal, resolve_principal
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'principal.db'}")
+    User.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two workers' caches over one shared store; the principal module uses the first"""
+    pytest.importorskip("redis")
+    from tests.fake_redis import FakeRedisServer
+
+    with FakeRedisServer() as server:
+        caches = [CacheManager(backend=RedisBackend(url=server.url)) for _ in range(2)]
+        monkeypatch.setattr(utils.principal, "cache", caches[0])
+        yield caches
+
+
+def make_user(db, **values):
+    user = User(name="a", email=f"{values.pop('email', 'a')}@x.com", password_hash="h",
+                role=UserRole.customer, **values)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_principal_is_read_only_and_pickles():
+    principal = Principal(id=1, role=UserRole.manager, is_active=True, auth_version=2)
+    with pytest.raises(AttributeError):
+        principal.role = UserRole.customer
+    restored = pickle.loads(pickle.dumps(principal))
+    assert restored.to_dict() == principal.to_dict() and restored.is_admin
+
+
+def test_cached_principal_needs_no_query(db, workers):
+    user = make_user(db, email="cached")
+    loads = []
+    load = lambda: loads.append(1) or db.get(User, user.id)
+
+    assert resolve_principal(user.id, 0, load).email == "cached@x.com"
+    assert resolve_principal(user.id, 0, load).id == user.id
+    assert len(loads) == 1
+
+
+def test_revoking_changes_bump_version_and_drop_cache(db, workers):
+    user = make_user(db, email="revoked")
+    load = lambda: db.get(User, user.id)
+    assert resolve_principal(user.id, 0, load) is not None
+
+    user.password_hash = "changed"
+    db.commit()
+    assert user.auth_version == 1
+    # Tokens issued before the change are refused, new ones accepted
+    assert resolve_principal(user.id, 0, load) is None
+    assert resolve_principal(user.id, 1, load) is not None
+
+    user.name = "renamed"
+    db.commit()
+    assert user.auth_version == 1
+    assert resolve_principal(user.id, 1, load).name == "renamed"
+
+    user.is_active = False
+    db.commit()
+    assert resolve_principal(user.id, 2, load) is None
+
+
+def test_deactivation_on_another_worker_is_seen(db, workers):
+    user = make_user(db, email="elsewhere")
+    load = lambda: db.get(User, user.id)
+    assert resolve_principal(user.id, 0, load) is not None
+
+    # The change is committed by another worker and invalidated from there
+    utils.principal.cache = workers[1]
+    user.is_active = False
+    db.commit()
+    utils.principal.cache = workers[0]
+    assert resolve_principal(user.id, 1, load) is None
+
+
+def test_per_worker_caches_are_bypassed(db, monkeypatch):
+    local = [CacheManager(backend=InMemoryBackend()) for _ in range(2)]
+    monkeypatch.setattr(utils.principal, "cache", local[0])
+    user = make_user(db, email="local")
+    loads = []
+    load = lambda: loads.append(1) or db.get(User, user.id)
+    assert resolve_principal(user.id, 0, load) is not None
+
+    # Deactivated on the other worker, whose invalidation never reaches this one
+    utils.principal.cache = local[1]
+    user.is_active = False
+    db.commit()
+    utils.principal.cache = local[0]
+    assert resolve_principal(user.id, 0, load) is None
+    assert len(loads) == 2
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import utils.query_budget as query_budget
+from utils.query_budget import QueryBudgetExceeded, RequestQueryStats, install_query_tracking
+
+
+def test_repeated_statements_are_counted_and_flagged():
+    engine = create_engine("sqlite://")
+    install_query_tracking(engine)
+    stats = RequestQueryStats("/tickets", budget=100)
+    token = query_budget._current.set(stats)
+    try:
+        with engine.connect() as conn:
+            for ticket_id in range(6):
+                conn.execute(text("SELECT :id"), {"id": ticket_id})
+    finally:
+        query_budget._current.reset(token)
+
+    assert stats.count == 6
+    assert stats.flagged == ["SELECT ?"]
+
+
+def test_budget_raises_in_raise_mode(monkeypatch):
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    stats = RequestQueryStats("/dashboard", budget=2)
+    stats.record("SELECT 1")
+    stats.record("SELECT 2")
+    with pytest.raises(QueryBudgetExceeded):
+        stats.record("SELECT 3")
@@ -0,0 +1,38 @@
+from sqlalchemy import create_engine, text
+
+from utils.query_budget import suspend_tracking
+from utils.query_profiler import QueryProfiler, fingerprint
+
+
+def test_fingerprint_strips_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM users WHERE id = 42 AND email = 'a@x.io'") == \
+        fingerprint("SELECT * FROM users WHERE id = :id_1 AND email = :email_1")
+    assert fingerprint("SELECT id FROM t WHERE id IN (?, ?, ?)") == "SELECT id FROM t WHERE id IN (...)"
+
+
+def test_slow_statements_get_a_plan():
+    engine = create_engine("sqlite://")
+    profiler = QueryProfiler(slow_ms=0)
+    profiler.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        for value in (1, 2, 3):
+            conn.execute(text("SELECT id FROM t WHERE id = :id"), {"id": value})
+
+    top = profiler.top(sort="count")[0]
+    assert top["fingerprint"] == "SELECT id FROM t WHERE id = ?"
+    assert top["count"] == 3
+    assert any("SEARCH t" in row for row in top["plan"])
+
+
+def test_suspended_statements_are_not_profiled():
+    engine = create_engine("sqlite://")
+    profiler = QueryProfiler(slow_ms=0)
+    profiler.install(engine)
+    with engine.connect() as conn:
+        with suspend_tracking():
+            conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert [row["fingerprint"] for row in profiler.top()] == ["SELECT ?"]
+    assert profiler.top()[0]["count"] == 1
@@ -0,0 +1,31 @@
+import bcrypt
+
+from utils.jwt import (
+    create_refresh_token,
+    hash_refresh_token,
+    refresh_token_fields,
+    split_refresh_token,
+    verify_refresh_token,
+)
+
+
+def test_split_token_verifies_against_its_digest():
+    token = create_refresh_token()
+    selector, verifier = split_refresh_token(token)
+    fields = refresh_token_fields(token)
+
+    assert fields["refresh_token_selector"] == selector
+    assert fields["refresh_token_hash"] == hash_refresh_token(token)
+    assert verifier not in fields["refresh_token_hash"]
+    assert verify_refresh_token(token, fields["refresh_token_hash"])
+    # Same selector, different verifier
+    assert not verify_refresh_token(f"{selector}.{create_refresh_token().split('.')[1]}", fields["refresh_token_hash"])
+
+
+def test_legacy_bcrypt_tokens_still_verify():
+    legacy = "legacy-token-without-selector"
+    hashed = bcrypt.hashpw(legacy.encode(), bcrypt.gensalt(4)).decode()
+
+    assert split_refresh_token(legacy) is None
+    assert verify_refresh_token(legacy, hashed)
+    assert not verify_refresh_token("something-else", hashed)
@@ -0,0 +1,69 @@
+import threading
+
+from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+import database
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def split_sessions(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path / 'split.db'}"
+    writer = database._sqlite_engine(pool_size=1, max_overflow=0, pool_timeout=2, url=url)
+    reader = database._sqlite_engine(pool_size=4, max_overflow=0, pool_timeout=2, read_only=True, url=url)
+    Base.metadata.create_all(writer)
+    monkeypatch.setattr(database, "engine", writer)
+    monkeypatch.setattr(database, "read_engine", reader)
+    return sessionmaker(bind=writer, class_=database.RoutingSession, expire_on_commit=False), writer
+
+
+def test_committed_session_releases_the_writer(monkeypatch, tmp_path):
+    Session, writer = split_sessions(monkeypatch, tmp_path)
+    first, second = Session(), Session()
+    try:
+        first.add(Item(name="a"))
+        first.commit()
+        # Reads after the commit go to the reader and see the committed row
+        assert first.execute(select(Item)).scalars().one().name == "a"
+        assert writer.pool.checkedout() == 0
+
+        second.add(Item(name="b"))
+        second.commit()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_concurrent_writers_take_turns(monkeypatch, tmp_path):
+    Session, writer = split_sessions(monkeypatch, tmp_path)
+    errors = []
+
+    def write(name):
+        db = Session()
+        try:
+            for i in range(5):
+                db.add(Item(name=f"{name}{i}"))
+                db.commit()
+                db.execute(select(Item)).all()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=write, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db = Session()
+    assert len(db.execute(select(Item)).all()) == 10
+    db.close()
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from utils import service_tokens
+from utils.service_tokens import (
+    generate_token,
+    hash_token,
+    invalidate_service_token,
+    verify_service_token,
+)
+
+
+def counting_verify():
+    calls = []
+    real = service_tokens.verify_token
+    return calls, lambda plain, hashed: calls.append(1) or real(plain, hashed)
+
+
+def test_verified_token_skips_bcrypt_until_invalidated():
+    token = generate_token()
+    hashed = hash_token(token)
+    calls, verify = counting_verify()
+    with patch.object(service_tokens, "verify_token", verify):
+        assert verify_service_token(9001, token, hashed)
+        assert verify_service_token(9001, token, hashed)
+        assert len(calls) == 1
+
+        invalidate_service_token(9001)
+        assert verify_service_token(9001, token, hashed)
+        assert len(calls) == 2
+
+
+def test_failures_are_not_cached():
+    hashed = hash_token(generate_token())
+    calls, verify = counting_verify()
+    with patch.object(service_tokens, "verify_token", verify):
+        assert not verify_service_token(9002, "wrong", hashed)
+        assert not verify_service_token(9002, "wrong", hashed)
+        assert len(calls) == 2
+
+
+def test_rotated_hash_retires_cached_token():
+    old, new = generate_token(), generate_token()
+    old_hash = hash_token(old)
+    assert verify_service_token(9003, old, old_hash)
+    # Rotation without explicit invalidation: the cached entry names the old hash
+    assert not verify_service_token(9003, old, hash_token(new))
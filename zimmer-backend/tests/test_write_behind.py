@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, func
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from write_behind import WriteBehindBuffer
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "events"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+def make_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_rows_are_written_in_bulk_with_event_time(tmp_path):
+    db = make_session(tmp_path)
+    buffer = WriteBehindBuffer(batch_size=1000, flush_interval=60, max_pending=1000)
+    try:
+        before = datetime.utcnow()
+        for i in range(50):
+            buffer.add(db, Event, {"kind": f"e{i}"})
+        # Staged on the session until its transaction commits
+        assert buffer.pending() == 0
+        db.commit()
+        assert db.query(Event).count() == 0
+        assert buffer.pending() == 50
+
+        assert buffer.flush() == 50
+        assert db.query(Event).count() == 50
+        assert db.query(Event).first().created_at >= before
+        assert buffer.snapshot()["flushes"] == 1
+    finally:
+        buffer.stop()
+
+
+def test_rows_of_a_rolled_back_transaction_are_never_queued(tmp_path):
+    db = make_session(tmp_path)
+    buffer = WriteBehindBuffer(batch_size=1000, flush_interval=60, max_pending=1000)
+    try:
+        db.query(Event).count()
+        buffer.add(db, Event, {"kind": "rolled back"})
+        db.rollback()
+        buffer.add(db, Event, {"kind": "closed"})
+        db.close()
+        db.commit()
+        assert buffer.snapshot()["enqueued"] == 0
+
+        buffer.stop()
+        assert db.query(Event).count() == 0
+    finally:
+        buffer.stop()
+
+
+def test_bad_row_is_dropped_alone(tmp_path):
+    db = make_session(tmp_path)
+    buffer = WriteBehindBuffer(batch_size=1000, flush_interval=60, max_pending=1000)
+    try:
+        buffer.add(db, Event, {"kind": "a"})
+        buffer.add(db, Event, {"kind": None})
+        buffer.add(db, Event, {"kind": "b"})
+        db.commit()
+        assert buffer.flush() == 2
+        snapshot = buffer.snapshot()
+        assert snapshot["dropped"] == 1 and snapshot["pending"] == 0
+        assert sorted(e.kind for e in db.query(Event)) == ["a", "b"]
+    finally:
+        buffer.stop()
+
+
+def test_disabled_buffer_adds_to_the_session(tmp_path):
+    db = make_session(tmp_path)
+    buffer = WriteBehindBuffer(enabled=False)
+    buffer.add(db, Event, {"kind": "sync"})
+    db.commit()
+    assert db.query(Event).one().kind == "sync"
+    assert buffer.snapshot()["enqueued"] == 0
+
+
+def single_writer_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}", pool_size=1, max_overflow=0, pool_timeout=0.1)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def test_pool_timeout_keeps_rows_queued(tmp_path):
+    engine, db = single_writer_session(tmp_path)
+    buffer = WriteBehindBuffer(batch_size=1000, flush_interval=60, max_pending=1000)
+    try:
+        buffer.add(db, Event, {"kind": "a"})
+        buffer.add(db, Event, {"kind": "b"})
+        db.commit()
+        held = engine.connect()
+        assert buffer.flush() == 0
+        snapshot = buffer.snapshot()
+        assert snapshot["pending"] == 2 and snapshot["pending_by_table"] == {"events": 2}
+        assert snapshot["dropped"] == 0 and snapshot["failed_flushes"] == 1
+        held.close()
+
+        assert buffer.flush() == 2
+        assert buffer.pending() == 0
+    finally:
+        buffer.stop()
+
+
+def test_full_queue_writes_through_the_callers_transaction(tmp_path):
+    engine, db = single_writer_session(tmp_path)
+    buffer = WriteBehindBuffer(batch_size=1000, flush_interval=60, max_pending=2)
+    try:
+        buffer.add(db, Event, {"kind": "a"})
+        buffer.add(db, Event, {"kind": "b"})
+        db.commit()
+
+        db.query(Event).count()  # the session now holds the only connection
+        for kind in "cde":
+            buffer.add(db, Event, {"kind": kind})
+        db.commit()
+        snapshot = buffer.snapshot()
+        # Neither flushed inline (the session holds the writer) nor dropped
+        assert snapshot["backpressure_writes"] == 3
+        assert snapshot["pending"] == 2 and snapshot["dropped"] == 0
+        assert sorted(e.kind for e in db.query(Event)) == ["c", "d", "e"]
+        db.close()
+
+        buffer.stop()
+        assert db.query(Event).count() == 5
+    finally:
+        buffer.stop()
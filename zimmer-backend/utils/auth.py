@@ -1,35 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import SessionLocal
+from database import get_db, get_async_db
 from models.user import User
+from utils.principal import Principal, resolve_principal, resolve_principal_async
 from utils.jwt import (
     verify_jwt_token, 
     get_current_user_id,
     decode_access_token,
     get_user_id_from_access_token,
+    get_principal_claims,
     is_admin_from_access_token
 )
 
 # Security scheme for Bearer token
 security = HTTPBearer(auto_error=False)
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
-    Get current user from JWT access token
+    Get current user from JWT access token (cached principal, no query on a hit)
     """
     try:
         # Require credentials - no development mode bypass
@@ -45,21 +40,24 @@ async def get_current_user(
         
         # Verify JWT access token using new system
         try:
-            user_id = get_user_id_from_access_token(token)
-            if user_id is None:
+            claims = get_principal_claims(token)
+            if claims is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid or expired access token",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.is_active:
+            user_id, auth_version = claims
+            principal = resolve_principal(
+                user_id, auth_version, lambda: db.query(User).filter(User.id == user_id).first()
+            )
+            if principal is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="User not found or inactive"
                 )
-            return user
+            return principal
         except HTTPException:
             raise
         except Exception as e:
@@ -76,7 +74,44 @@ async def get_current_user(
             detail=f"Authentication failed: {str(e)}"
         )
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user_async(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Same as ``get_current_user`` but loads the user without blocking the event loop
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    try:
+        claims = get_principal_claims(credentials.credentials)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token: {str(e)}"
+        )
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired access token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user_id, auth_version = claims
+    principal = await resolve_principal_async(user_id, auth_version, lambda: db.get(User, user_id))
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive"
+        )
+    return principal
+
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """
     Dependency to require admin privileges
     """
@@ -91,7 +126,7 @@ async def require_admin(current_user: User = Depends(get_current_user)) -> User:
 async def get_current_admin_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Get current admin user from JWT access token
     """
@@ -109,8 +144,8 @@ async def get_current_admin_user(
         
         # Verify JWT access token and check admin privileges
         try:
-            user_id = get_user_id_from_access_token(token)
-            if user_id is None:
+            claims = get_principal_claims(token)
+            if claims is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid or expired access token",
@@ -124,21 +159,24 @@ async def get_current_admin_user(
                     detail="Admin privileges required"
                 )
             
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.is_active:
+            user_id, auth_version = claims
+            principal = resolve_principal(
+                user_id, auth_version, lambda: db.query(User).filter(User.id == user_id).first()
+            )
+            if principal is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="User not found or inactive"
                 )
             
-            # Double-check admin privileges from database
-            if not user.is_admin:
+            # Double-check admin privileges against the current role
+            if not principal.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Admin privileges required"
                 )
                 
-            return user
+            return principal
         except HTTPException:
             raise
         except Exception as e:
@@ -3,34 +3,27 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import SessionLocal
+from database import get_db
 from models.user import User, UserRole
-from utils.jwt import get_user_id_from_access_token
+from utils.jwt import get_principal_claims
+from utils.principal import Principal, resolve_principal
 
 # Security scheme for JWT tokens
 security = HTTPBearer(auto_error=False)
 
-def get_db():
-    """Database session dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Get current authenticated user from JWT token
     
     Args:
         credentials: JWT token from Authorization header
-        db: Database session
+        db: Database session, only used when the principal is not cached
         
     Returns:
-        User object if authentication successful
+        Principal of the user if authentication successful
         
     Raises:
         HTTPException: If token is invalid or user not found
@@ -44,25 +37,28 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Extract user ID from token using new session-based validation
-        user_id = get_user_id_from_access_token(credentials.credentials)
-        if user_id is None:
+        # Extract user ID and auth version from token
+        claims = get_principal_claims(credentials.credentials)
+        if claims is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired access token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get user from database
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        # Get user from the principal cache, falling back to the database
+        user_id, auth_version = claims
+        principal = resolve_principal(
+            user_id, auth_version, lambda: db.query(User).filter(User.id == user_id).first()
+        )
+        if principal is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return user
+        return principal
         
     except HTTPException:
         raise
@@ -73,9 +69,39 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_manager_user(
-    current_user: User = Depends(get_current_user)
+def get_current_user_record(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ) -> User:
+    """
+    Get the current user's database row
+    
+    For handlers that change the user or read columns the principal leaves
+    out (password hash, 2FA secret).
+    
+    Args:
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        User object attached to ``db``
+        
+    Raises:
+        HTTPException: If the user no longer exists
+    """
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return user
+
+def get_current_manager_user(
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Get current authenticated manager user
     
@@ -83,7 +109,7 @@ def get_current_manager_user(
         current_user: Current authenticated user
         
     Returns:
-        User object if user is manager
+        Principal if user is manager
         
     Raises:
         HTTPException: If user is not manager
@@ -97,8 +123,8 @@ def get_current_manager_user(
     return current_user
 
 def get_current_technical_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Get current authenticated technical team user
     
@@ -106,7 +132,7 @@ def get_current_technical_user(
         current_user: Current authenticated user
         
     Returns:
-        User object if user is technical team or manager
+        Principal if user is technical team or manager
         
     Raises:
         HTTPException: If user is not technical team or manager
@@ -120,8 +146,8 @@ def get_current_technical_user(
     return current_user
 
 def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Get current authenticated admin user (manager or technical team)
     
@@ -129,7 +155,7 @@ def get_current_admin_user(
         current_user: Current authenticated user
         
     Returns:
-        User object if user is manager or technical team
+        Principal if user is manager or technical team
         
     Raises:
         HTTPException: If user is not manager or technical team
@@ -8,153 +8,70 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 import time
-from functools import lru_cache
 
-from database import SessionLocal
+from database import get_db
 from models.user import User
-from utils.jwt import (
-    verify_jwt_token, 
-    get_current_user_id,
-    decode_access_token,
-    get_user_id_from_access_token,
-    is_admin_from_access_token
-)
-from cache_manager import cache_manager
+from utils.jwt import get_principal_claims
+from utils.principal import Principal, resolve_principal, invalidate_principal
 
 # Security scheme for Bearer token
 security = HTTPBearer(auto_error=False)
 
-# Cache TTL for user data (5 minutes)
-USER_CACHE_TTL = 300
-
-def get_db():
-    """Database session dependency with connection pooling optimization"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@lru_cache(maxsize=1000)
-def get_cached_user_by_id(user_id: int) -> Optional[dict]:
-    """Get user data from cache with LRU caching"""
-    cache_key = f"user_data_{user_id}"
-    cached_user = cache_manager.get(cache_key)
-    
-    if cached_user:
-        return cached_user
-    
-    # If not in cache, fetch from database
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user_data = {
-                "id": user.id,
-                "email": user.email,
-                "name": user.name,
-                "role": user.role,
-                "is_active": user.is_active,
-                "is_admin": user.is_admin,
-                "created_at": user.created_at.isoformat() if user.created_at else None
-            }
-            cache_manager.set(cache_key, user_data, ttl=USER_CACHE_TTL)
-            return user_data
-    finally:
-        db.close()
-    
-    return None
-
 def invalidate_user_cache(user_id: int):
-    """Invalidate user cache when user data changes"""
-    cache_key = f"user_data_{user_id}"
-    cache_manager.delete(cache_key)
-    # Also clear LRU cache
-    get_cached_user_by_id.cache_clear()
+    """Invalidate the cached principal when user data changes"""
+    invalidate_principal(user_id)
 
-async def get_current_user_optimized(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Optimized get current user with caching and performance improvements
-    """
+def _principal_from_credentials(
+    credentials: Optional[HTTPAuthorizationCredentials],
+    db: Session
+) -> Principal:
+    """Resolve the bearer token to a cached principal, querying only on a miss"""
+    # Require credentials - no development mode bypass
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     try:
-        # Require credentials - no development mode bypass
-        if credentials is None:
+        claims = get_principal_claims(credentials.credentials)
+        if claims is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
+                detail="Invalid or expired access token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Parse JWT token
-        token = credentials.credentials
-        
-        # Verify JWT access token using optimized system
-        try:
-            user_id = get_user_id_from_access_token(token)
-            if user_id is None:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired access token",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            
-            # Try to get user from cache first
-            user_data = get_cached_user_by_id(user_id)
-            if user_data:
-                # Create User object from cached data
-                user = User()
-                user.id = user_data["id"]
-                user.email = user_data["email"]
-                user.name = user_data["name"]
-                user.role = user_data["role"]
-                user.is_active = user_data["is_active"]
-                user.is_admin = user_data["is_admin"]
-                user.created_at = user_data["created_at"]
-                return user
-            
-            # Fallback to database if not in cache
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User not found or inactive"
-                )
-            
-            # Cache the user data for future requests
-            user_data = {
-                "id": user.id,
-                "email": user.email,
-                "name": user.name,
-                "role": user.role,
-                "is_active": user.is_active,
-                "is_admin": user.is_admin,
-                "created_at": user.created_at.isoformat() if user.created_at else None
-            }
-            cache_key = f"user_data_{user_id}"
-            cache_manager.set(cache_key, user_data, ttl=USER_CACHE_TTL)
-            
-            return user
-            
-        except HTTPException:
-            raise
-        except Exception as e:
+        user_id, auth_version = claims
+        principal = resolve_principal(
+            user_id, auth_version, lambda: db.query(User).filter(User.id == user_id).first()
+        )
+        if principal is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Invalid token: {str(e)}"
+                detail="User not found or inactive"
             )
-            
+        return principal
+        
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Authentication failed: {str(e)}"
+            detail=f"Invalid token: {str(e)}"
         )
 
-async def require_admin_optimized(current_user: User = Depends(get_current_user_optimized)) -> User:
+async def get_current_user_optimized(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Optimized get current user backed by the shared principal cache
+    """
+    return _principal_from_credentials(credentials, db)
+
+async def require_admin_optimized(current_user: Principal = Depends(get_current_user_optimized)) -> Principal:
     """
     Optimized dependency to require admin privileges
     """
@@ -168,97 +85,17 @@ async def require_admin_optimized(current_user: User = Depends(get_current_user_
 async def get_current_admin_user_optimized(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
-    Optimized get current admin user with caching
+    Optimized get current admin user backed by the shared principal cache
     """
-    try:
-        # Require credentials
-        if credentials is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Parse JWT token
-        token = credentials.credentials
-        
-        # Verify JWT access token
-        try:
-            user_id = get_user_id_from_access_token(token)
-            if user_id is None:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired access token",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            
-            # Try to get user from cache first
-            user_data = get_cached_user_by_id(user_id)
-            if user_data:
-                # Check if user is admin
-                if not user_data.get("is_admin", False):
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Admin privileges required"
-                    )
-                
-                # Create User object from cached data
-                user = User()
-                user.id = user_data["id"]
-                user.email = user_data["email"]
-                user.name = user_data["name"]
-                user.role = user_data["role"]
-                user.is_active = user_data["is_active"]
-                user.is_admin = user_data["is_admin"]
-                user.created_at = user_data["created_at"]
-                return user
-            
-            # Fallback to database if not in cache
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User not found or inactive"
-                )
-            
-            if not user.is_admin:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Admin privileges required"
-                )
-            
-            # Cache the user data for future requests
-            user_data = {
-                "id": user.id,
-                "email": user.email,
-                "name": user.name,
-                "role": user.role,
-                "is_active": user.is_active,
-                "is_admin": user.is_admin,
-                "created_at": user.created_at.isoformat() if user.created_at else None
-            }
-            cache_key = f"user_data_{user_id}"
-            cache_manager.set(cache_key, user_data, ttl=USER_CACHE_TTL)
-            
-            return user
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Invalid token: {str(e)}"
-            )
-            
-    except HTTPException:
-        raise
-    except Exception as e:
+    principal = _principal_from_credentials(credentials, db)
+    if not principal.is_admin:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Authentication failed: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
         )
+    return principal
 
 # Rate limiting for authentication endpoints
 from collections import defaultdict
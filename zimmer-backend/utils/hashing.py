@@ -0,0 +1,24 @@
+"""
+bcrypt primitives for the hash executor's worker processes.
+
+A worker imports the module of every function it is sent, so this one
+imports nothing from the application: no cache backends, Redis clients or
+settings get set up again in each worker. Submit these to
+``hash_executor.run``, not the wrappers in utils.security,
+utils.service_tokens or utils.jwt.
+"""
+
+import bcrypt
+
+
+def bcrypt_hash(secret: str) -> str:
+    """bcrypt hash of ``secret`` with a fresh salt"""
+    return bcrypt.hashpw(secret.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def bcrypt_verify(secret: str, hashed: str) -> bool:
+    """Whether ``secret`` matches ``hashed``; False for malformed hashes"""
+    try:
+        return bcrypt.checkpw(secret.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
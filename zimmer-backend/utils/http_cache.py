@@ -0,0 +1,93 @@
+"""
+Conditional GET support for read-heavy JSON endpoints.
+
+Two ways to get a strong ETag:
+- from the payload itself (``json_response``), cheap when the payload
+  already comes from the cache;
+- from per-resource version tokens (``versioned_etag``), which lets a
+  handler answer ``304`` before running any query. A version token is a
+  cache entry tagged with the resource, so ``cache.invalidate_tag`` on that
+  resource also rotates its version. Tokens are only used with a shared
+  cache backend: a per-worker one would leave the other workers on the old
+  version, answering 304 for data that changed.
+"""
+
+import hashlib
+import json
+import uuid
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from cache_manager import cache
+
+VERSION_TTL = 24 * 3600
+
+# Cache-Control directives per route family
+PRIVATE_REVALIDATE = "private, no-cache"
+PUBLIC_SHORT = "public, max-age=60"
+
+def resource_version(resource: str) -> str:
+    """Current version token for ``resource``, created on first use"""
+    key = f"version:{resource}"
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, VERSION_TTL, tags=[resource])
+    return version
+
+def versioned_etag(request: Request, *resources: str) -> Optional[str]:
+    """ETag for the request URL under the current versions of ``resources``.
+
+    None when the cache is per-worker; the handler then builds the response
+    and ``json_response`` derives the ETag from the body.
+    """
+    if not cache.shared:
+        return None
+    parts = [request.url.path, request.url.query] + [resource_version(r) for r in resources]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f'"v{digest[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match, as RFC 9110 requires for GET"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+def _validator_headers(etag: str, cache_control: str) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Authorization, Cookie"
+    return headers
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Bodyless 304 carrying the validators"""
+    return Response(status_code=304, headers=_validator_headers(etag, cache_control))
+
+def json_response(
+    request: Request,
+    payload: Any,
+    cache_control: str,
+    etag: Optional[str] = None
+) -> Response:
+    """Serialize ``payload`` and answer 304 if the client already has it.
+
+    Without an explicit ``etag`` one is derived from the serialized body.
+    """
+    body = json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    if etag is None:
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=_validator_headers(etag, cache_control)
+    )
@@ -1,12 +1,19 @@
 import jwt
 import os
+import hmac
+import time
+import hashlib
 import secrets
-import bcrypt
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
 
+from cache_backends import InMemoryBackend
+from cache_metrics import cache_metrics
+from hash_executor import hash_executor
+from utils.hashing import bcrypt_verify
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +30,10 @@ ACCESS_TOKEN_TTL_MIN = int(os.getenv("ACCESS_TOKEN_TTL_MIN", "15"))
 REFRESH_TOKEN_TTL_DAYS = int(os.getenv("REFRESH_TOKEN_TTL_DAYS", "7"))
 SESSION_IDLE_TIMEOUT_MIN = int(os.getenv("SESSION_IDLE_TIMEOUT_MIN", "120"))
 JWT_ALGORITHM = os.getenv("JWT_ALG", "HS256")
+# Random bytes in the indexed selector half of a refresh token
+REFRESH_SELECTOR_BYTES = 12
+# Verified access tokens remembered per worker until they expire
+JWT_CLAIMS_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CLAIMS_CACHE_MAX_ENTRIES", "10000"))
 
 # Legacy support
 JWT_EXPIRY_DAYS = 7
@@ -119,7 +130,8 @@ def get_current_user_id(token: str) -> int:
 
 
 # New session-based token functions
-def create_access_token(user_id: int, is_admin: bool, ttl_minutes: Optional[int] = None) -> str:
+def create_access_token(user_id: int, is_admin: bool, ttl_minutes: Optional[int] = None,
+                        auth_version: int = 0) -> str:
     """
     Create a short-lived access token
     
@@ -127,6 +139,7 @@ def create_access_token(user_id: int, is_admin: bool, ttl_minutes: Optional[int]
         user_id: User ID to include in token
         is_admin: Whether user has admin privileges
         ttl_minutes: Token TTL in minutes (defaults to ACCESS_TOKEN_TTL_MIN)
+        auth_version: The user's current auth_version
         
     Returns:
         JWT access token string
@@ -138,6 +151,7 @@ def create_access_token(user_id: int, is_admin: bool, ttl_minutes: Optional[int]
         "sub": str(user_id),  # Standard JWT subject claim
         "type": "access",
         "is_admin": is_admin,
+        "av": auth_version,
         "exp": datetime.utcnow() + timedelta(minutes=ttl_minutes),
         "iat": datetime.utcnow()
     }
@@ -148,57 +162,98 @@ def create_access_token(user_id: int, is_admin: bool, ttl_minutes: Optional[int]
 
 def create_refresh_token() -> str:
     """
-    Create a cryptographically secure refresh token
+    Create a cryptographically secure split refresh token
     
     Returns:
-        Random 256-bit base64-encoded refresh token
+        "<selector>.<verifier>": a random 96-bit selector that finds the
+        session through an index and a random 256-bit verifier that proves
+        possession of it
     """
-    # Generate 32 bytes (256 bits) of random data
-    random_bytes = secrets.token_bytes(32)
-    # Encode as base64 for safe storage in cookies
-    return secrets.token_urlsafe(32)
+    return f"{secrets.token_urlsafe(REFRESH_SELECTOR_BYTES)}.{secrets.token_urlsafe(32)}"
+
+
+def split_refresh_token(plain_token: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a refresh token into selector and verifier
+    
+    Returns:
+        (selector, verifier), or None for a legacy single-part token
+    """
+    selector, dot, verifier = plain_token.partition(".")
+    if not dot or not selector or not verifier:
+        return None
+    return selector, verifier
+
+
+def _digest(verifier: str) -> str:
+    return hashlib.sha256(verifier.encode('utf-8')).hexdigest()
 
 
 def hash_refresh_token(plain_token: str) -> str:
     """
-    Hash a refresh token using bcrypt for secure storage
+    Hash a refresh token for storage
     
     Args:
-        plain_token: Plain refresh token
+        plain_token: Plain refresh token from ``create_refresh_token``
         
     Returns:
-        Bcrypt hash of the token
+        SHA-256 hex digest of the verifier part. The verifier is 256 random
+        bits, so a fast hash is as strong as bcrypt here and costs
+        microseconds instead of ~250ms.
     """
-    # Convert string to bytes for bcrypt
-    token_bytes = plain_token.encode('utf-8')
-    # Hash with bcrypt (cost factor 12)
-    hashed = bcrypt.hashpw(token_bytes, bcrypt.gensalt(12))
-    return hashed.decode('utf-8')
+    parts = split_refresh_token(plain_token)
+    if parts is None:
+        raise ValueError("refresh token has no selector")
+    return _digest(parts[1])
+
+
+def refresh_token_fields(plain_token: str) -> Dict[str, str]:
+    """
+    Session columns that store a refresh token:
+    ``UserSession(**refresh_token_fields(token), ...)``
+    """
+    selector, _ = split_refresh_token(plain_token)
+    return {
+        "refresh_token_selector": selector,
+        "refresh_token_hash": hash_refresh_token(plain_token)
+    }
 
 
 def verify_refresh_token(plain_token: str, hashed_token: str) -> bool:
     """
-    Verify a refresh token against its hash (constant-time comparison)
+    Verify a refresh token against its stored hash (constant-time comparison)
     
     Args:
         plain_token: Plain refresh token
-        hashed_token: Bcrypt hash of the token
+        hashed_token: SHA-256 digest of the verifier, or the bcrypt hash of a
+            whole legacy token
         
     Returns:
         True if token matches hash, False otherwise
     """
     try:
-        # Convert strings to bytes for bcrypt
-        plain_bytes = plain_token.encode('utf-8')
-        hashed_bytes = hashed_token.encode('utf-8')
-        # Use bcrypt's constant-time comparison
-        return bcrypt.checkpw(plain_bytes, hashed_bytes)
+        if hashed_token.startswith("$2"):
+            # Legacy session issued before split tokens
+            return bcrypt_verify(plain_token, hashed_token)
+        parts = split_refresh_token(plain_token)
+        if parts is None:
+            return False
+        return hmac.compare_digest(_digest(parts[1]), hashed_token)
     except Exception:
         # If any error occurs during verification, return False
         return False
 
 
-
+async def verify_refresh_token_async(plain_token: str, hashed_token: str) -> bool:
+    """
+    ``verify_refresh_token`` for async handlers
+    
+    Legacy bcrypt hashes are checked in the hash executor's process pool;
+    split-token digests are cheap and compared inline.
+    """
+    if hashed_token and hashed_token.startswith("$2"):
+        return await hash_executor.run(bcrypt_verify, plain_token, hashed_token)
+    return verify_refresh_token(plain_token, hashed_token)
 
 
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
@@ -242,38 +297,126 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def get_user_id_from_access_token(token: str) -> Optional[int]:
+class AccessClaims:
+    """What the auth layer reads from a verified access token, in either format"""
+    
+    __slots__ = ("user_id", "is_admin", "auth_version", "expires_at")
+    
+    def __init__(self, user_id: int, is_admin: bool, auth_version: int, expires_at: Optional[float]):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.auth_version = auth_version
+        self.expires_at = expires_at
+
+
+def _parse_access_token(token: str) -> Optional[AccessClaims]:
     """
-    Extract user ID from access token
+    Verify a token once and read its claims
     
-    Args:
-        token: JWT access token string
-        
-    Returns:
-        User ID if token is valid, None otherwise
+    Accepts the current format (``sub``/``type``/``is_admin``/``av``) and
+    the legacy one with a nested ``user`` object, from a single decode.
     """
-    # Try new format first (with sub field)
-    payload = decode_access_token(token)
-    if payload is not None:
+    try:
+        payload = jwt.decode(
+            token,
+            JWT_SECRET_KEY,
+            algorithms=[JWT_ALGORITHM],
+            options={"verify_signature": True, "verify_exp": True, "verify_iat": True}
+        )
+    except Exception:
+        # Expired, invalid or malformed token
+        return None
+    
+    expires_at = payload.get("exp")
+    
+    # Current format (with sub field)
+    if payload.get("type") == "access" and all(claim in payload for claim in ("exp", "iat", "sub")):
         try:
             user_id = int(payload.get("sub", ""))
-            return user_id if user_id > 0 else None
+            if user_id > 0:
+                return AccessClaims(user_id, bool(payload.get("is_admin", False)),
+                                    int(payload.get("av", 0)), expires_at)
         except (ValueError, TypeError):
             pass
     
-    # Try legacy format (with nested user object)
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        user = payload.get("user")
-        if user and "id" in user:
+    # Legacy format (with nested user object)
+    user = payload.get("user")
+    if isinstance(user, dict) and "id" in user:
+        try:
             user_id = int(user["id"])
-            return user_id if user_id > 0 else None
-    except (jwt.InvalidTokenError, ValueError, TypeError):
-        pass
+        except (ValueError, TypeError):
+            return None
+        if user_id > 0:
+            # Admin roles are manager and technical_team
+            return AccessClaims(user_id, user.get("role") in ["manager", "technical_team"], 0, expires_at)
     
     return None
 
 
+_claims_cache = InMemoryBackend(max_entries=JWT_CLAIMS_CACHE_MAX_ENTRIES)
+_claims_cache.set_observer(cache_metrics)
+
+
+def verify_access_claims(token: str) -> Optional[AccessClaims]:
+    """
+    Claims of a valid access token
+    
+    The signature is checked once per token: the result is cached under a
+    digest of the token and evicted at the token's ``exp``, so the many
+    requests made with one token during its lifetime skip the HMAC and
+    JSON work. Invalid tokens are never cached.
+    
+    Args:
+        token: JWT access token string
+        
+    Returns:
+        AccessClaims if token is valid, None otherwise
+    """
+    key = "jwt_claims:" + hashlib.sha256(token.encode()).hexdigest()
+    started = time.perf_counter()
+    claims = _claims_cache.get(key)
+    cache_metrics.record_lookup(key, claims is not None, time.perf_counter() - started)
+    if claims is not None:
+        return claims if claims.expires_at > time.time() else None
+    
+    claims = _parse_access_token(token)
+    if claims is not None and claims.expires_at is not None:
+        ttl = claims.expires_at - time.time()
+        if ttl > 0:
+            _claims_cache.set(key, claims, ttl)
+            cache_metrics.record_set(key)
+    return claims
+
+
+def get_user_id_from_access_token(token: str) -> Optional[int]:
+    """
+    Extract user ID from access token
+    
+    Args:
+        token: JWT access token string
+        
+    Returns:
+        User ID if token is valid, None otherwise
+    """
+    claims = verify_access_claims(token)
+    return claims.user_id if claims is not None else None
+
+
+def get_principal_claims(token: str) -> Optional[Tuple[int, int]]:
+    """
+    Extract user ID and auth version from access token
+    
+    Args:
+        token: JWT access token string
+        
+    Returns:
+        ``(user_id, auth_version)`` if token is valid, None otherwise.
+        Tokens issued before auth versions existed count as version 0.
+    """
+    claims = verify_access_claims(token)
+    return (claims.user_id, claims.auth_version) if claims is not None else None
+
+
 def is_admin_from_access_token(token: str) -> bool:
     """
     Check if user has admin privileges from access token
@@ -284,20 +427,5 @@ def is_admin_from_access_token(token: str) -> bool:
     Returns:
         True if user is admin, False otherwise
     """
-    # Try new format first (with sub field)
-    payload = decode_access_token(token)
-    if payload is not None:
-        return payload.get("is_admin", False)
-    
-    # Try legacy format (with nested user object)
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        user = payload.get("user")
-        if user and "role" in user:
-            role = user["role"]
-            # Admin roles are manager and technical_team
-            return role in ["manager", "technical_team"]
-    except (jwt.InvalidTokenError, ValueError, TypeError):
-        pass
-    
-    return False 
\ No newline at end of file
+    claims = verify_access_claims(token)
+    return claims.is_admin if claims is not None else False 
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination for list endpoints: pages continue from the sort
+key of the last row instead of an OFFSET, so deep pages cost the same as the
+first one. Cursors are opaque tokens; totals can be exact, approximate or
+skipped.
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import and_, literal, or_, text
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import operators
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Approximate counts stop counting here and report the total as an estimate
+APPROXIMATE_COUNT_CAP = 10000
+
+COUNT_MODES = ("exact", "approximate", "none")
+
+
+def _encode_value(value: Any) -> List[Any]:
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    return ["v", value]
+
+
+def _decode_value(item: Any) -> Any:
+    kind, value = item
+    if kind == "dt":
+        return datetime.fromisoformat(value)
+    if kind == "v" and (value is None or isinstance(value, (int, float, str, bool))):
+        return value
+    raise ValueError(f"unknown cursor value {kind!r}")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> Tuple[Any, ...]:
+    """Sort key stored in ``token``; 400 for anything that was not issued here"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        items = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(items, list) or len(items) != size:
+            raise ValueError("cursor does not match this listing")
+        return tuple(_decode_value(item) for item in items)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        logger.debug(f"Rejected pagination cursor {token[:40]!r}: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+class PageParams:
+    """``cursor``, ``limit`` and ``count`` query parameters: ``page: PageParams = Depends()``"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Records per page"),
+        count: str = Query("approximate", pattern=f"^({'|'.join(COUNT_MODES)})$",
+                           description="Total count: exact, approximate (capped) or none")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.count = count
+
+
+class Page:
+    """One page of rows plus what the client needs to fetch the next"""
+
+    def __init__(self, items: List[Any], next_cursor: Optional[str],
+                 total: Optional[int] = None, total_is_estimate: bool = False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+
+class Keyset:
+    """Sort order of a listing, which doubles as its cursor.
+
+    Built from ordering expressions whose last one is unique, e.g.
+    ``Keyset(Payment.created_at.desc(), Payment.id.desc())``.
+    """
+
+    def __init__(self, *order_by, key: Optional[Callable[[Any], Tuple[Any, ...]]] = None):
+        self.order_by = order_by
+        self.columns = []
+        self.descending = []
+        for clause in order_by:
+            modifier = getattr(clause, "modifier", None)
+            self.columns.append(clause.element if modifier in (operators.desc_op, operators.asc_op) else clause)
+            self.descending.append(modifier is operators.desc_op)
+        self._key = key
+
+    def key(self, row: Any) -> Tuple[Any, ...]:
+        """Sort key of a result row (an entity, or a row whose first element is one)"""
+        if self._key is not None:
+            return self._key(row)
+        entity = row[0] if isinstance(row, Row) else row
+        return tuple(getattr(entity, column.key) for column in self.columns)
+
+    def after(self, values: Sequence[Any]):
+        """Rows strictly after ``values`` in this order"""
+        # Bound parameters, so booleans compare with < and > like any other value
+        values = [literal(value, column.type) for column, value in zip(self.columns, values)]
+        alternatives = []
+        for position, (column, descending) in enumerate(zip(self.columns, self.descending)):
+            value = values[position]
+            equal = [c == v for c, v in zip(self.columns[:position], values[:position])]
+            alternatives.append(and_(*equal, column < value if descending else column > value))
+        # The redundant bound on the leading column turns the OR into an index range scan
+        leading, descending = self.columns[0], self.descending[0]
+        return and_(leading <= values[0] if descending else leading >= values[0], or_(*alternatives))
+
+    def apply(self, statement, cursor: Optional[str], limit: int):
+        """Order, seek and limit a ``Query`` or ``select()``; one extra row reveals the next page"""
+        statement = statement.order_by(*self.order_by)
+        if cursor:
+            statement = statement.where(self.after(decode_cursor(cursor, len(self.columns))))
+        return statement.limit(limit + 1)
+
+    def page(self, rows: List[Any], limit: int) -> Page:
+        """Trim the probe row and build the cursor of the next page"""
+        rows = list(rows)
+        if len(rows) <= limit:
+            return Page(rows, None)
+        rows = rows[:limit]
+        return Page(rows, encode_cursor(self.key(rows[-1])))
+
+
+def count_rows(query, mode: str = "approximate") -> Tuple[Optional[int], bool]:
+    """Total for a listing ``Query`` as ``(total, is_estimate)``.
+
+    ``approximate`` reads the planner's row estimate for an unfiltered
+    listing on PostgreSQL and otherwise counts at most
+    ``APPROXIMATE_COUNT_CAP`` rows, so the cost stays bounded as tables grow.
+    """
+    if mode == "none":
+        return None, False
+    query = query.order_by(None)
+    if mode == "exact":
+        return query.count(), False
+
+    session = query.session
+    # session.bind rather than get_bind(): a bare get_bind() pins RoutingSession to the writer
+    bind = session.bind or session.get_bind()
+    if query.whereclause is None and bind.dialect.name == "postgresql":
+        entity = query.column_descriptions[0]["entity"]
+        table = getattr(entity, "__tablename__", None)
+        if table:
+            estimate = session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": table}
+            ).scalar()
+            # -1 / 0 until the table has been analyzed
+            if estimate and estimate > APPROXIMATE_COUNT_CAP:
+                return int(estimate), True
+
+    total = query.limit(APPROXIMATE_COUNT_CAP + 1).count()
+    if total > APPROXIMATE_COUNT_CAP:
+        return APPROXIMATE_COUNT_CAP, True
+    return total, False
+
+
+def paginate(query, keyset: Keyset, params: PageParams) -> Page:
+    """Run one page of a sync ``Query`` together with its total"""
+    total, estimate = count_rows(query, params.count)
+    page = keyset.page(keyset.apply(query, params.cursor, params.limit).all(), params.limit)
+    page.total, page.total_is_estimate = total, estimate
+    return page
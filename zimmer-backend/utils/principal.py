@@ -0,0 +1,179 @@
+"""
+Principal cache for authenticated requests: the identity and role fields
+the auth dependencies hand to route handlers, cached in the shared cache per
+user id and auth_version so most requests authenticate without a query.
+
+Only a shared backend (redis, tiered) is used for this: invalidations on a
+per-worker memory cache never reach the other workers, which would keep
+serving a deactivated or demoted user's principal until it expired. With
+that backend every request loads the user row, as before.
+"""
+
+import os
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from cache_manager import cache, negative_cache, USER_NS
+from models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+# User columns copied into the principal; changing any of them drops it
+PRINCIPAL_FIELDS = (
+    "id", "name", "email", "phone_number", "role", "is_active", "created_at",
+    "email_verified_at", "twofa_enabled", "auth_version"
+)
+# Changing one of these also bumps auth_version, which retires access tokens
+# issued before the change
+REVOKING_FIELDS = ("role", "is_active", "password_hash")
+
+
+class Principal:
+    """Read-only snapshot of the authenticated user.
+
+    Carries no password hash, 2FA secret or relationships and is not
+    attached to a session: handlers that change the user or need other
+    columns load the ``User`` row (``get_current_user_record``).
+    """
+
+    __slots__ = PRINCIPAL_FIELDS
+
+    def __init__(self, **values: Any):
+        for field in PRINCIPAL_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(**{field: getattr(user, field) for field in PRINCIPAL_FIELDS})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Principal is read-only; load the User row to change {name!r}")
+
+    def __reduce__(self):
+        # Rebuilt through __init__ because __setattr__ refuses writes
+        return (_restore_principal, (self.to_dict(),))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in PRINCIPAL_FIELDS}
+
+    @property
+    def is_admin(self) -> bool:
+        """Same rule as ``User.is_admin``"""
+        return self.role in [UserRole.manager, UserRole.technical_team, UserRole.support_staff]
+
+    @property
+    def email_verified(self) -> bool:
+        return self.email_verified_at is not None
+
+    def __repr__(self) -> str:
+        return f"<Principal id={self.id} role={self.role} auth_version={self.auth_version}>"
+
+
+def _restore_principal(values: Dict[str, Any]) -> Principal:
+    return Principal(**values)
+
+
+def principal_tag(user_id: int) -> str:
+    """Tag shared by every cached principal of a user, whatever its version"""
+    return f"principal:{user_id}"
+
+
+def _principal_key(user_id: int, auth_version: int) -> str:
+    return f"principal:{user_id}:{auth_version}"
+
+
+def _cached(user_id: int, auth_version: int) -> Optional[Principal]:
+    if not cache.shared:
+        return None
+    return cache.get(_principal_key(user_id, auth_version))
+
+
+def _store(user: User) -> Principal:
+    principal = Principal.from_user(user)
+    if not cache.shared:
+        return principal
+    cache.set(
+        _principal_key(principal.id, principal.auth_version or 0), principal,
+        ttl=PRINCIPAL_CACHE_TTL, tags=[principal_tag(principal.id)]
+    )
+    return principal
+
+
+def _accept(principal: Optional[Principal], auth_version: int) -> Optional[Principal]:
+    if principal is None or not principal.is_active:
+        return None
+    # The token predates a role, active-flag or password change
+    if (principal.auth_version or 0) != auth_version:
+        return None
+    return principal
+
+
+def resolve_principal(user_id: int, auth_version: int,
+                      load: Callable[[], Optional[User]]) -> Optional[Principal]:
+    """Principal for a token's ``(user_id, auth_version)`` claims.
+
+    ``load`` fetches the ``User`` row on a cache miss. Returns None when
+    the user is missing or inactive, or the token was issued at an older
+    auth_version.
+    """
+    principal = _cached(user_id, auth_version)
+    if principal is None:
+        user = negative_cache.lookup(USER_NS, user_id, load)
+        principal = _store(user) if user is not None else None
+    return _accept(principal, auth_version)
+
+
+async def resolve_principal_async(user_id: int, auth_version: int,
+                                  load: Callable[[], Awaitable[Optional[User]]]) -> Optional[Principal]:
+    """``resolve_principal`` for coroutine loaders"""
+    principal = _cached(user_id, auth_version)
+    if principal is None:
+        user = await negative_cache.lookup_async(USER_NS, user_id, load)
+        principal = _store(user) if user is not None else None
+    return _accept(principal, auth_version)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop every cached principal of ``user_id``"""
+    cache.invalidate_tag(principal_tag(user_id))
+
+
+# Explicit invalidation on every write path that goes through the ORM: the
+# flush bumps auth_version for revoking changes, and cached principals are
+# dropped once the change is committed so a concurrent miss cannot re-cache
+# the old row after the fact. Bulk query.update() calls bypass this.
+
+_PENDING_KEY = "principal_invalidations"
+
+
+@event.listens_for(Session, "before_flush")
+def _track_user_changes(session, flush_context, instances) -> None:
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+        if obj not in session.deleted and changed & set(REVOKING_FIELDS) and "auth_version" not in changed:
+            obj.auth_version = (obj.auth_version or 0) + 1
+            changed.add("auth_version")
+        if obj in session.deleted or changed & set(PRINCIPAL_FIELDS):
+            session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        try:
+            invalidate_principal(user_id)
+        except Exception as e:
+            logger.error(f"Failed to invalidate principal for user {user_id}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
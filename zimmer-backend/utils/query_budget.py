@@ -0,0 +1,122 @@
+"""
+Per-request SQL accounting: statement count, a query budget per route and
+detection of repeated identical statements (N+1 patterns)
+"""
+
+import os
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "50"))
+# Same statement text this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+# "log" in production, "raise" in tests so regressions fail loudly
+QUERY_BUDGET_MODE = os.getenv("DB_QUERY_BUDGET_MODE", "log").lower()
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in ``raise`` mode when a request runs too many statements"""
+
+class RequestQueryStats:
+    """Statements executed on behalf of one request"""
+
+    def __init__(self, path: str, budget: int = DEFAULT_QUERY_BUDGET):
+        self.path = path
+        self.budget = budget
+        self.count = 0
+        self.shapes: Counter = Counter()
+        self.flagged: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.shapes[statement] += 1
+        repeats = self.shapes[statement]
+
+        if repeats == N_PLUS_ONE_THRESHOLD:
+            self.flagged.append(statement)
+            message = (
+                f"Possible N+1 on {self.path}: statement ran {repeats} times: "
+                f"{' '.join(statement.split())[:200]}"
+            )
+            if QUERY_BUDGET_MODE == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        if self.count == self.budget + 1:
+            message = f"{self.path} exceeded its query budget of {self.budget}"
+            if QUERY_BUDGET_MODE == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "queries": self.count,
+            "budget": self.budget,
+            "repeated": {s: n for s, n in self.shapes.items() if n >= N_PLUS_ONE_THRESHOLD}
+        }
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+_suspended: ContextVar[bool] = ContextVar("query_tracking_suspended", default=False)
+
+def tracking_suspended() -> bool:
+    """Whether statements run now are inside ``suspend_tracking``"""
+    return _suspended.get()
+
+@contextmanager
+def suspend_tracking():
+    """Leave the statements run inside this block out of the request
+    accounting and the slow-query log"""
+    token = _current.set(None)
+    suspended = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(suspended)
+        _current.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement)
+
+def install_query_tracking(engine) -> None:
+    """Count statements run on ``engine`` (sync or async) against the current request"""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+
+def query_budget(limit: int) -> Callable[[], None]:
+    """Route dependency overriding the default budget:
+    ``dependencies=[Depends(query_budget(10))]``
+    """
+    def set_budget() -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = limit
+    return set_budget
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    """Opens the per-request accounting and reports it as ``X-DB-Queries``"""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestQueryStats(request.url.path)
+        token = _current.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+        response.headers["X-DB-Queries"] = str(stats.count)
+        return response
@@ -0,0 +1,185 @@
+"""
+Slow-query log: every statement is timed and grouped by fingerprint
+(literals and bind parameters stripped), with an EXPLAIN sample captured
+for fingerprints that cross the slow threshold
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from cache_metrics import Histogram
+from utils.query_budget import tracking_suspended
+
+logger = logging.getLogger(__name__)
+
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# A fingerprint's plan is captured again at most this often
+PLAN_REFRESH_SECONDS = float(os.getenv("SLOW_QUERY_PLAN_REFRESH", "600"))
+MAX_FINGERPRINTS = 500
+OTHER_FINGERPRINT = "<other>"
+
+# Histogram bounds in seconds
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Statement shape with literals, bind parameters and IN-list lengths removed.
+
+    ``SELECT * FROM users WHERE id = 42`` and ``... WHERE id = ?`` share
+    ``SELECT * FROM users WHERE id = ?``; ``IN (?, ?, ?)`` becomes ``IN (...)``.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _BIND_PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class _FingerprintStats:
+    __slots__ = ("count", "slow", "time", "sample", "plan", "plan_captured_at", "last_seen")
+
+    def __init__(self):
+        self.count = 0
+        self.slow = 0
+        self.time = Histogram(QUERY_BUCKETS)
+        self.sample: Optional[str] = None
+        self.plan: Optional[List[str]] = None
+        self.plan_captured_at: Optional[float] = None
+        self.last_seen: Optional[float] = None
+
+
+class QueryProfiler:
+    """Per-fingerprint timings fed by engine cursor events"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.slow_seconds = slow_ms / 1000
+        self.max_fingerprints = max_fingerprints
+        self.started_at = time.time()
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine) -> None:
+        """Time every statement run on ``engine`` (sync or async)"""
+        target = getattr(engine, "sync_engine", engine)
+        if not event.contains(target, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if tracking_suspended():
+            return
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if tracking_suspended():
+            return
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        slow = elapsed >= self.slow_seconds
+        stats = self.record(statement, elapsed, slow)
+        if slow:
+            logger.warning(f"Slow query ({elapsed * 1000:.1f}ms): {' '.join(statement.split())[:300]}")
+            if not executemany and self._plan_due(stats):
+                self._capture_plan(conn, statement, parameters, stats)
+
+    def record(self, statement: str, seconds: float, slow: bool = False) -> _FingerprintStats:
+        shape = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    shape = OTHER_FINGERPRINT
+                    stats = self._stats.get(shape)
+                if stats is None:
+                    stats = self._stats[shape] = _FingerprintStats()
+            stats.count += 1
+            stats.time.observe(seconds)
+            stats.last_seen = time.time()
+            if slow:
+                stats.slow += 1
+                stats.sample = statement
+        return stats
+
+    @staticmethod
+    def _plan_due(stats: _FingerprintStats) -> bool:
+        return stats.plan_captured_at is None or time.time() - stats.plan_captured_at >= PLAN_REFRESH_SECONDS
+
+    def _capture_plan(self, conn, statement: str, parameters, stats: _FingerprintStats) -> None:
+        words = statement.split(None, 1)
+        if not words or words[0].upper() not in _EXPLAINABLE:
+            return
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        # A separate DBAPI cursor: the caller has not fetched its rows yet
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            stats.plan = [" | ".join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            stats.plan = [f"plan unavailable: {e}"]
+        finally:
+            cursor.close()
+            stats.plan_captured_at = time.time()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def top(self, limit: int = 20, sort: str = "total") -> List[Dict[str, Any]]:
+        """Hottest fingerprints by ``total``, ``p95``, ``max``, ``count`` or ``slow``"""
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": shape,
+                    "count": stats.count,
+                    "slow_count": stats.slow,
+                    "total_ms": round(stats.time.total * 1000, 3),
+                    "avg_ms": round(stats.time.total / stats.count * 1000, 3) if stats.count else 0.0,
+                    "p95_ms": round(stats.time.quantile(0.95) * 1000, 3),
+                    "max_ms": round(stats.time.max * 1000, 3),
+                    "last_seen": datetime.utcfromtimestamp(stats.last_seen).isoformat() if stats.last_seen else None,
+                    "slow_sample": stats.sample,
+                    "plan": stats.plan
+                }
+                for shape, stats in self._stats.items()
+            ]
+        key = {"total": "total_ms", "p95": "p95_ms", "max": "max_ms", "count": "count", "slow": "slow_count"}[sort]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def report(self, limit: int = 20, sort: str = "total") -> Dict[str, Any]:
+        with self._lock:
+            fingerprints = len(self._stats)
+            statements = sum(stats.count for stats in self._stats.values())
+        return {
+            "since": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "enabled": QUERY_PROFILER_ENABLED,
+            "slow_threshold_ms": self.slow_seconds * 1000,
+            "fingerprints": fingerprints,
+            "statements": statements,
+            "queries": self.top(limit, sort)
+        }
+
+
+# Installed on every engine by main.py
+query_profiler = QueryProfiler()
@@ -1,6 +1,8 @@
-import bcrypt
 from typing import Optional
 
+from hash_executor import hash_executor
+from utils.hashing import bcrypt_hash, bcrypt_verify
+
 def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt
@@ -11,13 +13,7 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password as string
     """
-    # Convert password to bytes and hash it
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    
-    # Return the hashed password as string
-    return hashed.decode('utf-8')
+    return bcrypt_hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -30,13 +26,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    try:
-        # Convert both to bytes for bcrypt
-        plain_bytes = plain_password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        
-        # Check if password matches
-        return bcrypt.checkpw(plain_bytes, hashed_bytes)
-    except Exception:
-        # Return False for any error (invalid hash format, etc.)
-        return False 
\ No newline at end of file
+    # False for any error (invalid hash format, etc.)
+    return bcrypt_verify(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """
+    ``hash_password`` in the hash executor's process pool, for async handlers
+    
+    Raises:
+        HashPoolSaturated: (429) if too many hash jobs are already in flight
+    """
+    return await hash_executor.run(bcrypt_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    ``verify_password`` in the hash executor's process pool, for async handlers
+    
+    Raises:
+        HashPoolSaturated: (429) if too many hash jobs are already in flight
+    """
+    return await hash_executor.run(bcrypt_verify, plain_password, hashed_password)
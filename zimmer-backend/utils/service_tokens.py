@@ -1,23 +1,88 @@
+import os
+import hmac
+import hashlib
 import secrets
-import bcrypt
 from typing import Optional
 
+from cache_manager import cache
+from hash_executor import hash_executor
+from utils.hashing import bcrypt_hash, bcrypt_verify
+
+# Seconds a verified (automation, token) pair is trusted without bcrypt
+SERVICE_TOKEN_CACHE_TTL = int(os.getenv("SERVICE_TOKEN_CACHE_TTL", "300"))
+
 def generate_token() -> str:
     return secrets.token_hex(32)
 
 def hash_token(token: str) -> str:
-    token_bytes = token.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(token_bytes, salt)
-    return hashed.decode("utf-8")
+    return bcrypt_hash(token)
 
 def verify_token(plain: str, hashed: str) -> bool:
-    try:
-        plain_bytes = plain.encode("utf-8")
-        hashed_bytes = hashed.encode("utf-8")
-        return bcrypt.checkpw(plain_bytes, hashed_bytes)
-    except Exception:
+    return bcrypt_verify(plain, hashed)
+
+async def hash_token_async(token: str) -> str:
+    """hash_token in the hash executor's process pool"""
+    return await hash_executor.run(bcrypt_hash, token)
+
+async def verify_token_async(plain: str, hashed: str) -> bool:
+    """verify_token in the hash executor's process pool"""
+    return await hash_executor.run(bcrypt_verify, plain, hashed)
+
+def service_token_tag(automation_id: int) -> str:
+    """Tag shared by every verified token cached for an automation"""
+    return f"service_token:{automation_id}"
+
+def _verified_key(automation_id: int, plain: str) -> str:
+    return f"service_token:{automation_id}:" + hashlib.sha256(plain.encode("utf-8")).hexdigest()
+
+def _fingerprint(hashed: str) -> str:
+    return hashlib.sha256(hashed.encode("utf-8")).hexdigest()
+
+def _cached_match(automation_id: int, plain: str, hashed: str) -> Optional[str]:
+    """Cache key for the pair, or None when it was already verified against ``hashed``"""
+    key = _verified_key(automation_id, plain)
+    verified_against = cache.get(key)
+    # The entry names the stored hash it was checked against, so a rotation
+    # that did not go through invalidate_service_token still retires it
+    if verified_against is not None and hmac.compare_digest(verified_against, _fingerprint(hashed)):
+        return None
+    return key
+
+def _remember(automation_id: int, key: str, hashed: str) -> None:
+    cache.set(key, _fingerprint(hashed), ttl=SERVICE_TOKEN_CACHE_TTL,
+              tags=[service_token_tag(automation_id)])
+
+def verify_service_token(automation_id: int, plain: str, hashed: str) -> bool:
+    """verify_token for an automation's token, remembering successful checks.
+
+    Only a digest of the presented token is cached, keyed per automation;
+    failed checks are never cached and always pay for bcrypt.
+    """
+    if not plain or not hashed:
+        return False
+    key = _cached_match(automation_id, plain, hashed)
+    if key is None:
+        return True
+    if not verify_token(plain, hashed):
         return False
+    _remember(automation_id, key, hashed)
+    return True
+
+async def verify_service_token_async(automation_id: int, plain: str, hashed: str) -> bool:
+    """verify_service_token with cache misses checked in the hash executor"""
+    if not plain or not hashed:
+        return False
+    key = _cached_match(automation_id, plain, hashed)
+    if key is None:
+        return True
+    if not await verify_token_async(plain, hashed):
+        return False
+    _remember(automation_id, key, hashed)
+    return True
+
+def invalidate_service_token(automation_id: int) -> None:
+    """Forget every verified token of ``automation_id``"""
+    cache.invalidate_tag(service_token_tag(automation_id))
 
 def mask_token(token: str) -> str:
     if len(token) <= 8:
@@ -0,0 +1,126 @@
+"""
+Cache Warm-up for Zimmer AI Platform
+Preloads reference data into the cache at startup so a fresh worker does
+not send its first minutes of traffic straight to the database
+"""
+
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_BUDGET = float(os.getenv("CACHE_WARMUP_BUDGET", "20"))  # seconds
+
+Loader = Callable[[], Union[Any, Awaitable[Any]]]
+
+class WarmupTask:
+    """One registered dataset and the outcome of its last run"""
+
+    def __init__(self, name: str, loader: Loader):
+        self.name = name
+        self.loader = loader
+        self.state = "pending"
+        self.items: Optional[int] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    async def run(self) -> None:
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            # Sync loaders open their own session in a worker thread
+            if asyncio.iscoroutinefunction(self.loader):
+                result = await self.loader()
+            else:
+                result = await asyncio.to_thread(self.loader)
+            self.items = result if isinstance(result, int) else None
+            self.state = "done"
+        except asyncio.CancelledError:
+            self.state = "timed_out"
+            raise
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            print(f"⚠️  Cache warm-up of {self.name} failed: {e}")
+        finally:
+            self.duration = time.perf_counter() - started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "items": self.items,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "error": self.error
+        }
+
+class WarmupRegistry:
+    """Declarative list of datasets to preload, run concurrently under one budget.
+
+    Loaders return the number of items they cached (or anything else) and
+    must be idempotent. The worker is reported ready once every loader has
+    finished or the budget ran out; a failed or unfinished loader only
+    means that dataset is loaded lazily on first use.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, WarmupTask] = {}
+        self.state = "idle"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.budget: Optional[float] = None
+
+    def register(self, name: str) -> Callable[[Loader], Loader]:
+        """Decorator adding ``loader`` to the warm-up under ``name``"""
+        def decorator(loader: Loader) -> Loader:
+            self._tasks[name] = WarmupTask(name, loader)
+            return loader
+        return decorator
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("complete", "partial", "disabled")
+
+    async def run(self, budget: Optional[float] = None) -> Dict[str, Any]:
+        """Run every loader concurrently; give up on the rest after ``budget`` seconds"""
+        self.budget = WARMUP_BUDGET if budget is None else budget
+        self.state = "running"
+        self.started_at = time.time()
+
+        tasks = [asyncio.create_task(task.run()) for task in self._tasks.values()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.budget)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        self.finished_at = time.time()
+        complete = all(task.state == "done" for task in self._tasks.values())
+        self.state = "complete" if complete else "partial"
+        print(f"🔥 Cache warm-up {self.state} in {self.finished_at - self.started_at:.2f}s")
+        return self.status()
+
+    def skip(self) -> None:
+        """Mark the worker ready without preloading (warm-up disabled)"""
+        self.state = "disabled"
+
+    def status(self) -> Dict[str, Any]:
+        """Progress and timings for health and readiness probes"""
+        tasks = self._tasks.values()
+        finished = sum(1 for task in tasks if task.state not in ("pending", "running"))
+        if self.started_at is None:
+            elapsed = None
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "progress": f"{finished}/{len(self._tasks)}",
+            "elapsed_ms": round(elapsed * 1000, 1) if elapsed is not None else None,
+            "budget_seconds": self.budget,
+            "datasets": {task.name: task.to_dict() for task in tasks}
+        }
+
+# Global warm-up registry
+warmup = WarmupRegistry()
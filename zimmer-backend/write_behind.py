@@ -0,0 +1,309 @@
+"""
+Write-Behind Buffer for Zimmer AI Platform
+Append-only event rows (token usage, OpenAI key usage, KB status history,
+fallback logs) are queued in process and inserted in bulk by a background
+flusher, so the request path no longer pays one INSERT + COMMIT (one fsync
+on SQLite) per event. Balance and counter updates stay synchronous.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from cache_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true"
+# A table is flushed as soon as this many rows are waiting...
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+# ...and everything at least this often (seconds): the most a crash can lose
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+# Past this many pending rows new rows are inserted by the caller's own
+# transaction instead of being queued
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "20000"))
+
+# Flush duration bounds in seconds
+FLUSH_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class WriteBehindBuffer:
+    """Per-table queues of rows flushed with one executemany INSERT each"""
+
+    def __init__(self, batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING,
+                 enabled: bool = WRITE_BEHIND_ENABLED):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._queues: Dict[Tuple[Engine, Any], Deque[Dict[str, Any]]] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Serializes flushes so rows of one table are inserted in order
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Async engine -> sync engine on the same database
+        self._sync_engines: Dict[Engine, Engine] = {}
+
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.backpressure_writes = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.flush_time = Histogram(FLUSH_BUCKETS)
+
+    def use_sync_engine(self, async_engine, engine: Engine) -> None:
+        """Flush rows queued from sessions on ``async_engine`` through ``engine``"""
+        self._sync_engines[async_engine.sync_engine] = engine
+
+    def _session_engine(self, session) -> Optional[Engine]:
+        """Sync engine behind a session, or None when bound to a connection"""
+        bind = session.bind or session.get_bind()
+        bind = getattr(bind, "sync_engine", bind)
+        if not isinstance(bind, Engine):
+            return None
+        if bind.dialect.is_async:
+            return self._sync_engines.get(bind)
+        return bind
+
+    def add(self, session, model, values: Dict[str, Any]) -> None:
+        """Queue one row of ``model`` for insertion into ``session``'s database.
+
+        The row is staged on the session and only queued once its transaction
+        commits, so a rolled back deduction never leaves a usage row behind.
+        Falls back to ``session.add`` (committed by the caller as before)
+        when the buffer is disabled, the session is bound to a connection,
+        its async engine has no registered sync counterpart or the queue is
+        full.
+        """
+        engine = self._session_engine(session) if self.enabled else None
+        if engine is None:
+            session.add(model(**values))
+            return
+
+        with self._lock:
+            overloaded = self._pending >= self.max_pending
+            if overloaded:
+                self.backpressure_writes += 1
+        if overloaded:
+            # The flusher is not keeping up: the row is written by the
+            # caller's own commit (awaited on async sessions) instead of
+            # growing the queue or being dropped
+            self._wakeup.set()
+            session.add(model(**values))
+            return
+
+        table = model.__table__
+        row = dict(values)
+        # Server-side defaults would stamp the flush time, not the event time
+        for column in table.columns:
+            if column.key not in row and column.server_default is not None and isinstance(column.type, DateTime):
+                row[column.key] = datetime.utcnow()
+
+        session = getattr(session, "sync_session", session)
+        if not session.in_transaction():
+            # Like session.add: the row belongs to the transaction it starts
+            session.begin()
+        session.info.setdefault(_STAGED_KEY, []).append((self, engine, table, row))
+
+    def _enqueue(self, rows: List[Tuple[Engine, Any, Dict[str, Any]]]) -> None:
+        """Queue rows whose transaction has committed"""
+        if self._thread is None:
+            self.start()
+        wake = False
+        with self._lock:
+            for engine, table, row in rows:
+                queue = self._queues.setdefault((engine, table), deque())
+                queue.append(row)
+                self._pending += 1
+                self.enqueued += 1
+                wake = wake or len(queue) >= self.batch_size
+            wake = wake or self._pending >= self.max_pending
+        if wake:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def flush(self) -> int:
+        """Insert everything queued so far; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                keys = [key for key, queue in self._queues.items() if queue]
+            for engine, table in keys:
+                written += self._flush_table(engine, table)
+        return written
+
+    def _flush_table(self, engine: Engine, table) -> int:
+        with self._lock:
+            queue = self._queues[(engine, table)]
+            rows = list(queue)
+            queue.clear()
+
+        started = time.perf_counter()
+        try:
+            self._insert(engine, table, rows)
+        except (exc.IntegrityError, exc.DataError) as e:
+            return self._isolate(engine, table, rows, e)
+        except exc.DBAPIError as e:
+            # Database unreachable or locked
+            return self._requeue(queue, table, rows, e)
+        except exc.StatementError as e:
+            # Values the driver could not bind
+            return self._isolate(engine, table, rows, e)
+        except exc.SQLAlchemyError as e:
+            # Pool checkout timeout and other errors raised before the
+            # statement reached the database
+            return self._requeue(queue, table, rows, e)
+        except Exception as e:
+            return self._isolate(engine, table, rows, e)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._pending -= len(rows)
+            self.written += len(rows)
+            self.flushes += 1
+            self.last_flush_at = time.time()
+            self.flush_time.observe(elapsed)
+        return len(rows)
+
+    def _requeue(self, queue: Deque[Dict[str, Any]], table, rows: List[Dict[str, Any]], error: Exception) -> int:
+        """Keep the rows for the next round; ``add`` bounds the queue"""
+        with self._lock:
+            queue.extendleft(reversed(rows))
+        self._record_failure(f"{table.name}: {error}", dropped=0)
+        return 0
+
+    @staticmethod
+    def _insert(engine: Engine, table, rows: List[Dict[str, Any]]) -> None:
+        # executemany needs one column set per statement
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        with engine.begin() as conn:
+            for group in groups.values():
+                conn.execute(table.insert(), group)
+
+    def _isolate(self, engine: Engine, table, rows: List[Dict[str, Any]], error: Exception) -> int:
+        """Retry row by row so one bad row does not take the batch with it"""
+        written = 0
+        for row in rows:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(table.insert(), [row])
+                written += 1
+            except Exception as e:
+                logger.error(f"Dropping {table.name} row after a failed insert: {e}")
+        with self._lock:
+            self._pending -= len(rows)
+            self.written += written
+        self._record_failure(f"{table.name}: {error}", dropped=len(rows) - written)
+        return written
+
+    def _record_failure(self, error: str, dropped: int) -> None:
+        logger.error(f"Write-behind flush failed: {error}")
+        with self._lock:
+            self.failed_flushes += 1
+            self.dropped += dropped
+            self.last_error = error
+
+    # Background flusher
+
+    def start(self) -> None:
+        with self._lock:
+            if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flusher error: {e}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and write out whatever is still queued"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            by_table: Dict[str, int] = {}
+            for (_, table), queue in self._queues.items():
+                by_table[table.name] = by_table.get(table.name, 0) + len(queue)
+            return {
+                'enabled': self.enabled,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'batch_size': self.batch_size,
+                'flush_interval_seconds': self.flush_interval,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'pending_by_table': by_table,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes,
+                'dropped': self.dropped,
+                'backpressure_writes': self.backpressure_writes,
+                'last_flush_at': datetime.utcfromtimestamp(self.last_flush_at).isoformat() if self.last_flush_at else None,
+                'last_error': self.last_error,
+                'flush_time': self.flush_time.snapshot()
+            }
+
+
+# Rows staged by ``add`` move to their buffer's queue when the session's
+# transaction commits and are discarded when it ends any other way (rollback
+# or close); a savepoint rollback leaves the outer transaction's rows alone
+
+_STAGED_KEY = "write_behind_rows"
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed(session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if not staged:
+        return
+    by_buffer: Dict["WriteBehindBuffer", List[Tuple[Engine, Any, Dict[str, Any]]]] = {}
+    for buffer, engine, table, row in staged:
+        by_buffer.setdefault(buffer, []).append((engine, table, row))
+    for buffer, rows in by_buffer.items():
+        buffer._enqueue(rows)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_STAGED_KEY, None)
+
+
+# Starts its flusher with the first queued row; main.py stops it on shutdown
+# and the atexit hook covers scripts and workers that exit without one
+write_behind = WriteBehindBuffer()
+atexit.register(write_behind.stop)